@@ -1,4 +1,8 @@
 from .adapter import Adapter, FakeAdapter
+from .lan import LANAdapter
+from .pool import AdapterPool, LockedAdapter, acquire
+from .sim import SimulatedAdapter, SimulatedBench
+from .stats import InstrumentedAdapter
 
 try:
 	from .visa import VISAAdapter
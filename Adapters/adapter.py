@@ -1,5 +1,71 @@
+import re
 import numpy as np
 from copy import copy
+from .block import BlockReader
+
+
+# NumPy types used to convert a whole reply at once for the common casts
+_ARRAY_CASTS = {float: np.float64, int: np.int64, bool: np.float64}
+
+
+def parse_values(reply, separator=',', cast=float, container=list):
+	""" Splits an ASCII reply into a list or NumPy array of values. Numeric casts
+	convert the whole reply in one NumPy call, and only fall back to casting each
+	element when the reply holds non-numeric tokens.
+	:param reply: ASCII response of the instrument
+	:param separator: A separator character to split the string into a list
+	:param cast: A type to cast the result
+	:param container: :code:`list`, or :code:`np.ndarray` to return a NumPy array
+	:returns: A container of the desired type, or strings where the casting fails
+	"""
+	results = str(reply).strip().split(separator)
+	dtype = _ARRAY_CASTS.get(cast)
+	if dtype is None and isinstance(cast, type) and issubclass(cast, np.generic):
+		dtype = cast
+	if dtype is not None:
+		try:
+			array = np.array(results, dtype=dtype)
+		except (ValueError, TypeError, OverflowError):
+			pass  # Non-numeric tokens, cast element by element
+		else:
+			if cast == bool:
+				array = array != 0
+			return array.tolist() if container is list else array
+	for i, result in enumerate(results):
+		try:
+			if cast == bool:
+				# Need to cast to float first since results are usually
+				# strings and bool of a non-empty string is always True
+				results[i] = bool(float(result))
+			else:
+				results[i] = cast(result)
+		except Exception:
+			pass  # Keep as string
+	return results if container is list else np.array(results)
+
+
+def short_header(header):
+	""" Returns the SCPI short form of a command header, so that
+	:code:`:FORMat:TRACe:DATA?`, :code:`FORM:TRACE:DATA?` and :code:`FORM:TRAC:DATA?`
+	all give :code:`FORM:TRAC:DATA?`. The default numeric suffix 1 is dropped, so
+	:code:`SENS1:FREQ` is :code:`SENS:FREQ`.
+	:param header: SCPI command header, with or without the leading colon
+	"""
+	header = header.strip().lstrip(':')
+	query = header.endswith('?')
+	nodes = []
+	for node in header.rstrip('?').split(':'):
+		match = re.match(r'(\*?[A-Za-z]+)(\d*)$', node)
+		if match is None:
+			nodes.append(node.upper())
+			continue
+		name, suffix = match.groups()
+		if name != name.upper() and name != name.lower():
+			name = ''.join(c for c in name if c.isupper() or c == '*')
+		elif len(name) > 4 and not name.startswith('*'):
+			name = name[:3] if name[3].upper() in 'AEIOU' else name[:4]
+		nodes.append(name.upper() + (suffix if suffix != '1' else ''))
+	return ':'.join(nodes) + ('?' if query else '')
 
 
 class Adapter(object):
@@ -7,6 +73,9 @@ class Adapter(object):
 	object and the connection, to allow flexible use of different connection 
 	techniques. This class should only be inhereted from.
 	"""
+	compound = False  # Transport can carry ';'-separated SCPI program messages
+	srq = False       # Transport can wait for service requests (wait_for_srq)
+
 	def __init__(self, name, **kwargs):
 		self._name = name
 		#for k,v in kwargs:
@@ -32,35 +101,46 @@ class Adapter(object):
 		"""
 		raise NameError("Adapter (sub)class has not implemented writing")
 
-	def values(self, command, separator=',', cast=float):
+	def values(self, command, separator=',', cast=float, container=list):
 		""" Writes a command to the instrument and returns a list of formatted values from the result 
 		:param command: SCPI command to be sent to the instrument
 		:param separator: A separator character to split the string into a list
 		:param cast: A type to cast the result
-		:returns: A list of the desired type, or strings where the casting fails
+		:param container: :code:`list`, or :code:`np.ndarray` to return a NumPy array
+		:returns: A container of the desired type, or strings where the casting fails
 		"""
-		results = str(self.ask(command)).strip()
-		results = results.split(separator)
-		for i, result in enumerate(results):
-			try:
-				if cast == bool:
-					# Need to cast to float first since results are usually
-					# strings and bool of a non-empty string is always True
-					results[i] = bool(float(result))
-				else:
-					results[i] = cast(result)
-			except Exception:
-				pass  # Keep as string
-		return results
-
-	def binary_values(self, command, header_bytes=0, dtype=np.float32):
+		return parse_values(self.ask(command), separator, cast, container)
+
+	def read_raw(self):
+		""" Reads until the end of the message and returns the resulting bytes
+		:returns: Bytes response of the instrument.
+		"""
+		raise NameError("Adapter (sub)class has not implemented raw reading")
+
+	def binary_values(self, command, header_bytes=None, dtype=np.float32, is_big_endian=False, copy=True):
 		""" Returns a numpy array from a query for binary data 
 		:param command: SCPI command to be sent to the instrument
-		:param header_bytes: Integer number of bytes to ignore in header
+		:param header_bytes: Integer number of bytes to ignore in header, or None
+							 to parse the IEEE 488.2 block header (#<n><length>)
 		:param dtype: The NumPy data type to format the values with
+		:param is_big_endian: True if the instrument sends the most significant byte first
+		:param copy: If False, the array is a view of the receive buffer of the
+					 adapter, valid only until the next transfer
 		:returns: NumPy array of values
 		"""
-		raise NameError("Adapter (sub)class has not implemented the binary_values method")
+		self.write(command)
+		return self.blocks.parse(self.read_raw(), dtype, is_big_endian, header_bytes, copy)
+
+	@property
+	def blocks(self):
+		""" The :class:`BlockReader<Adapters.block.BlockReader>` used to decode binary
+		blocks, created on first use so that subclasses need not call this constructor.
+		"""
+		try:
+			return self._blocks
+		except AttributeError:
+			self._blocks = BlockReader()
+			return self._blocks
 
 	query = ask
 
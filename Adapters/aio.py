@@ -0,0 +1,115 @@
+import asyncio
+import functools
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from .pool import LockedAdapter
+
+_executors = weakref.WeakKeyDictionary()
+_executors_lock = threading.Lock()
+
+
+def connection(adapter):
+	""" Returns the object owning the connection of adapter: the shared adapter of
+	a :class:`LockedAdapter<Adapters.pool.LockedAdapter>`, such as a pool handle,
+	or adapter itself
+	"""
+	if isinstance(adapter, LockedAdapter) and adapter._adapter is not None:
+		return adapter._adapter
+	return adapter
+
+
+def executor(key):
+	""" Returns the single worker thread executor that serializes the blocking
+	calls made through key, which is usually an adapter. Calls to different keys
+	run in different threads, so I/O on separate buses overlaps.
+	:param key: Object that owns the connection
+	"""
+	with _executors_lock:
+		pool = _executors.get(key)
+		if pool is None:
+			pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="aio-{}".format(type(key).__name__))
+			_executors[key] = pool
+		return pool
+
+
+def shutdown(key, wait=True):
+	""" Stops the executor of key, if it has one """
+	with _executors_lock:
+		pool = _executors.pop(key, None)
+	if pool is not None:
+		pool.shutdown(wait)
+
+
+def run_concurrently(*awaitables):
+	""" Runs the awaitables concurrently from blocking code and returns their results
+
+	.. code-block:: python
+
+		power, freq = run_concurrently(pm.values("FETC1?"), cnt.values("READ?"))
+	"""
+	async def gather():
+		return await asyncio.gather(*awaitables)
+	return asyncio.run(gather())
+
+
+class AsyncBridge(object):
+	""" Awaitable wrapper around a blocking object. Every call runs in the executor
+	of key, so calls through one bridge (or several bridges sharing a key) keep their
+	order while calls through different keys run at the same time.
+	Handles of one pooled connection share the executor of the connection.
+
+	:param obj: Blocking object, such as an adapter or a console
+	:param key: Object whose executor is used, obj by default
+	"""
+	def __init__(self, obj, key=None):
+		self._obj = obj
+		self._key = connection(obj if key is None else key)
+
+	async def call(self, func, *args, **kwargs):
+		""" Runs func(*args, **kwargs) in the executor and returns its result
+		:param func: Callable, or the name of a method of the wrapped object
+		"""
+		if isinstance(func, str):
+			func = getattr(self._obj, func)
+		loop = asyncio.get_running_loop()
+		return await loop.run_in_executor(executor(self._key), functools.partial(func, *args, **kwargs))
+
+	def __repr__(self):
+		return "<%s(%r)>" % (self.__class__.__name__, self._obj)
+
+
+class AsyncAdapter(AsyncBridge):
+	""" Asyncio counterpart of :class:`Adapter<Adapters.adapter.Adapter>`, bridging
+	the blocking backends through a worker thread per adapter.
+
+	.. code-block:: python
+
+		a = AsyncAdapter(VISAAdapter("PM", "GPIB0::13::INSTR"))
+		power = await a.values("FETC1?")
+	"""
+	async def ask(self, command):
+		""" Writes the command to the instrument and returns the resulting ASCII response """
+		return await self.call(self._obj.ask, command)
+	query = ask
+
+	async def write(self, command):
+		""" Writes a command to the instrument """
+		return await self.call(self._obj.write, command)
+
+	async def read(self):
+		""" Reads until the buffer is empty and returns the resulting ASCII response """
+		return await self.call(self._obj.read)
+
+	async def values(self, command, **kwargs):
+		""" Writes a command to the instrument and returns a list of formatted values
+		from the result, passing on any key-word arguments
+		"""
+		return await self.call(self._obj.values, command, **kwargs)
+
+	async def binary_values(self, command, header_bytes=None, dtype=np.float32, **kwargs):
+		""" Returns a numpy array from a query for binary data, passing on any
+		key-word arguments
+		"""
+		return await self.call(self._obj.binary_values, command, header_bytes, dtype, **kwargs)
@@ -0,0 +1,142 @@
+import numpy as np
+
+
+def block_dtype(dtype=np.float32, is_big_endian=False):
+	""" Returns the NumPy data type with the requested byte order
+	:param dtype: The NumPy data type of the values in the block
+	:param is_big_endian: True if the instrument sends the most significant byte first
+	"""
+	return np.dtype(dtype).newbyteorder('>' if is_big_endian else '<')
+
+
+def block_header(data):
+	""" Parses an IEEE 488.2 binary block header (#<n><length>)
+	:param data: Bytes-like object starting with the block header
+	:returns: Tuple of the data offset and the data length, where the
+			  length is None for an indefinite (#0) block
+	:raises: ValueError if the data does not start with a valid header
+	"""
+	if len(data) < 2 or data[0] != 0x23:
+		raise ValueError("Binary block does not start with '#'")
+	digits = data[1] - 0x30
+	if not 0 <= digits <= 9:
+		raise ValueError("Invalid binary block header digit {!r}".format(chr(data[1])))
+	if digits == 0:
+		return 2, None
+	if len(data) < 2 + digits:
+		raise ValueError("Binary block header is truncated")
+	return 2 + digits, int(bytes(data[2:2 + digits]))
+
+
+class BlockReader(object):
+	""" Decodes IEEE 488.2 definite (#<n><length>) and indefinite (#0) length
+	binary blocks into NumPy arrays without intermediate copies. Replies that
+	are already in memory are wrapped in place, while streamed replies are read
+	directly into a single buffer that is reused between transfers.
+
+	Arrays returned by :meth:`read` are views of that buffer and are only valid
+	until the next read, and the ones returned by :meth:`parse` are read-only
+	views of the reply; pass :code:`copy=True` to keep them longer. The
+	:code:`binary_values` of the adapters copy by default, and take
+	:code:`copy=False` to share the buffer.
+
+	:param size: Initial size of the receive buffer in bytes
+	:param terminator: Bytes sent by the instrument after the block
+	"""
+	def __init__(self, size=65536, terminator=b'\n'):
+		self._buffer = bytearray(size)
+		self.terminator = terminator
+
+	def _reserve(self, size, keep=0):
+		""" Returns a buffer of at least size bytes, preserving the first keep bytes.
+		The buffer is replaced rather than resized, since arrays of the previous
+		transfer may still reference it.
+		"""
+		if len(self._buffer) < size:
+			buf = bytearray(max(size, 2 * len(self._buffer)))
+			buf[:keep] = self._buffer[:keep]
+			self._buffer = buf
+		return self._buffer
+
+	def parse(self, data, dtype=np.float32, is_big_endian=False, header_bytes=None, copy=False):
+		""" Returns a NumPy array of the values in a binary reply held in memory
+		:param data: Bytes-like reply of the instrument
+		:param dtype: The NumPy data type to format the values with
+		:param is_big_endian: True if the values are sent most significant byte first
+		:param header_bytes: Integer number of bytes to ignore in header, or None
+							 to parse the IEEE 488.2 block header
+		:param copy: If True, the array does not reference data
+		:returns: NumPy array of values
+		"""
+		dtype = block_dtype(dtype, is_big_endian)
+		view = memoryview(data).cast('B')
+		if header_bytes is None:
+			offset, length = block_header(view)
+		else:
+			offset, length = header_bytes, None
+		if length is None:
+			length = len(view) - offset
+			term = len(self.terminator)
+			if term and bytes(view[-term:]) == self.terminator:
+				length -= term
+		elif offset + length > len(view):
+			raise ValueError("Binary block is truncated ({} of {} bytes)".format(
+				len(view) - offset, length))
+		values = np.frombuffer(view, dtype=dtype, count=length // dtype.itemsize, offset=offset)
+		return values.copy() if copy else values
+
+	def read(self, readinto, dtype=np.float32, is_big_endian=False, header_bytes=None, copy=False):
+		""" Reads a binary block from a stream and returns its values as a NumPy array
+		:param readinto: Function that fills a writable memoryview and returns the
+						 number of bytes read, or 0 when the transport timed out
+		:param dtype: The NumPy data type to format the values with
+		:param is_big_endian: True if the values are sent most significant byte first
+		:param header_bytes: Integer number of bytes to ignore in header, or None
+							 to parse the IEEE 488.2 block header
+		:param copy: If True, the array does not reference the receive buffer
+		:returns: NumPy array of values
+		"""
+		dtype = block_dtype(dtype, is_big_endian)
+		if header_bytes is None:
+			header = self._fill(readinto, 0, 2)
+			digits = header[1] - 0x30
+			if 0 < digits <= 9:
+				header = self._fill(readinto, 2, 2 + digits)
+			offset, length = block_header(header)
+		else:
+			offset, length = header_bytes, None
+			self._fill(readinto, 0, offset)
+
+		if length is None:
+			end = self._drain(readinto, offset)
+		else:
+			end = offset + length
+			self._fill(readinto, offset, end + len(self.terminator))
+		values = np.frombuffer(self._buffer, dtype=dtype,
+			count=(end - offset) // dtype.itemsize, offset=offset)
+		return values.copy() if copy else values
+
+	def _fill(self, readinto, start, stop):
+		""" Reads into the buffer until it holds stop bytes """
+		buf = memoryview(self._reserve(stop, start))
+		while start < stop:
+			n = readinto(buf[start:stop])
+			if not n:
+				raise ValueError("Binary block timed out after {} of {} bytes".format(start, stop))
+			start += n
+		return buf[:stop]
+
+	def _drain(self, readinto, start):
+		""" Reads an indefinite block until it ends with the terminator and
+		returns the end offset of the data.
+		"""
+		term = self.terminator
+		while True:
+			buf = memoryview(self._reserve(start + 4096, start))
+			n = readinto(buf[start:])
+			start += n
+			if not n or (term and bytes(buf[start - len(term):start]) == term):
+				break
+		if term and bytes(self._buffer[start - len(term):start]) == term:
+			start -= len(term)
+		return start
@@ -1,60 +1,143 @@
 from .adapter import Adapter
+import socket
 import numpy as np
-from copy import copy
 
 
 class LANAdapter(Adapter):
-	""" Base class for Adapter child classes, which adapt between the Instrument 
-	object and the connection, to allow flexible use of different connection 
-	techniques.	This class should only be inhereted from.
+	""" Adapter class for raw SCPI over TCP (SCPI-RAW, usually port 5025), which
+	needs no VISA library. A single connection is kept open with TCP_NODELAY set,
+	and replies are received into a preallocated buffer, from which binary blocks
+	are read without extra copies. A reply that times out midway drops the
+	connection, so that its late remainder is not taken for the next reply, and
+	the next command connects again.
+	:param host: Host name or IP address, or a VISA socket resource name
+				 (TCPIP0::<host>::<port>::SOCKET)
+	:param port: TCP port of the SCPI-RAW server
+	:param timeout: Timeout of socket operations in seconds
+	:param read_termination: Terminator at the end of each reply
+	:param write_termination: Terminator appended to each command
+	:param buffer_size: Initial size of the receive buffer in bytes
 	"""
+	compound = True
+
+	def __init__(self, host, port=5025, timeout=10, read_termination='\n',
+				 write_termination='\n', buffer_size=65536):
+		if '::' in host:
+			fields = host.split('::')
+			host = fields[1]
+			if len(fields) > 3:
+				port = int(fields[2])
+		super(LANAdapter, self).__init__(host)
+		self.host = host
+		self.port = port
+		self.timeout = timeout
+		self.read_termination = read_termination.encode()
+		self.write_termination = write_termination.encode()
+		self.blocks.terminator = self.read_termination
+		self._buffer = bytearray(buffer_size)
+		self._start = 0  # Unread bytes of the buffer are [_start:_end]
+		self._end = 0
+		self.connection = None
+		self.open()
+
+	def __del__(self):
+		""" Ensures the connection is closed upon deletion """
+		self.close()
+
+	def __repr__(self):
+		return "<LANAdapter(host='%s', port=%d)>" % (self.host, self.port)
+
+	def open(self):
+		""" Opens the TCP connection, if it is not open already """
+		if self.connection is None:
+			self.connection = socket.create_connection((self.host, self.port), self.timeout)
+			self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+			self._start = self._end = 0
+
+	def close(self):
+		""" Closes the TCP connection """
+		if getattr(self, 'connection', None) is not None:
+			self.connection.close()
+			self.connection = None
 
 	def write(self, command):
-		""" Writes a command to the instrument
-		:param command: SCPI command string to be sent to the instrument
-		"""
-		raise NameError("Adapter (sub)class has not implemented writing")
+		""" Writes an SCPI command string to the instrument """
+		self.write_raw(command.encode() + self.write_termination)
 
-	def ask(self, command):
-		""" Writes the command to the instrument and returns the resulting ASCII response
-		:param command: SCPI command string to be sent to the instrument
-		:returns: String ASCII response of the instrument
-		"""
-		self.write(command)
-		return self.read()
+	def write_raw(self, data):
+		""" Writes bytes to the instrument """
+		self.open()
+		self.connection.sendall(data)
 
 	def read(self):
-		""" Reads until the buffer is empty and returns the resulting ASCII respone
-		:returns: String ASCII response of the instrument.
-		"""
-		raise NameError("Adapter (sub)class has not implemented reading")
+		""" Reads up to the read terminator and returns the ASCII response without it """
+		return self.read_raw().decode()
 
-	def values(self, command, separator=',', cast=float):
-		""" Writes a command to the instrument and returns a list of formatted values from the result 
-		:param command: SCPI command to be sent to the instrument
-		:param separator: A separator character to split the string into a list
-		:param cast: A type to cast the result
-		:returns: A list of the desired type, or strings where the casting fails
-		"""
-		results = str(self.ask(command)).strip()
-		results = results.split(separator)
-		for i, result in enumerate(results):
+	def read_raw(self):
+		""" Reads up to the read terminator and returns the bytes response without it """
+		term = self.read_termination
+		scanned = 0  # Unread bytes already searched for the terminator
+		while True:
+			index = self._buffer.find(term, self._start + scanned, self._end)
+			if index >= 0:
+				data = bytes(self._buffer[self._start:index])
+				self._start = index + len(term)
+				return data
+			scanned = max(0, self._end - self._start - len(term) + 1)
 			try:
-				if cast == bool:
-					# Need to cast to float first since results are usually
-					# strings and bool of a non-empty string is always True
-					results[i] = bool(float(result))
-				else:
-					results[i] = cast(result)
-			except Exception:
-				pass  # Keep as string
-		return results
-
-	def binary_values(self, command, header_bytes=0, dtype=np.float32):
-		""" Returns a numpy array from a query for binary data 
+				self._receive()
+			except socket.timeout:
+				self.close()
+				raise
+
+	def readinto(self, buf):
+		""" Fills buf with received bytes, draining the receive buffer first
+		:param buf: Writable memoryview
+		:returns: Number of bytes read, or 0 on timeout
+		"""
+		pending = self._end - self._start
+		if pending:
+			n = min(pending, len(buf))
+			buf[:n] = self._buffer[self._start:self._start + n]
+			self._start += n
+			return n
+		try:
+			return self.connection.recv_into(buf)
+		except socket.timeout:
+			self.close()
+			return 0
+
+	def binary_values(self, command, header_bytes=None, dtype=np.float32, is_big_endian=False, copy=True):
+		""" Returns a numpy array from a query for binary data. The block is received
+		straight into the reusable buffer of :attr:`blocks`, and copied out of it
+		unless copy is False.
+
 		:param command: SCPI command to be sent to the instrument
-		:param header_bytes: Integer number of bytes to ignore in header
+		:param header_bytes: Integer number of bytes to ignore in header, or None
+							 to parse the IEEE 488.2 block header (#<n><length>)
 		:param dtype: The NumPy data type to format the values with
+		:param is_big_endian: True if the instrument sends the most significant byte first
+		:param copy: If False, the array is a view of the receive buffer of the
+					 adapter, valid only until the next transfer
 		:returns: NumPy array of values
 		"""
-		raise NameError("Adapter (sub)class has not implemented the binary_values method")
+		self.write(command)
+		return self.blocks.read(self.readinto, dtype, is_big_endian, header_bytes, copy)
+
+	def _receive(self):
+		""" Receives more bytes at the end of the buffer, making room first by
+		moving the unread bytes to the front or by growing the buffer.
+		"""
+		if self._end == len(self._buffer):
+			pending = self._end - self._start
+			if pending == len(self._buffer):
+				buf = bytearray(2 * len(self._buffer))
+				buf[:pending] = self._buffer
+				self._buffer = buf
+			else:
+				self._buffer[:pending] = self._buffer[self._start:self._end]
+			self._start, self._end = 0, pending
+		n = self.connection.recv_into(memoryview(self._buffer)[self._end:])
+		if n == 0:
+			raise ConnectionError("Connection to {}:{} closed".format(self.host, self.port))
+		self._end += n
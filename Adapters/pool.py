@@ -0,0 +1,309 @@
+import atexit
+import sys
+import threading
+from .stats import InstrumentedAdapter
+
+
+def resource_key(address):
+	""" Returns the key under which the connection to address is shared. GPIB
+	primary addresses may be given as integers.
+	:param address: VISA resource name or GPIB primary address
+	"""
+	if isinstance(address, int):
+		address = "GPIB0::%d::INSTR" % address
+	return str(address).strip().upper()
+
+
+def open_adapter(address, **kwargs):
+	""" Opens a new adapter for address, using a raw socket for VISA socket
+	resources and PyVISA otherwise
+	:param address: VISA resource name
+	:param kwargs: Key-word arguments of the adapter
+	"""
+	if address.upper().startswith("TCPIP") and address.upper().endswith("::SOCKET"):
+		from .lan import LANAdapter
+		return LANAdapter(address, **kwargs)
+	from .visa import VISAAdapter, resource_manager
+	return VISAAdapter(address, resource_manager().open_resource(address, **kwargs))
+
+
+class LockedAdapter(object):
+	""" Adapter whose every call holds a lock, so that several threads, such as
+	the worker of :func:`operation_complete<Instruments.status.operation_complete>`
+	and the caller, may share it.
+
+	Use the :attr:`lock` to keep a sequence of calls together:
+
+	.. code-block:: python
+
+		with adptr.lock:
+			adptr.write("INIT")
+			adptr.read()
+
+	:param adapter: Adapter to share
+	:param lock: Lock of the connection, or None for a new one
+	"""
+	def __init__(self, adapter, lock=None):
+		self._adapter = adapter
+		self._locked = {}
+		self.lock = lock if lock is not None else threading.RLock()
+
+	@property
+	def closed(self):
+		return self._adapter is None
+
+	def _open_adapter(self, name):
+		adapter = self._adapter
+		if adapter is None:
+			raise AttributeError(name)
+		return adapter
+
+	def ask(self, command):
+		adapter = self._open_adapter('ask')
+		with self.lock:
+			return adapter.ask(command)
+
+	def write(self, command):
+		adapter = self._open_adapter('write')
+		with self.lock:
+			return adapter.write(command)
+
+	def read(self):
+		adapter = self._open_adapter('read')
+		with self.lock:
+			return adapter.read()
+
+	def values(self, command, *args, **kwargs):
+		adapter = self._open_adapter('values')
+		with self.lock:
+			return adapter.values(command, *args, **kwargs)
+
+	def wait_for_srq(self, timeout=25):
+		""" Waits for a service request without holding the lock, so that the
+		other handles keep using the connection meanwhile
+		"""
+		return self._open_adapter('wait_for_srq').wait_for_srq(timeout)
+
+	def __getattr__(self, name):
+		if name.startswith('__') or self.__dict__.get('_adapter') is None:
+			raise AttributeError(name)
+		locked = self._locked.get(name)
+		if locked is not None:
+			return locked
+		attr = getattr(self._adapter, name)
+		if not callable(attr):
+			return attr
+		lock = self.lock
+		def locked(*args, **kwargs):
+			with lock:
+				return attr(*args, **kwargs)
+		locked.__name__ = name
+		locked.__doc__ = attr.__doc__
+		self._locked[name] = locked
+		return locked
+
+	def close(self):
+		""" Closes the adapter """
+		adapter = self._adapter
+		if adapter is not None:
+			self._adapter = None
+			self._locked = {}
+			if hasattr(adapter, 'close'):
+				with self.lock:
+					adapter.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc, tb):
+		self.close()
+
+	def __repr__(self):
+		return "<LockedAdapter(%r)>" % self._adapter
+
+
+class PooledAdapter(LockedAdapter):
+	""" Handle on an adapter shared through an :class:`AdapterPool`. Every call of
+	the adapter holds the lock of the connection, as with :class:`LockedAdapter`,
+	so instruments on several threads may share it. Closing the handle releases
+	it from the pool once; the connection itself stays open for the other handles.
+	"""
+	def __init__(self, pool, key, adapter, lock):
+		super(PooledAdapter, self).__init__(adapter, lock)
+		self._pool = pool
+		self._key = key
+
+	@property
+	def address(self):
+		return self._key
+
+	def close(self):
+		""" Releases the handle from the pool """
+		if self._adapter is not None:
+			self._adapter = None
+			self._locked = {}
+			self._pool.release(self._key)
+
+	def __del__(self):
+		# No idle timer from a finalizer: a thread started while the interpreter
+		# shuts down hangs the exit, so an unused connection is closed at once
+		if self.__dict__.get('_adapter') is not None:
+			self._adapter = None
+			self._locked = {}
+			self._pool.release(self._key, linger=False)
+
+	def __repr__(self):
+		return "<PooledAdapter(%r)>" % (self._adapter if self._adapter is not None else self._key)
+
+
+class _Entry(object):
+	""" Connection shared by the handles of one address """
+	def __init__(self):
+		self.adapter = None
+		self.kwargs = None
+		self.error = None
+		self.opened = threading.Event()
+		self.lock = threading.RLock()
+		self.refs = 0
+		self.timer = None
+
+
+class AdapterPool(object):
+	""" Process-wide pool of adapters keyed by resource address. Every instrument
+	acquiring the same address gets a handle on the same connection, which is
+	opened on the first acquire and closed once no handle has used it for
+	idle_timeout seconds.
+	:param factory: Callable(address, **kwargs) opening a new adapter
+	:param idle_timeout: Seconds an unused connection is kept open, or None to
+						 keep it until :meth:`close_all`
+	:param instrumented: If True, adapters opened from now on record I/O statistics,
+						 see :meth:`stats`
+	"""
+	def __init__(self, factory=open_adapter, idle_timeout=30.0, instrumented=False):
+		self.factory = factory
+		self.idle_timeout = idle_timeout
+		self.instrumented = instrumented
+		self._entries = {}
+		self._lock = threading.Lock()
+		self._closed = False
+
+	def __contains__(self, address):
+		return resource_key(address) in self._entries
+
+	def __len__(self):
+		return len(self._entries)
+
+	def acquire(self, address, **kwargs):
+		""" Returns a handle on the shared adapter of address, opening it if needed
+		:param address: VISA resource name or GPIB primary address
+		:param kwargs: Key-word arguments of the factory, used when opening. When
+					   the address is already open, the ones given must be those
+					   it was opened with.
+		:raises: ValueError if the address is open with other key-word arguments
+		"""
+		key = resource_key(address)
+		with self._lock:
+			self._closed = False
+			entry = self._entries.get(key)
+			opener = entry is None
+			if opener:
+				entry = self._entries[key] = _Entry()
+				entry.kwargs = kwargs
+			elif kwargs and kwargs != entry.kwargs:
+				raise ValueError("%s is already open with %r, not %r" % (key, entry.kwargs, kwargs))
+			if entry.timer is not None:
+				entry.timer.cancel()
+				entry.timer = None
+			entry.refs += 1
+
+		# Open outside the pool lock, so different addresses open in parallel
+		# while other acquires of this address wait for the first one
+		if opener:
+			try:
+				entry.adapter = self.factory(key if isinstance(address, int) else str(address).strip(), **kwargs)
+				if self.instrumented:
+					entry.adapter = InstrumentedAdapter(entry.adapter)
+			except Exception as e:
+				entry.error = e
+				with self._lock:
+					if self._entries.get(key) is entry:
+						del self._entries[key]
+				raise
+			finally:
+				entry.opened.set()
+		else:
+			entry.opened.wait()
+			if entry.error is not None:
+				raise entry.error
+		return PooledAdapter(self, key, entry.adapter, entry.lock)
+
+	def release(self, address, linger=True):
+		""" Drops one reference on address and schedules closing it when unused
+		:param linger: If False, an unused connection is closed at once instead of
+					   after idle_timeout seconds, as it always is once the pool or
+					   the interpreter is closing
+		"""
+		key = resource_key(address)
+		with self._lock:
+			entry = self._entries.get(key)
+			if entry is None or entry.refs == 0:
+				return
+			entry.refs -= 1
+			if entry.refs:
+				return
+			if self.idle_timeout is None:
+				return
+			if self.idle_timeout <= 0 or not linger or self._closed or sys.is_finalizing():
+				self._discard(key, entry)
+				return
+			entry.timer = threading.Timer(self.idle_timeout, self._expire, (key, entry))
+			entry.timer.daemon = True
+			entry.timer.start()
+
+	def references(self, address):
+		""" Returns the number of open handles on address """
+		entry = self._entries.get(resource_key(address))
+		return entry.refs if entry is not None else 0
+
+	def stats(self):
+		""" Returns the I/O statistics snapshots of the instrumented adapters by address """
+		with self._lock:
+			entries = list(self._entries.items())
+		return dict((key, entry.adapter.snapshot()) for key, entry in entries
+			if isinstance(entry.adapter, InstrumentedAdapter))
+
+	def _expire(self, key, entry):
+		with self._lock:
+			if self._entries.get(key) is entry and entry.refs == 0:
+				self._discard(key, entry)
+
+	def _discard(self, key, entry):
+		""" Closes the adapter of entry, with the pool lock held """
+		del self._entries[key]
+		if entry.timer is not None:
+			entry.timer.cancel()
+			entry.timer = None
+		with entry.lock:
+			if entry.adapter is not None and hasattr(entry.adapter, 'close'):
+				try:
+					entry.adapter.close()
+				except Exception as e:
+					print(key, ":", "Error closing connection")
+					print(e)
+
+	def close_all(self):
+		""" Closes every connection of the pool, whether in use or not """
+		with self._lock:
+			self._closed = True
+			for key, entry in list(self._entries.items()):
+				entry.refs = 0
+				self._discard(key, entry)
+
+
+pool = AdapterPool()
+atexit.register(pool.close_all)
+
+
+def acquire(address, **kwargs):
+	""" Returns a handle on the adapter of address from the shared pool """
+	return pool.acquire(address, **kwargs)
@@ -1,18 +1,31 @@
 from .adapter import Adapter
+from Utilities.ringbuffer import RingBuffer
 import numpy as np
 import serial
 
 class SerialAdapter(Adapter):
 	""" Adapter class for using the Python Serial package to allow
-	serial communication to instrument
+	serial communication to instrument. Queries read their reply until its
+	terminator arrives (:meth:`readline`), rather than until the port times out,
+	and bytes received after the terminator are kept in a ring buffer for the
+	next read. :meth:`read` still collects every line until the port times out.
 	:param port: Serial port
+	:param read_termination: Terminator at the end of each reply
+	:param write_termination: Terminator appended to each command
+	:param buffer_size: Capacity of the receive ring buffer in bytes
 	:param kwargs: Any valid key-word argument for serial.Serial
 	"""
-	def __init__(self, port, **kwargs):
-		if isinstance(port, serial.Serial):
+	compound = True
+
+	def __init__(self, port, read_termination='\n', write_termination='', buffer_size=4096, **kwargs):
+		if isinstance(port, serial.SerialBase):
 			self.connection = port
 		else:
 			self.connection = serial.Serial(port, **kwargs)
+		self.read_termination = read_termination.encode()
+		self.write_termination = write_termination.encode()
+		self.blocks.terminator = self.read_termination
+		self._received = RingBuffer(buffer_size)
 
 	def __del__(self):
 		""" Ensures the connection is closed upon deletion """
@@ -20,24 +33,109 @@ class SerialAdapter(Adapter):
 
 	def write(self, command):
 		""" Writes an SCPI command string to the instrument """
-		self.connection.write(command.encode())  # encode added for Python 3
+		self.connection.write(command.encode() + self.write_termination)  # encode added for Python 3
+
+	def ask(self, command):
+		""" Writes the command to the instrument and returns its reply, read up to
+		the terminator
+		"""
+		self.write(command)
+		return self.readline()
 
 	def read(self):
 		""" Reads until the buffer is empty and returns the resulting ASCII respone """
-		return b"\n".join(self.connection.readlines()).decode()
+		# Bytes received past the end of the last reply come first
+		data = (self._received.read() + b"".join(self.connection.readlines())).split(b"\n")
+		lines = [line + b"\n" for line in data[:-1]] + ([data[-1]] if data[-1] else [])
+		return b"\n".join(lines).decode()
+
+	def readline(self):
+		""" Reads until the terminator and returns the resulting ASCII respone, or
+		what arrived before the port timed out
+		"""
+		return self.read_raw().decode()
+
+	def read_raw(self):
+		""" Reads until the terminator and returns the bytes before it """
+		line = self._readline()
+		return b"" if line is None else line
+
+	def _readline(self):
+		""" Returns the bytes before the next terminator, what arrived before the
+		port timed out, or None if nothing did
+		"""
+		term = self.read_termination
+		received = self._received
+		scanned = 0  # Buffered bytes already searched for the terminator
+		while True:
+			index = received.find(term, scanned)
+			if index >= 0:
+				data = received.read(index)
+				received.skip(len(term))
+				return data
+			scanned = max(0, len(received) - len(term) + 1)
+			if not received.free:
+				self._skip_line()
+				raise ValueError("Reply longer than the {} byte receive buffer of {}".format(
+					received.capacity, self.connection.port))
+			# Block for the first byte, then take whatever else is waiting
+			if not received.fill(self.connection.readinto, max(1, self.connection.in_waiting)):
+				return received.read() if received else None
+
+	def _skip_line(self):
+		""" Drops the bytes received up to the next terminator, so that the read
+		after a reply too long for the buffer starts at the next reply
+		"""
+		term = self.read_termination
+		received = self._received
+		while True:
+			index = received.find(term)
+			if index >= 0:
+				received.skip(index + len(term))
+				return
+			received.skip(max(0, len(received) - len(term) + 1))
+			if not received.fill(self.connection.readinto, max(1, self.connection.in_waiting)):
+				received.clear()
+				return
+
+	def lines(self):
+		""" Iterates over the replies as they arrive, until the port times out
+		without receiving anything
+
+		.. code-block:: python
+
+			for line in adptr.lines():
+				print(line)
+		"""
+		while True:
+			line = self._readline()
+			if line is None:
+				return
+			yield line.decode()
+
+	def readinto(self, buf):
+		""" Fills buf with buffered bytes first, then from the port """
+		n = self._received.readinto(buf)
+		if n:
+			return n
+		return self.connection.readinto(buf)
 
-	def binary_values(self, command, header_bytes=0, dtype=np.float32):
-		""" Returns a numpy array from a query for binary data 
+	def binary_values(self, command, header_bytes=None, dtype=np.float32, is_big_endian=False, copy=True):
+		""" Returns a numpy array from a query for binary data. The block is read
+		straight from the port into the reusable buffer of :attr:`blocks`, and
+		copied out of it unless copy is False.
 
 		:param command: SCPI command to be sent to the instrument
-		:param header_bytes: Integer number of bytes to ignore in header
+		:param header_bytes: Integer number of bytes to ignore in header, or None
+							 to parse the IEEE 488.2 block header (#<n><length>)
 		:param dtype: The NumPy data type to format the values with
+		:param is_big_endian: True if the instrument sends the most significant byte first
+		:param copy: If False, the array is a view of the receive buffer of the
+					 adapter, valid only until the next transfer
 		:returns: NumPy array of values
 		"""
-		self.connection.write(command.encode())
-		binary = self.connection.read().decode()
-		header, data = binary[:header_bytes], binary[header_bytes:]
-		return np.fromstring(data, dtype=dtype)
+		self.write(command)
+		return self.blocks.read(self.readinto, dtype, is_big_endian, header_bytes, copy)
 
 	def __repr__(self):
 		return "<SerialAdapter(port='%s')>" % self.connection.port
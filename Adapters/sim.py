@@ -0,0 +1,412 @@
+import random
+import re
+import time
+from collections import deque
+import numpy as np
+from .adapter import Adapter, short_header
+
+
+class SimulatedError(IOError):
+	""" Error injected by a :class:`SimulatedAdapter` """
+
+
+# Numeric argument with units, and the multipliers of the unit prefixes
+_UNITS = re.compile(r'^([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\s*(K|M|G|MA|U|N)?(HZ|DBM|DB|S|V|A|W)$', re.IGNORECASE)
+_PREFIXES = {'K': 1e3, 'M': 1e6, 'G': 1e9, 'MA': 1e6, 'U': 1e-6, 'N': 1e-9}
+
+
+def strip_units(args):
+	""" Returns a numeric argument in base units without its suffix, so that
+	:code:`1.5 GHz` is stored as :code:`1.5E+09`, and any other argument as is
+	"""
+	match = _UNITS.match(args)
+	if match is None:
+		return args
+	number, prefix, unit = match.groups()
+	if prefix is None:
+		return number
+	scale = _PREFIXES[prefix.upper()]
+	if prefix.upper() == 'M' and unit.upper() in ('S', 'V', 'A', 'W'):
+		scale = 1e-3  # Milli, except in MHz
+	return repr(float(number) * scale)
+
+
+def noisy(level, sigma=0.01):
+	""" Returns a response callable reading level, or the state key named level,
+	plus Gaussian noise of sigma
+	"""
+	def response(sim, args):
+		value = float(sim.state.get(level, 0)) if isinstance(level, str) else level
+		return value + sim.random.gauss(0, sigma)
+	return response
+
+
+def trace(points='SWE:POIN', low=-90.0, high=-20.0):
+	""" Returns a response callable generating a noisy trace with a peak in the
+	middle, whose length is the state key named points
+	"""
+	def response(sim, args):
+		n = int(float(sim.state.get(points, 1001)))
+		x = np.linspace(-1, 1, n)
+		peak = low + (high - low) * np.exp(-(x / 0.02) ** 2)
+		return (peak + sim.rng.normal(0, 0.5, n)).astype(np.float32)
+	return response
+
+
+# Response tables of the simulated models. Keys are command headers in any SCPI
+# form, and values are replies, or callables(sim, args) returning the reply.
+# State stored by set commands answers the matching queries of every model.
+COMMON = {
+	'*ESE': '0',
+	'*SRE': '0',
+}
+
+MODELS = {
+	'E4418B': {
+		'*IDN?': 'Agilent Technologies,E4418B,GB12345678,A2.09.00',
+		'FETC?': noisy(-10.0), 'READ?': noisy(-10.0), 'MEAS?': noisy(-10.0),
+	},
+	'E4419B': {
+		'*IDN?': 'Agilent Technologies,E4419B,GB12345679,A2.09.00',
+		'FETC?': noisy(-10.0), 'FETC2?': noisy(-20.0),
+		'READ?': noisy(-10.0), 'READ2?': noisy(-20.0),
+	},
+	'N9020A': {
+		'*IDN?': 'Agilent Technologies,N9020A,MY12345678,A.14.16',
+		'SWE:POIN': '1001',
+		'TRAC:DATA?': trace(),
+		'CALC:MARK:X?': noisy('SENS:FREQ:CENT', 0.0),
+		'CALC:MARK:Y?': noisy(-20.0, 0.1),
+		'SENS:FREQ:CENT': '1E9',
+	},
+	'E4407B': {
+		'*IDN?': 'Hewlett-Packard,E4407B,US12345678,A.14.01',
+		'SWE:POIN': '401',
+		'TRAC:DATA?': trace(),
+	},
+	'E5071C': {
+		'*IDN?': 'Agilent Technologies,E5071C,MY12345678,B.13.10',
+		'SENS:SWE:POIN': '201',
+		'SENS:FREQ:DATA?': lambda sim, args: np.linspace(
+			float(sim.state.get('SENS:FREQ:STAR', 3e5)), float(sim.state.get('SENS:FREQ:STOP', 8.5e9)),
+			int(sim.state['SENS:SWE:POIN'])),
+		'CALC:DATA:FDAT?': lambda sim, args: np.repeat(trace('SENS:SWE:POIN')(sim, args), 2),
+	},
+	'E4438C': {
+		'*IDN?': 'Agilent Technologies,E4438C,MY12345678,C.05.83',
+	},
+	'33522A': {
+		'*IDN?': 'Agilent Technologies,33522A,MY12345678,2.03-1.19-2.00-52-00',
+	},
+	'34410A': {
+		'*IDN?': 'Agilent Technologies,34410A,MY12345678,2.35-2.35-0.09-46-09',
+		'READ?': noisy(1.0, 1e-4), 'MEAS:VOLT:DC?': noisy(1.0, 1e-4),
+	},
+	'53131A': {
+		'*IDN?': 'HEWLETT-PACKARD,53131A,0,4613',
+		'READ?': noisy(1e7, 0.01), 'MEAS:FREQ?': noisy(1e7, 0.01),
+	},
+	'GENH60-12': {
+		'*IDN?': 'LAMBDA,GENH60-12,123A456-0001,1U:2.0,5U:1.6',
+		'MEAS:VOLT?': noisy('VOLT', 0.001), 'MEAS:CURR?': noisy(1.2, 0.001),
+	},
+	'MSO4034': {
+		'*IDN?': 'TEKTRONIX,MSO4034,C012345,CF:91.1CT FV:v2.13',
+	},
+	'GSG-55': {
+		'*IDN?': 'Spectracom,GSG-55,12345,1.2.3',
+	},
+}
+
+
+class SimulatedAdapter(Adapter):
+	""" Adapter simulating an SCPI instrument from a response table, for running
+	instruments and benchmarks without hardware. Every write and read sleeps for
+	the configured bus latency and transfer time, so timing measurements reflect
+	the number of bus transactions and the bytes moved.
+
+	Queries are answered by the first match of:
+
+	* the response table, where a callable(sim, args) computes the reply
+	* the state stored by a set command of the same header, such as
+	  :code:`FREQ:CENT 1E9` for :code:`FREQ:CENT?`
+	* default, or the error -113 when strict
+
+	Commands listed in durations keep the instrument busy, which :code:`*OPC?`,
+	:code:`*WAI`, :code:`*OPC` with :code:`*ESR?`/:code:`*STB?`, and SRQ (when
+	enabled by :code:`*ESE` and :code:`*SRE`) wait for as on a real instrument.
+
+	Replies that are NumPy arrays are sent as IEEE 488.2 REAL,32 or REAL,64 blocks
+	when :code:`FORM:TRAC:DATA REAL,32` (or :code:`FORM REAL,64`) was set, and as
+	comma-separated ASCII otherwise.
+
+	.. code-block:: python
+
+		adptr = SimulatedAdapter('N9020A', latency=0.002, bandwidth=1e6)
+		sa = SpecAnalyzer(splitResourceID(adptr.ask('*IDN?')), adptr)
+		sa.trace()
+
+	:param model: Name of a model in :data:`MODELS`, or None
+	:param responses: Dictionary of responses added to (or replacing) the model ones
+	:param latency: Seconds per bus transaction
+	:param jitter: Maximum random deviation of the latency, in seconds
+	:param bandwidth: Bytes per second of the bus, or None for no transfer time
+	:param error_rate: Probability of each transaction raising a :class:`SimulatedError`
+	:param strict: If True, unknown queries queue the error -113 and send no reply
+	:param default: Reply to unknown queries when not strict
+	:param seed: Seed of the random generator, for repeatable noise and errors
+	:param sleep: Function used to wait, :code:`time.sleep` by default
+	:param durations: Dictionary of seconds each command header keeps the instrument busy
+	:param srq: If False, the simulated bus has no SRQ line
+	"""
+	compound = True
+
+	def __init__(self, model=None, responses=None, latency=0.0, jitter=0.0, bandwidth=None,
+				 error_rate=0.0, strict=False, default='0', seed=None, sleep=time.sleep,
+				 read_termination='\n', durations=None, srq=True, **kwargs):
+		super(SimulatedAdapter, self).__init__(model or "SIM", **kwargs)
+		self.model = model
+		self.responses = {}
+		self.update(COMMON)
+		if model is not None:
+			self.update(MODELS[model])
+		if responses:
+			self.update(responses)
+		self.latency = latency
+		self.jitter = jitter
+		self.bandwidth = bandwidth
+		self.error_rate = error_rate
+		self.strict = strict
+		self.default = default
+		self.random = random.Random(seed)
+		self.rng = np.random.default_rng(seed)
+		self.sleep = sleep
+		self.durations = dict((short_header(h), d) for h, d in (durations or {}).items())
+		self.srq = srq
+		self._busy_until = 0.0
+		self._opc = False
+		self._esr = 0
+		self.read_termination = read_termination.encode()
+		self.blocks.terminator = self.read_termination
+		self.state = {}
+		self.errors = deque()
+		self._output = deque()
+		self.reset()
+		self.transactions = 0
+		self.bytes_written = 0
+		self.bytes_read = 0
+		self.busy = 0.0
+
+	def __repr__(self):
+		return "<SimulatedAdapter(model='%s')>" % self.model
+
+	def update(self, responses):
+		""" Adds responses to the table. Responses to set commands (headers without
+		'?') become the initial state. """
+		for header, response in responses.items():
+			self.responses[short_header(header)] = response
+
+	def reset(self):
+		""" Restores the initial state and clears the error queue (*RST, *CLS) """
+		self.state = dict((header, response) for header, response in self.responses.items()
+			if not header.endswith('?') and not callable(response))
+		self.errors.clear()
+
+	def close(self):
+		self._output.clear()
+
+	# Bus model
+
+	def _transact(self, size):
+		""" Waits for one bus transaction of size bytes and injects errors """
+		self.transactions += 1
+		delay = self.latency
+		if self.jitter:
+			delay = max(0.0, delay + self.random.uniform(-self.jitter, self.jitter))
+		if self.bandwidth:
+			delay += size / float(self.bandwidth)
+		self.busy += delay
+		if delay > 0:
+			self.sleep(delay)
+		if self.error_rate and self.random.random() < self.error_rate:
+			raise SimulatedError("Simulated bus error on %s" % self.model)
+
+	# Adapter interface
+
+	def write(self, command):
+		""" Executes an SCPI program message, queueing the replies of its queries """
+		self.write_raw(command.encode())
+
+	def write_raw(self, data):
+		self._transact(len(data))
+		self.bytes_written += len(data)
+		replies = []
+		for command in data.decode().strip().split(';'):
+			if command.strip():
+				reply = self.execute(command)
+				if reply is not None:
+					replies.append(reply)
+		if replies:
+			self._output.append(b';'.join(replies) + self.read_termination)
+
+	def read_raw(self):
+		""" Returns the next reply, including its terminator """
+		if not self._output:
+			self._transact(0)
+			raise SimulatedError("Simulated timeout: %s has no reply queued" % self.model)
+		data = self._output.popleft()
+		self._transact(len(data))
+		self.bytes_read += len(data)
+		return data
+
+	def read(self):
+		data = self.read_raw()
+		if data.endswith(self.read_termination):
+			data = data[:-len(self.read_termination)]
+		return data.decode()
+
+	def read_bytes(self, size):
+		data = self.read_raw()
+		if len(data) > size:
+			self._output.appendleft(data[size:])
+			data = data[:size]
+		return data
+
+	# Instrument model
+
+	def execute(self, command):
+		""" Executes a single SCPI command and returns its reply as bytes, or None """
+		header, _, args = command.strip().partition(' ')
+		header = short_header(header)
+		args = args.strip()
+		if header == '*RST':
+			self.reset()
+			return None
+		if header == '*CLS':
+			self.errors.clear()
+			self._esr = 0
+			self._opc = False
+			return None
+		if header == '*OPC':
+			self._opc = True
+			return None
+		if header in ('*OPC?', '*WAI'):
+			self._settle()
+			return b'1' if header == '*OPC?' else None
+		if header == '*ESR?':
+			esr = self._event_status()
+			self._esr = 0
+			return str(esr).encode()
+		if header == '*STB?':
+			return str(self._status_byte()).encode()
+		if header in ('SYST:ERR?', 'SYST:ERR:NEXT?'):
+			return (self.errors.popleft() if self.errors else '+0,"No error"').encode()
+		if header == 'SYST:ERR:ALL?':
+			errors = ','.join(self.errors) or '+0,"No error"'
+			self.errors.clear()
+			return errors.encode()
+
+		if not header.endswith('?'):
+			if header in self.durations:
+				self._busy_until = max(time.time(), self._busy_until) + self.durations[header]
+			response = self.responses.get(header)
+			if callable(response):
+				response(self, args)
+			else:
+				self.state[header] = strip_units(args)
+			return None
+
+		response = self.responses.get(header)
+		if response is None:
+			response = self.state.get(header[:-1])
+		if callable(response):
+			response = response(self, args)
+		if response is None:
+			if self.strict:
+				self.errors.append('-113,"Undefined header;%s"' % header)
+				return None
+			response = self.default
+		return self.format(response)
+
+	def _settle(self):
+		""" Waits for the pending operations to complete """
+		remaining = self._busy_until - time.time()
+		if remaining > 0:
+			self.sleep(remaining)
+
+	def _event_status(self):
+		""" Returns the standard event status register """
+		if self._opc and time.time() >= self._busy_until:
+			self._esr |= 0x01
+			self._opc = False
+		return self._esr
+
+	def _status_byte(self):
+		""" Returns the status byte, with MAV, ESB and RQS """
+		stb = 0x10 if self._output else 0
+		if self._event_status() & int(self.state.get('*ESE', 0)):
+			stb |= 0x20
+		if stb & int(self.state.get('*SRE', 0)):
+			stb |= 0x40
+		return stb
+
+	def wait_for_srq(self, timeout=25):
+		""" Blocks until a SRQ, and leaves the bit high
+
+		:param timeout: Timeout duration in seconds
+		"""
+		if not self.srq:
+			raise SimulatedError("Simulated bus of %s has no SRQ line" % self.model)
+		deadline = time.time() + timeout
+		while not self._status_byte() & 0x40:
+			remaining = deadline - time.time()
+			if remaining <= 0:
+				raise SimulatedError("Simulated timeout waiting for SRQ from %s" % self.model)
+			self.sleep(min(remaining, max(self._busy_until - time.time(), 0.001)))
+
+	def format(self, response):
+		""" Encodes a reply, using a binary block for arrays when a REAL format is set """
+		if isinstance(response, bytes):
+			return response
+		if isinstance(response, np.ndarray):
+			form = self.state.get('FORM:TRAC:DATA', self.state.get('FORM', 'ASC')).upper()
+			if form.startswith('REAL'):
+				dtype = np.float64 if form.endswith('64') else np.float32
+				order = '<' if self.state.get('FORM:BORD', 'NORM').upper().startswith('SWAP') else '>'
+				data = response.astype(np.dtype(dtype).newbyteorder(order)).tobytes()
+				length = str(len(data)).encode()
+				return b'#' + str(len(length)).encode() + length + data
+			return ','.join('%.6E' % x for x in response).encode()
+		if isinstance(response, float):
+			return ('%.9E' % response).encode()
+		return str(response).encode()
+
+
+class SimulatedBench(object):
+	""" Set of simulated instruments by VISA address, usable as the resource
+	manager of a :class:`Station<Utilities.devmngr.Station>` and as the factory of
+	an :class:`AdapterPool<Adapters.pool.AdapterPool>`.
+
+	.. code-block:: python
+
+		bench = SimulatedBench({"GPIB0::13::INSTR": "E4418B"}, latency=0.004)
+		pool.factory = bench.open
+		station = Station(rm=bench)
+
+	:param models: Dictionary of model names by address
+	:param kwargs: Key-word arguments of every :class:`SimulatedAdapter`
+	"""
+	def __init__(self, models, **kwargs):
+		self.models = dict(models)
+		self.kwargs = kwargs
+
+	def list_resources(self):
+		return tuple(self.models)
+
+	def open(self, address, **kwargs):
+		""" Returns a new simulated adapter for the instrument at address """
+		if address not in self.models:
+			raise SimulatedError("No simulated instrument at %s" % address)
+		options = dict(self.kwargs)
+		options.update(kwargs)
+		return SimulatedAdapter(self.models[address], **options)
@@ -0,0 +1,213 @@
+import heapq
+import json
+import socket
+import threading
+import time
+from bisect import bisect_left
+from .adapter import short_header
+
+# Upper bounds of the latency histogram buckets in seconds; the last bucket
+# counts everything slower
+BUCKETS = (1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+VI_ERROR_TMO = -1073807339
+
+
+def is_timeout(error):
+	""" Returns True if error is a timeout of any of the adapter backends """
+	if isinstance(error, (socket.timeout, TimeoutError)):
+		return True
+	return getattr(error, 'error_code', None) == VI_ERROR_TMO or 'timeout' in str(error).lower()
+
+
+def command_key(command):
+	""" Returns the statistics key of a command: its short form header, or the
+	headers of every command of a compound message
+	"""
+	if command is None:
+		return "<read>"
+	return ';'.join(short_header(c.split(None, 1)[0]) for c in command.split(';') if c.strip())
+
+
+class CommandStats(object):
+	""" Latency histogram and counters of one command """
+	__slots__ = ('calls', 'total', 'min', 'max', 'buckets', 'bytes_out', 'bytes_in',
+				 'errors', 'timeouts', 'retries')
+
+	def __init__(self):
+		self.calls = 0
+		self.total = 0.0
+		self.min = None
+		self.max = 0.0
+		self.buckets = [0] * (len(BUCKETS) + 1)
+		self.bytes_out = 0
+		self.bytes_in = 0
+		self.errors = 0
+		self.timeouts = 0
+		self.retries = 0
+
+	def add(self, elapsed, bytes_out, bytes_in):
+		self.calls += 1
+		self.total += elapsed
+		self.min = elapsed if self.min is None else min(self.min, elapsed)
+		self.max = max(self.max, elapsed)
+		self.buckets[bisect_left(BUCKETS, elapsed)] += 1
+		self.bytes_out += bytes_out
+		self.bytes_in += bytes_in
+
+	def percentile(self, p):
+		""" Returns the upper bound of the bucket holding the p-th percentile """
+		rank = p / 100.0 * self.calls
+		count = 0
+		for i, n in enumerate(self.buckets):
+			count += n
+			if n and count >= rank:
+				return BUCKETS[i] if i < len(BUCKETS) else self.max
+		return 0.0
+
+	def as_dict(self):
+		return {
+			'calls': self.calls,
+			'total': self.total,
+			'mean': self.total / self.calls if self.calls else 0.0,
+			'min': self.min or 0.0,
+			'max': self.max,
+			'p50': self.percentile(50),
+			'p99': self.percentile(99),
+			'histogram': dict(zip([str(b) for b in BUCKETS] + ['inf'], self.buckets)),
+			'bytes_out': self.bytes_out,
+			'bytes_in': self.bytes_in,
+			'errors': self.errors,
+			'timeouts': self.timeouts,
+			'retries': self.retries,
+		}
+
+
+def _size(data):
+	""" Returns the size in bytes of a command or reply """
+	if data is None:
+		return 0
+	if hasattr(data, 'nbytes'):
+		return data.nbytes
+	if isinstance(data, (list, tuple)):
+		return sum(_size(d) for d in data)
+	if isinstance(data, (bytes, bytearray, str)):
+		return len(data)
+	return 0
+
+
+class InstrumentedAdapter(object):
+	""" Wraps an adapter to record, per command header, a latency histogram, the
+	bytes sent and received, errors, timeouts and retries, along with the slowest
+	calls. Recording costs a clock read and a dictionary update per call, and
+	nothing is printed.
+
+	.. code-block:: python
+
+		adptr = InstrumentedAdapter(VISAAdapter("PM", "GPIB0::13::INSTR"))
+		pm = PowerMeter(mm, adptr)
+		...
+		print(adptr.to_json(indent=2))
+
+	A command sent again after it failed counts as a retry.
+
+	:param adapter: The adapter to measure
+	:param slowest: Number of slowest calls kept
+	"""
+	_MEASURED = ('ask', 'write', 'write_raw', 'values', 'ask_values', 'binary_values')
+	_READS = ('read', 'read_raw', 'read_bytes')
+
+	def __init__(self, adapter, slowest=20):
+		self._adapter = adapter
+		self._slowest_size = slowest
+		self._lock = threading.Lock()
+		self.reset()
+
+	def __repr__(self):
+		return "<InstrumentedAdapter(%r)>" % self._adapter
+
+	def __getattr__(self, name):
+		if name.startswith('__') or '_adapter' not in self.__dict__:
+			raise AttributeError(name)
+		attr = getattr(self._adapter, name)
+		if name in self._MEASURED or name in self._READS:
+			attr = self.__dict__[name] = self._measure(name, attr)
+		return attr
+
+	def reset(self):
+		""" Clears every statistic """
+		with self._lock:
+			self._commands = {}
+			self._slowest = []
+			self._failed = set()
+			self._sequence = 0
+			self._started = time.time()
+
+	def _measure(self, name, method):
+		reads = name in self._READS
+		def measured(*args, **kwargs):
+			command = args[0] if args and not reads else None
+			if isinstance(command, (bytes, bytearray)):
+				command = command.decode(errors='replace')
+			key = command_key(command)
+			start = time.perf_counter()
+			try:
+				result = method(*args, **kwargs)
+			except Exception as e:
+				self._record(key, name, command, time.perf_counter() - start, 0, e)
+				raise
+			self._record(key, name, command, time.perf_counter() - start, _size(result), None)
+			return result
+		measured.__name__ = name
+		measured.__doc__ = method.__doc__
+		return measured
+
+	def _record(self, key, method, command, elapsed, bytes_in, error):
+		with self._lock:
+			stats = self._commands.get(key)
+			if stats is None:
+				stats = self._commands[key] = CommandStats()
+			stats.add(elapsed, _size(command), bytes_in)
+			if command in self._failed:
+				stats.retries += 1
+				self._failed.discard(command)
+			if error is not None:
+				stats.errors += 1
+				if is_timeout(error):
+					stats.timeouts += 1
+				if command is not None:
+					self._failed.add(command)
+			self._sequence += 1
+			call = (elapsed, self._sequence, method, command, repr(error) if error else None)
+			if len(self._slowest) < self._slowest_size:
+				heapq.heappush(self._slowest, call)
+			elif elapsed > self._slowest[0][0]:
+				heapq.heapreplace(self._slowest, call)
+
+	def top(self, n=10, by='total'):
+		""" Returns the n (key, statistics) pairs with the highest statistic by,
+		such as 'total', 'calls', 'max' or 'bytes_in'
+		"""
+		with self._lock:
+			items = [(key, stats.as_dict()) for key, stats in self._commands.items()]
+		return sorted(items, key=lambda item: item[1][by], reverse=True)[:n]
+
+	def snapshot(self):
+		""" Returns every statistic as a dictionary """
+		with self._lock:
+			commands = dict((key, stats.as_dict()) for key, stats in self._commands.items())
+			slowest = [{'elapsed': elapsed, 'method': method, 'command': command, 'error': error}
+				for elapsed, seq, method, command, error in sorted(self._slowest, reverse=True)]
+		return {
+			'adapter': repr(self._adapter),
+			'started': self._started,
+			'duration': time.time() - self._started,
+			'calls': sum(c['calls'] for c in commands.values()),
+			'busy': sum(c['total'] for c in commands.values()),
+			'commands': commands,
+			'slowest': slowest,
+		}
+
+	def to_json(self, **kwargs):
+		""" Returns the snapshot as JSON, with key-word arguments of json.dumps """
+		return json.dumps(self.snapshot(), **kwargs)
@@ -2,6 +2,22 @@ from .adapter import Adapter
 #import copy
 import visa
 import numpy as np
+import threading
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def resource_manager():
+	""" Returns the VISA resource manager shared by every adapter of the process,
+	creating it on first use
+	"""
+	global _manager
+	with _manager_lock:
+		if _manager is None:
+			_manager = visa.ResourceManager()
+		return _manager
+
 
 class VISAAdapter(Adapter):
 	""" Adapter class for the VISA library using PyVISA to communicate
@@ -10,14 +26,16 @@ class VISAAdapter(Adapter):
 	:param resource: VISA resource connection
 	:param kwargs: Any valid key-word arguments for constructing a PyVISA instrument
 	"""
+	compound = True
+	srq = True
+
 	def __init__(self, resourceName, resource, **kwargs):
 		#if isinstance(resourceName, int):
 		#	resourceName = "GPIB0::%d::INSTR" % resourceName
 		super(VISAAdapter, self).__init__(resourceName)
 		if(isinstance(resource, str)):
 			try:
-				rm = visa.ResourceManager()
-				resource = rm.open_resource(resource)
+				resource = resource_manager().open_resource(resource)
 			except visa.VisaIOError as e:
 				print(resource, ":", "Visa IO Error: check connections")
 				print(e)
@@ -35,6 +53,12 @@ class VISAAdapter(Adapter):
 	def __repr__(self):
 		return "<VISAAdapter(resource='%s')>" % self.connection
 
+	def close(self):
+		""" Closes the VISA session """
+		if getattr(self, 'connection', None) is not None and not isinstance(self.connection, str):
+			self.connection.close()
+		self.connection = None
+
 	def ask(self, command):
 		""" Writes the command to the instrument and returns the resulting
 		ASCII response
@@ -54,23 +78,14 @@ class VISAAdapter(Adapter):
 		"""
 		return self.connection.query_values(command)
 
-	def binary_values(self, command, header_bytes=0, dtype=np.float32):
-		""" Returns a numpy array from a query for binary data
-
-		:param command: SCPI command to be sent to the instrument
-		:param header_bytes: Integer number of bytes to ignore in header
-		:param dtype: The NumPy data type to format the values with
-		:returns: NumPy array of values
-		"""
-		self.connection.write(command)
-		binary = self.connection.read_raw()
-		header, data = binary[:header_bytes], binary[header_bytes:]
-		return np.fromstring(data, dtype=dtype)
-
 	def read(self):
 		""" Reads until the buffer is empty and returns the resulting ASCII response """
 		return self.connection.read()
 
+	def read_raw(self):
+		""" Reads until the end of the message and returns the resulting bytes """
+		return self.connection.read_raw()
+
 	def read_bytes(self, size):
 		""" Reads specified number of bytes from the buffer and returns
 		the resulting ASCII response
@@ -14,6 +14,7 @@ class VXI11Adapter(Adapter):
 	:param host: string containing the visa connection information.
 
 	"""
+	compound = True
 
 	def __init__(self, host, **kwargs):
 
@@ -0,0 +1,66 @@
+import asyncio
+import numpy as np
+from Adapters.aio import AsyncBridge
+
+
+class AsyncInstrument(AsyncBridge):
+	""" Asyncio facade of a :class:`BaseInstrument<Instruments.instrument.BaseInstrument>`.
+	Calls run in the worker thread of the instrument's connection, which a parent
+	instrument shares with its channels and with the other instruments holding a
+	handle on it from the pool, so a power meter, a counter and a console on
+	separate buses can all be in flight at once.
+
+	.. code-block:: python
+
+		pm, cnt = AsyncInstrument(pm), AsyncInstrument(cnt)
+		power, freq = await asyncio.gather(pm.call(lambda: pm.obj.ch1.power()), cnt.value("READ?"))
+
+	:param instrument: Instrument to wrap
+	"""
+	def __init__(self, instrument):
+		super(AsyncInstrument, self).__init__(instrument, instrument._adapter)
+
+	@property
+	def obj(self):
+		""" The wrapped instrument """
+		return self._obj
+
+	async def ask(self, command):
+		""" Sends command to the instrument and returns the read response """
+		return await self.call(self._obj.ask, command)
+	query = ask
+
+	async def write(self, command):
+		""" Sends command to the instrument """
+		return await self.call(self._obj.write, command)
+
+	async def read(self):
+		""" Returns read response from the instrument """
+		return await self.call(self._obj.read)
+
+	async def value(self, command, **kwargs):
+		""" Reads a value from the instrument """
+		return await self.call(self._obj.value, command, **kwargs)
+
+	async def values(self, command, **kwargs):
+		""" Reads a set of values from the instrument """
+		return await self.call(self._obj.values, command, **kwargs)
+
+	async def binary_values(self, command, header_bytes=None, dtype=np.float32, **kwargs):
+		""" Reads a binary block from the instrument as a NumPy array """
+		return await self.call(self._obj.binary_values, command, header_bytes, dtype, **kwargs)
+
+	async def operation_complete(self, command=None, **kwargs):
+		""" Starts an overlapped operation and waits until the instrument reports
+		it done, returning the elapsed seconds
+		"""
+		future = await self.call(self._obj.operation_complete, command, **kwargs)
+		return await asyncio.wrap_future(future)
+
+	async def get(self, name):
+		""" Reads the property name of the instrument """
+		return await self.call(getattr, self._obj, name)
+
+	async def set(self, name, value):
+		""" Sets the property name of the instrument to value """
+		return await self.call(setattr, self._obj, name, value)
@@ -13,9 +13,12 @@ class ModulationAnalyzer(HPIBInstrument):
 	fmDeEmTimes = {'0us':'P0', '25us':'P2', '50us':'P3', '75us':'P4', '750us':'P5'}
 	def __init__(self, name, adapter, **kwargs):
 		super(ModulationAnalyzer, self).__init__(name, adapter, **kwargs)
-		self.attenuate()
 		self._id = 'HP8901A'
 
+	def setup(self):
+		super(ModulationAnalyzer, self).setup()
+		self.attenuate()
+
 	def attenuate(self, att = 'auto'):
 		self.write(self.att[att])
 	
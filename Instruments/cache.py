@@ -0,0 +1,61 @@
+import time
+
+
+class SettingsCache(object):
+	""" Write-through cache of the :meth:`control<Instruments.instrument.BaseInstrument.control>`
+	properties of an instrument. Setting a property stores the value that was
+	written, and reading it back is served from the cache without a bus query.
+
+	In verify mode, entries older than verify seconds are read again from the
+	instrument. A value that differs from the cached one (for example after a
+	front panel change) is recorded in :attr:`drift` and passed to on_drift.
+
+	:param verify: Seconds after which a cached value is checked against the
+				   instrument, or None to trust the cache until invalidated
+	:param on_drift: Function called with (key, cached, actual) on a drift
+	"""
+	def __init__(self, verify=None, on_drift=None):
+		self.verify = verify
+		self.on_drift = on_drift
+		self._values = {}
+		self.drift = []
+		self.hits = 0
+		self.misses = 0
+
+	def __len__(self):
+		return len(self._values)
+
+	def __contains__(self, key):
+		return key in self._values
+
+	def __repr__(self):
+		return "<SettingsCache(%d values, %d hits, %d misses)>" % (len(self._values), self.hits, self.misses)
+
+	def get(self, key):
+		""" Returns a tuple of whether key is cached and fresh, and its value """
+		entry = self._values.get(key)
+		if entry is not None and (self.verify is None or time.monotonic() - entry[1] < self.verify):
+			self.hits += 1
+			return True, entry[0]
+		self.misses += 1
+		return False, None
+
+	def put(self, key, value, read=False):
+		""" Stores the value of key
+		:param read: True if the value was read from the instrument, so that it is
+					 checked against the cached value for drift
+		"""
+		if read and self.verify is not None:
+			entry = self._values.get(key)
+			if entry is not None and entry[0] != value:
+				self.drift.append((key, entry[0], value))
+				if self.on_drift is not None:
+					self.on_drift(key, entry[0], value)
+		self._values[key] = (value, time.monotonic())
+
+	def invalidate(self, key=None):
+		""" Forgets the value of key, or every value """
+		if key is None:
+			self._values.clear()
+		else:
+			self._values.pop(key, None)
@@ -0,0 +1,49 @@
+import re
+from collections import namedtuple
+
+# One "<code>,"<message>"" entry of the error queue, with "" escaping a quote
+_ENTRY = re.compile(r'\s*([+-]?\d+)\s*,\s*"((?:[^"]|"")*)"\s*,?')
+
+
+class SCPIError(namedtuple('SCPIError', 'code message')):
+	""" Entry of the SCPI error queue of an instrument """
+	__slots__ = ()
+
+	def __str__(self):
+		return '{:+d},"{}"'.format(self.code, self.message)
+
+
+def parse_errors(reply):
+	""" Returns the SCPIError entries of a :code:`SYST:ERR?` or
+	:code:`SYST:ERR:ALL?` reply, including the "No error" entry ending the
+	queue, or None if the reply is not in the error queue format
+	"""
+	entries = []
+	position = 0
+	reply = reply.strip()
+	while position < len(reply):
+		match = _ENTRY.match(reply, position)
+		if match is None:
+			return None
+		entries.append(SCPIError(int(match.group(1)), match.group(2).replace('""', '"')))
+		position = match.end()
+	return entries or None
+
+
+def split_replies(reply):
+	""" Splits the reply of a compound query on the ';' outside of quoted strings,
+	which error messages and string settings may contain
+	"""
+	if '"' not in reply:
+		return reply.split(';')
+	parts = []
+	start = 0
+	quoted = False
+	for i, c in enumerate(reply):
+		if c == '"':
+			quoted = not quoted
+		elif c == ';' and not quoted:
+			parts.append(reply[start:i])
+			start = i + 1
+	parts.append(reply[start:])
+	return parts
@@ -1,45 +1,55 @@
-from Instruments.instrument import Channel, Instrument, ChannelizedInstrument, Meter
+from Instruments.instrument import Channel, Instrument, ChannelizedInstrument, LazyChannel, Meter
 from Instruments.validators import strict_discrete_set
 import numpy as np
 
+
+def _impedance(value, values):
+	""" Returns the impedance as the number the counter reads back, so that
+	"1E6" and 1000000 are cached alike """
+	return strict_discrete_set(float(value), values)
+
+
 class FreqCounterChannel(Channel):
 	_ATT = [1, 10]
 	_IMP = [50, 1000000, "50", "1E6"]
+	attenuation = Channel.control("INP{ch}:ATT?", "INP{ch}:ATT {}", """ Input attenuation, 1 or 10 """)
+	input_coupling = Channel.control("INP{ch}:COUP?", "INP{ch}:COUP {}", """ Input coupling, AC or DC """, cast=str)
+	input_filter = Channel.control("INP{ch}:FILT?", "INP{ch}:FILT {}", """ 100 kHz low pass filter state """, cast=str)
+	impedance = Channel.control("INP{ch}:IMP?", "INP{ch}:IMP {:g}", """ Input impedance, 50 or 1E6 Ohm """,
+		validator=_impedance, values=[50.0, 1e6])
+
 	def __init__(self, channel, adapter, parent, **kwargs):
 		super(FreqCounterChannel, self).__init__(channel, adapter, parent, **kwargs)
 	
-	def close(self):
-		pass
-	
 	def atten(self, att = None):
 		if(att == None):
-			return self.value("INP{}:ATT?".format(self.chnum))
+			return self.attenuation
 		elif(isinstance(att, int) or isinstance(att, float)):
-			self.write("INP{}:ATT {}".format(self.chnum, att))
+			self.attenuation = att
 		else:
 			print("INVALID ATTENUATION: ", att)
 	
 	def coupling(self, cpl = None):
 		if(cpl == None):
-			return self.query("INP{}:COUP?".format(self.chnum))
+			return self.input_coupling
 		elif(cpl in self._ACDC):
-			self.write("INP{}:COUP {}".format(self.chnum, cpl))
+			self.input_coupling = cpl
 		else:
 			print("INVALID COUPLING: ", cpl)
 	
 	def filter(self, flt = None):
 		if(flt == None):
-			return self.query("INP{}:FILT?".format(self.chnum))
+			return self.input_filter
 		elif(flt in self._ONOFF):
-			self.write("INP{}:FILT {}".format(self.chnum, flt))
+			self.input_filter = flt
 		else:
 			print("INVALID 100 kHz FILTER STATE: ", flt)
 	
 	def imp(self, imp = None):
 		if(imp == None):
-			return self.value("INP{}:IMP?".format(self.chnum))
+			return self.impedance
 		elif(imp in self._IMP):
-			self.write("INP{}:IMP {}".format(self.chnum, imp))
+			self.impedance = imp
 		else:
 			print("INVALID IMPEDANCE: ", imp)
 
@@ -55,16 +65,19 @@ class FreqCounter(Meter, ChannelizedInstrument):
 	#  for x1   [-5.125V, 5.125V]
 	#  for x10  [-51.25V, 51.25V]
 	
+	ch1 = LazyChannel(FreqCounterChannel, 1)
+	ch2 = LazyChannel(FreqCounterChannel, 2)
+
 	def __init__(self, makemodel, adapter, **kwargs):
 		super(FreqCounter, self).__init__(makemodel, adapter, **kwargs)
-		self.ch1 = FreqCounterChannel(1, adapter, self, **kwargs)
-		self.ch2 = FreqCounterChannel(2, adapter, self, **kwargs)
 		self._func = ''
 	
 	def close(self):
-		del self.ch1
-		del self.ch2
-		del self._func
+		for name, ch in LazyChannel.built(self).items():
+			ch.close()
+			delattr(self, name)
+		self._func = ''
+		super(FreqCounter, self).close()
 	
 	def dutyCycle(self, param = 50, source = 1):
 		if(source == 1):
@@ -1,5 +1,12 @@
 from Instruments.instrument import Instrument, RFInstrument
-from Instruments.validators import strict_range, strict_discrete_set, truncated_range
+from Instruments.validators import StrictRange, strict_range, strict_discrete_set, truncated_range
+import numpy as np
+
+
+def _csv(values):
+	""" Returns the comma-separated list of an array of values, at full precision """
+	return ','.join(map(repr, np.asarray(values, dtype=float).ravel().tolist()))
+
 
 class SigGen(RFInstrument):
 	models = ["SG", r"8257D", r"E443\d[CD]"]
@@ -35,17 +42,20 @@ class SigGen(RFInstrument):
 			print("Output state (" + output + ") not in " + str(self._ONOFF))
 
 	def set_frequency_start_stop(self, start, stop):
-		self.write(':SENS1:FREQ:STAR ' + str(start))
-		self.write(':SENS1:FREQ:STOP ' + str(stop))
+		with self.batch():
+			self.write(':SENS1:FREQ:STAR ' + str(start))
+			self.write(':SENS1:FREQ:STOP ' + str(stop))
 
 	def set_frequency_center_span(self, center, span=None):
-		self.write('SENS1:FREQ:CENT ' + str(center))
-		if not span == None:
-			self.write('SENS1:FREQ:SPAN ' + str(span))
+		with self.batch():
+			self.write('SENS1:FREQ:CENT ' + str(center))
+			if not span == None:
+				self.write('SENS1:FREQ:SPAN ' + str(span))
 
 	def set_sweep_parameters(self, number_of_points, power):
-		self.write(':SENS1:SWE:POIN ' + str(number_of_points))
-		self.write(':SOUR1:POW ' + str(power))
+		with self.batch():
+			self.write(':SENS1:SWE:POIN ' + str(number_of_points))
+			self.write(':SOUR1:POW ' + str(power))
 	
 	rf_en = Instrument.control(":OUTP:STAT?;", "OUTP:STAT %s;", "RF OUTPUT, ON or OFF",
 							strict_discrete_set, ["ON", "OFF"]
@@ -85,6 +95,21 @@ class SigGen(RFInstrument):
 	step_points = Instrument.control(":SOUR:SWE:POIN?", ":SOUR:SWE:POIN %d",
 		""" An integer number of points in a step sweep."""
 	)
+	list_frequencies = Instrument.setting(":SOUR:LIST:FREQ %s",
+		""" Sets the frequencies of the points of a list sweep (Hz), from an array
+		of 250 kHz to 6 GHz, every point being checked at once. """,
+		validator=StrictRange([250e3, 6e9]), set_process=_csv
+	)
+	list_powers = Instrument.setting(":SOUR:LIST:POW %s",
+		""" Sets the amplitudes of the points of a list sweep (dBm), from an array
+		of -136 to 25 dBm. """,
+		validator=StrictRange([-136, 25]), set_process=_csv
+	)
+	list_dwells = Instrument.setting(":SOUR:LIST:DWEL %s",
+		""" Sets the dwell times of the points of a list sweep (s), from an array
+		of 1 ms to 60 s. """,
+		validator=StrictRange([1e-3, 60]), set_process=_csv
+	)
 
 	########################
 	# Amplitude modulation #
@@ -375,6 +400,12 @@ class ArbGen(SigGen):
 		arbitrary signal. Valid values are 1 µSa/s to 250 MSa/s. This can be set. """,
 		validator=strict_range,	values=[1e-6, 250e6],
 	)
+	arb_data = Instrument.setting("DATA VOLATILE,%s",
+		""" Downloads the samples of an arbitrary waveform to volatile memory, from
+		an array of values scaled to [-1, 1]. The samples are checked at once, and
+		every one out of range is reported. """,
+		validator=StrictRange([-1, 1]), set_process=_csv
+	)
 
 	frequency = Instrument.control("SOUR:FREQ?", "SOUR:FREQ %g",
 		""" A floating point property that controls the frequency of the
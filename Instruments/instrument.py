@@ -1,9 +1,26 @@
 import re
 import numpy as np
-import visa
+from collections import deque
+try:
+	from visa import VisaIOError
+except ImportError:
+	VisaIOError = IOError  # PyVISA is only needed for VISA adapters
+
+from Adapters.adapter import FakeAdapter, parse_values, short_header
+from Adapters.pool import acquire
+from Instruments.cache import SettingsCache
+from Instruments.errors import parse_errors, split_replies
+from Instruments.properties import (ChannelControl, ChannelMeasurement, ChannelSetting, Control, Measurement,
+	Property, Setting, format_command)
+from Instruments.registry import registry
+from Instruments.status import operation_complete
+
+# Header of an SCPI command, such as SENS1:FREQ:CENT or INIT, and its arguments
+_SCPI_HEADER = re.compile(r'[A-Za-z][A-Za-z0-9]*(:[A-Za-z][A-Za-z0-9]*)*\??(\s|$)')
+
+# Commands after which the instrument settings are no longer known
+_RESETS = re.compile(r'(^|;)\s*\*(RST|RCL)\b', re.IGNORECASE)
 
-from Adapters.adapter import FakeAdapter
-from Adapters.visa import VISAAdapter
 
 def splitResourceID(idn, dlm=',', debugOn = False):
 	try:
@@ -33,12 +50,199 @@ def splitResourceID(idn, dlm=',', debugOn = False):
 	if debugOn : print(ci3, sn)
 	return res
 
+def compound(commands):
+	""" Joins SCPI commands into one ';'-separated program message. SCPI headers
+	that a former command could have moved the parser away from the root of the
+	command tree are made absolute with a leading ':', so that each one is parsed
+	as it would be when sent on its own. Other commands, such as the mnemonics of
+	instruments that are not SCPI, are left as they are.
+	"""
+	message = []
+	path = False  # A former command moved the parser down the command tree
+	for command in commands:
+		command = command.strip().rstrip(';')
+		header = _SCPI_HEADER.match(command)
+		if header is not None:
+			if path or ':' in header.group(0):
+				command = ':' + command
+			path = path or ':' in header.group(0)
+		elif command.startswith(':'):
+			path = True
+		message.append(command)
+	return ';'.join(message)
+
+
+class Deferred(object):
+	""" Reply of a query queued in a :class:`Transaction`, which is available
+	from :attr:`value` once the transaction has been executed.
+	"""
+	def __init__(self, command, parse=None):
+		self.command = command
+		self.done = False
+		self._parse = parse
+		self._value = None
+
+	def set(self, reply):
+		""" Stores the reply of the instrument for this query """
+		reply = reply.strip()
+		self._value = self._parse(reply) if self._parse else reply
+		self.done = True
+
+	@property
+	def value(self):
+		""" The reply of the instrument, processed by the parse function if any """
+		if not self.done:
+			raise LookupError("Query {} has not been executed".format(self.command))
+		return self._value
+
+	def __repr__(self):
+		return "<Deferred({!r}, done={})>".format(self.command, self.done)
+
+
+class Transaction(object):
+	""" Collects writes and queries to an instrument and sends them as a single
+	';'-separated SCPI message when both the instrument and its adapter support
+	compound commands, splitting the combined reply back into the queries.
+	Otherwise the commands are sent one at a time, in order.
+
+	.. code-block:: python
+
+		with sa.batch() as b:
+			b.write(":CALC:MARK1 ON")
+			x = b.values(":CALC:MARK1:X?")
+			y = b.values(":CALC:MARK1:Y?")
+		print(x.value, y.value)
+
+	While a transaction is open, :meth:`BaseInstrument.write` calls are queued and
+	:meth:`BaseInstrument.ask` sends the queue together with its own query.
+
+	:meth:`BaseInstrument.check_errors` calls within the transaction are deferred:
+	the error queue is read once, by queries sent along with the queued commands,
+	and the errors found are kept in :attr:`errors`.
+
+	Updates of the settings cache made by queued writes are held back with
+	:meth:`on_commit` until the writes are sent, and dropped with them when the
+	transaction ends on an exception.
+	"""
+	def __init__(self, instrument):
+		self._instrument = instrument
+		self._queue = []
+		self._commits = []
+		self._depth = 0
+		self.check_errors = False
+		self.errors = []
+
+	def __enter__(self):
+		if self._depth == 0:
+			self._instrument._batch = self
+		self._depth += 1
+		return self
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		self._depth -= 1
+		if self._depth == 0:
+			self._instrument._batch = None
+			if exc_type is None:
+				self.execute()
+			else:
+				del self._queue[:]
+				del self._commits[:]
+
+	def write(self, command):
+		""" Queues a command """
+		self._queue.append((command, None))
+
+	@property
+	def compound(self):
+		""" True if the queued commands are sent as one compound message, False
+		if they are sent one at a time
+		"""
+		instr = self._instrument
+		return bool(instr.compound and getattr(instr._adapter, 'compound', False))
+
+	def on_commit(self, update):
+		""" Calls update once the commands queued so far have been sent """
+		self._commits.append(update)
+
+	def ask(self, command):
+		""" Queues a query and returns its :class:`Deferred` string reply """
+		reply = Deferred(command)
+		self._queue.append((command, reply))
+		return reply
+	query = ask
+
+	def values(self, command, **kwargs):
+		""" Queues a query and returns its :class:`Deferred` reply, formatted by
+		:func:`parse_values<Adapters.adapter.parse_values>` with any key-word arguments
+		"""
+		reply = Deferred(command, lambda r: parse_values(r, **kwargs))
+		self._queue.append((command, reply))
+		return reply
+
+	def execute(self):
+		""" Sends the queued commands and returns the replies of the queued queries """
+		checks = None
+		if self.check_errors:
+			self.check_errors = False
+			if self._queue:
+				queries = self._instrument._error_queries()
+				if not self.compound:
+					# Sent one at a time, read_errors stops at the first empty reply
+					queries = queries[:1]
+				checks = [self.ask(query) for query in queries]
+		queue, self._queue = self._queue, []
+		commits, self._commits = self._commits, []
+		if not queue:
+			for update in commits:
+				update()
+			return []
+		instr = self._instrument
+		adapter = instr._adapter
+		replies = [reply for command, reply in queue if reply is not None]
+		if not self.compound or len(queue) == 1:
+			for command, reply in queue:
+				if reply is None:
+					adapter.write(command)
+				else:
+					reply.set(adapter.ask(command))
+		elif not replies:
+			adapter.write(compound(command for command, reply in queue))
+		else:
+			message = compound(command for command, reply in queue)
+			results = split_replies(adapter.ask(message).strip())
+			if len(results) != len(replies):
+				raise ValueError("Expected {} replies to '{}', received {}".format(
+					len(replies), message, len(results)))
+			for reply, result in zip(replies, results):
+				reply.set(result)
+		for update in commits:
+			update()
+		if checks is not None:
+			replies = replies[:-len(checks)]
+			errors, drained = instr._parse_errors([check.value for check in checks])
+			if not drained:
+				errors.extend(instr.read_errors())
+			self.errors.extend(instr._report_errors(errors))
+		return [reply.value for reply in replies]
+
+	def __repr__(self):
+		return "<Transaction({}, queued={})>".format(self._instrument._name, len(self._queue))
+
+
 class BaseInstrument():
 	""" Base class for all Instruments, independent of Adapter used to communicate with the instrument.
 		:param makemodel: A string name
 		:param adapter: An :class:`Adapter<l3hlib.Adapters.adapter>` object
 	"""
-	models = []
+	models = []       # Category name followed by the regular expressions of the supported models
+	priority = 0      # Preferred over drivers of lower priority supporting the same model
+	compound = True   # Accepts ';'-separated SCPI program messages
+	_batch = None
+	_cache = None     # SettingsCache of the control properties, when enabled
+	_scope = None     # Distinguishes the cache entries of channels
+	_sent = None      # Last argument written per header, when skipping redundant writes
+	errors_all = False  # Answers SYST:ERR:ALL? with the whole error queue
+	error_depth = 8     # SYST:ERR? queries sent at once otherwise
 	_LEVELS = ["MIN", "MAX", "DEF"]
 	_MODES = ["LOC", "REM", "LLO"]
 	_ONOFF = [0, 1, "OFF", "ON"]
@@ -49,8 +253,8 @@ class BaseInstrument():
 			if isinstance(adapter, (int, str)):
 				print(adapter)
 				try:
-					adapter = VISAAdapter(adapter, adapter, **kwargs)
-				except visa.VisaIOError as e:
+					adapter = acquire(adapter, **kwargs)
+				except VisaIOError as e:
 					print("Visa IO Error: check connections")
 					print(e)
 		except ImportError:
@@ -59,6 +263,7 @@ class BaseInstrument():
 		self._name = name
 		self._adapter = adapter
 		self._active = True
+		self.error_log = deque(maxlen=100)
 		
 	def close(self):
 		self._name = None
@@ -70,12 +275,17 @@ class BaseInstrument():
 	def __del__(self):
 		self.close()
 
+	def __init_subclass__(cls, **kwargs):
+		super(BaseInstrument, cls).__init_subclass__(**kwargs)
+		if 'models' in cls.__dict__:
+			# The first entry is the category name, not a model pattern
+			cls._compiled = [re.compile(m) for m in cls.models[1:]]
+			registry.register(cls)
+
 	@classmethod
 	def checkSupport(cls, model):
-		if(cls.models is []):
-			return False
-		for m in cls.models:
-			result = re.search(m, model)
+		for m in getattr(cls, '_compiled', ()):
+			result = m.search(model)
 			if(result):
 				#print(result, cls.models[0])
 				return cls.models[0]
@@ -83,30 +293,240 @@ class BaseInstrument():
 
 	@property
 	def id(self):
-		""" Requests and returns the identification of the instrument. """
+		""" Requests and returns the identification of the instrument. The first
+		identification received is remembered and returned without a query.
+		"""
+		idn = self.__dict__.get('_idn')
+		if idn:
+			return idn
 		try:
-			return self._adapter.ask("*IDN?").strip()
+			idn = self._idn = self._adapter.ask("*IDN?").strip()
+			return idn
 		except:
 			try:
-				return self._adapter.ask("ID?").strip()
+				idn = self._idn = self._adapter.ask("ID?").strip()
+				return idn
 			except:
 				if(hasattr(self, "_id")):
 					return self._id
 				else:
 					return "Warning: Identification error."
 
+	def batch(self):
+		""" Returns a :class:`Transaction` that collects the writes and queries to
+		this instrument into as few bus transactions as the adapter allows. Nested
+		calls return the transaction that is already open.
+		"""
+		if self._batch is None:
+			return Transaction(self)
+		return self._batch
+
+	def _commit(self, update):
+		""" Calls update once the commands written so far have been sent: at
+		once, or when the open transaction is executed
+		"""
+		if self._batch is None:
+			update()
+		else:
+			self._batch.on_commit(update)
+
+	def flush(self):
+		""" Sends any commands queued by an open transaction """
+		if self._batch is not None:
+			self._batch.execute()
+
+	def enable_cache(self, verify=None, on_drift=None):
+		""" Caches the control properties: setting one stores the value written,
+		and reading it is served without a query until the cache is invalidated by
+		*RST, *RCL or :meth:`invalidate_cache`. Returns the
+		:class:`SettingsCache<Instruments.cache.SettingsCache>`.
+
+		:param verify: Seconds after which cached values are read again and
+					   checked for drift, or None
+		:param on_drift: Function called with (key, cached, actual) on a drift
+		"""
+		self._cache = SettingsCache(verify, on_drift)
+		return self._cache
+
+	def disable_cache(self):
+		self._cache = None
+
+	def invalidate_cache(self, command=None):
+		""" Forgets the cached value of the property queried by command, or every
+		cached value and every setting remembered by :meth:`enable_dedupe`
+		"""
+		if self._cache is not None:
+			self._cache.invalidate(None if command is None else (self._scope, command))
+		if command is None and self._sent is not None:
+			self._sent.clear()
+
+	def enable_dedupe(self):
+		""" Skips writing settings that would not change anything: a command with
+		arguments is not sent if its header was last sent with the same arguments.
+		Commands without arguments, queries and IEEE 488.2 common commands are
+		always sent.
+		The remembered settings are forgotten on *RST, *RCL and
+		:meth:`invalidate_cache`, and :code:`write(command, force=True)` sends
+		regardless. Changes made from the front panel are not seen.
+		"""
+		self._sent = {}
+
+	def disable_dedupe(self):
+		self._sent = None
+
+	def _check_reset(self, command):
+		""" Invalidates the cache if command resets or recalls the instrument state """
+		if _RESETS.search(command):
+			self._state_changed()
+
+	def _state_changed(self):
+		""" Invalidates the cache after a command reset or recalled the instrument
+		state, which drivers sending commands other than *RST and *RCL call
+		"""
+		self.invalidate_cache()
+		if self._batch is not None:
+			# Also forget the values of the writes queued before the reset
+			self._batch.on_commit(self.invalidate_cache)
+
+	def _dedupe(self, command, force=False):
+		""" Returns command without the settings that would not change anything,
+		unless forced, along with the settings it makes. The headers of a compound
+		command are keyed by their full path, and the ones following a setting left
+		out are sent with their full path, since the parser path changes with it.
+		Queries are always sent, with or without arguments.
+		"""
+		sent = self._sent
+		parts = []
+		settings = []
+		path = ''        # Parser path of the relative headers, as in compound()
+		skipped = False  # A former setting was left out
+		for part in split_replies(command):
+			header, _, args = part.strip().partition(' ')
+			if not header:
+				continue
+			if header[0] == '*':
+				parts.append(part)
+				continue
+			if header[0] == ':':
+				header = header[1:]
+			elif path:
+				header = path + header
+				if skipped:
+					part = ':' + header + ' ' + args
+			path = header[:header.rfind(':') + 1]
+			args = args.strip()
+			if args and not header.endswith('?'):
+				key = short_header(header)
+				if sent.get(key) == args and not force:
+					skipped = True
+					continue
+				settings.append((key, args))
+			parts.append(part)
+		return ';'.join(parts), settings
+
+	def _error_queries(self):
+		""" Returns the queries reading the error queue in one transaction """
+		if self.errors_all:
+			return ["SYST:ERR:ALL?"]
+		return ["SYST:ERR?"] * self.error_depth
+
+	def _parse_errors(self, replies):
+		""" Returns the errors in the replies of error queries, and whether the
+		queue was seen empty
+		"""
+		errors = []
+		drained = False
+		for reply in replies:
+			entries = parse_errors(reply)
+			if entries is None:
+				print("{}: unexpected error queue reply {!r}".format(self._name, reply))
+				return errors, True
+			if self.errors_all:
+				drained = True  # The whole queue, with or without "No error"
+			for entry in entries:
+				if entry.code == 0:
+					drained = True
+				else:
+					errors.append(entry)
+		return errors, drained
+
+	def read_errors(self, limit=100):
+		""" Empties the error queue and returns its entries as
+		:class:`SCPIError<Instruments.errors.SCPIError>` records, oldest first.
+		The queue is read with :code:`SYST:ERR:ALL?` when the instrument has it
+		(:attr:`errors_all`), otherwise with :attr:`error_depth` pipelined
+		:code:`SYST:ERR?` queries per transaction, or one query at a time until
+		the queue is empty when commands can not be compounded.
+
+		:param limit: Most errors read, in case the queue keeps filling
+		"""
+		errors = []
+		drained = False
+		while not drained and len(errors) < limit:
+			with self.batch() as b:
+				queries = self._error_queries()
+				if not b.compound:
+					queries = queries[:1]
+				replies = [b.ask(query) for query in queries]
+				b.execute()
+			found, drained = self._parse_errors([reply.value for reply in replies])
+			errors.extend(found)
+		return errors
+
+	def _report_errors(self, errors):
+		""" Prints and logs errors, and returns them """
+		for error in errors:
+			print("{} error {}".format(self._name, error))
+		self.error_log.extend(errors)
+		return errors
+
+	def check_errors(self):
+		""" Prints and returns the errors in the error queue, as a list of
+		:class:`SCPIError<Instruments.errors.SCPIError>` records, empty if there
+		are none. Within a :meth:`batch`, the check is deferred to the end of the
+		transaction, the errors are kept in its :code:`errors`, and an empty list
+		is returned.
+		"""
+		if self._batch is not None:
+			self._batch.check_errors = True
+			return []
+		return self._report_errors(self.read_errors())
+
 	# Wrapper functions for the Adapter object
 	def ask(self, command):
 		""" Sends command to the instrument and returns the read response. """
+		if self._cache is not None or self._sent is not None:
+			self._check_reset(command)
+		if self._batch is not None:
+			reply = self._batch.ask(command)
+			self._batch.execute()
+			return reply.value
 		return self._adapter.ask(command).strip()
 	query = ask
 
-	def write(self, command):
-		""" Sends command to the instrument through its adapter. """
-		self._adapter.write(command)
+	def write(self, command, force=False):
+		""" Sends command to the instrument through its adapter.
+		:param force: If True, the command is sent even if :meth:`enable_dedupe`
+					  finds that it would not change anything
+		"""
+		settings = None
+		if self._cache is not None or self._sent is not None:
+			self._check_reset(command)
+			if self._sent is not None:
+				command, settings = self._dedupe(command, force)
+				if not command:
+					return
+		if self._batch is not None:
+			self._batch.write(command)
+		else:
+			self._adapter.write(command)
+		if settings:
+			sent = self._sent
+			self._commit(lambda: sent.update(settings))
 
 	def read(self):
 		""" Returns read response from instrument through its adapter. """
+		self.flush()
 		return self._adapter.read()
 
 	def readBytes(self, size, dec = False):
@@ -122,16 +542,22 @@ class BaseInstrument():
 
 	def value(self, command, **kwargs):
 		""" Reads a value from the instrument through the adapter. """
-		return self._adapter.values(command, **kwargs)[0]
+		return self.values(command, **kwargs)[0]
 
 	def values(self, command, **kwargs):
 		""" Reads a set of values from the instrument through the adapter,
 		passing on any key-word arguments.
 		"""
+		if self._batch is not None:
+			return parse_values(self.ask(command), **kwargs)
 		return self._adapter.values(command, **kwargs)
 
-	def binary_values(self, command, header_bytes=0, dtype=np.float32):
-		return self._adapter.binary_values(command, header_bytes, dtype)
+	def binary_values(self, command, header_bytes=None, dtype=np.float32, **kwargs):
+		""" Reads a binary block from the instrument through the adapter as a NumPy
+		array, passing on any key-word arguments.
+		"""
+		self.flush()
+		return self._adapter.binary_values(command, header_bytes, dtype, **kwargs)
 	
 	def configure(self, func):
 		""" Configures instrument for function """
@@ -142,7 +568,7 @@ class BaseInstrument():
 		""" Clears the instrument status byte """
 		self.write("*CLS")
 	
-	def command(self, cmd, value=None, validator=None):
+	def command(self, cmd, value=None, validator=None, force=False):
 		if(value is None):
 			print("{}?".format(cmd))
 			return self.ask("{}?".format(cmd))
@@ -150,22 +576,22 @@ class BaseInstrument():
 			print("{} {}".format(cmd, value))
 			if(validator is None):
 				if(isinstance(value, str)):
-					return self.write("{} {}".format(cmd, value))
+					return self.write("{} {}".format(cmd, value), force)
 				elif(value):
-					return self.write("{} ON".format(cmd))
+					return self.write("{} ON".format(cmd), force)
 				else:
-					return self.write("{} OFF".format(cmd))
+					return self.write("{} OFF".format(cmd), force)
 			elif(value in validator):
-				return self.write("{} {}".format(cmd, value))
+				return self.write("{} {}".format(cmd, value), force)
 			else:
 				raise ValueError("Invalid {} command {} with value {}".format(self, cmd, value))
 
-	def command_state(self, command, bool):
+	def command_state(self, command, bool, force=False):
 		state = 'ON' if bool else 'OFF'
-		return self.write(command + ' ' +  state)
+		return self.write(command + ' ' +  state, force)
 
-	def command_value(self, command, value, units=''):
-		return self.write(command + ' ' + str(value) + units)
+	def command_value(self, command, value, units='', force=False):
+		return self.write(command + ' ' + str(value) + units, force)
 
 	def reset(self):
 		""" Resets the instrument. """
@@ -175,9 +601,100 @@ class BaseInstrument():
 		""" Instructs the instrument to wait. """
 		self.write("*WAI")
 
+	@classmethod
+	def properties(cls, kind=None):
+		""" Returns the properties declared by :meth:`control`, :meth:`measurement`
+		and :meth:`setting` on the class and its bases, by name
+
+		:param kind: 'control', 'measurement' or 'setting' to list only that kind
+		"""
+		found = {}
+		for klass in reversed(cls.__mro__):
+			for name, attr in vars(klass).items():
+				if isinstance(attr, Property) and (kind is None or attr.kind == kind):
+					found[name] = attr
+		return found
+
+	def read_properties(self, names=None):
+		""" Reads several properties in a single :meth:`batch` and returns their
+		values by name. Cached controls are not queried.
+
+		:param names: Names of the properties to read, or None for every control
+		"""
+		props = self.properties()
+		if names is None:
+			names = [name for name, prop in props.items() if prop.kind == 'control']
+		cache = self._cache
+		results = {}
+		pending = []
+		with self.batch() as b:
+			for name in names:
+				prop = props.get(name)
+				if prop is None or not prop.readable:
+					raise LookupError("{} has no readable property {}".format(type(self).__name__, name))
+				if cache is not None and prop.kind == 'control':
+					cached, value = cache.get((self._scope, prop.get_command))
+					if cached:
+						results[name] = value
+						continue
+				pending.append((name, prop, b.ask(prop.query(self))))
+		for name, prop, reply in pending:
+			value = results[name] = prop.decode(reply.value)
+			if cache is not None and prop.kind == 'control':
+				cache.put((self._scope, prop.get_command), value, read=True)
+		return results
+
+	def snapshot(self, names=None):
+		""" Returns the values of the control properties by name, read in as few
+		transactions as the adapter allows. The values are plain numbers, strings
+		and lists, so that the snapshot can be saved as JSON and given to
+		:meth:`restore`. Controls the instrument does not answer are left out.
+
+		:param names: Names of the controls to read, or None for every control
+		"""
+		if names is None:
+			names = list(self.properties('control'))
+		try:
+			return self.read_properties(names)
+		except LookupError:
+			raise
+		except Exception as e:
+			# A query failed in the batch, read one at a time to skip it
+			print("Snapshot of {} reading one property at a time: {}".format(self._name, e))
+		state = {}
+		for name in names:
+			try:
+				state.update(self.read_properties([name]))
+			except Exception as e:
+				print("Snapshot of {} skips {}: {}".format(self._name, name, e))
+		return state
+
+	def restore(self, state):
+		""" Sets the control properties to the values of a :meth:`snapshot`, in
+		the order they are declared. The current values are read first in one
+		batch, and only the ones that differ are written, again in one batch.
+		Returns the names of the properties written.
+
+		:param state: Dictionary of control values by name
+		"""
+		controls = self.properties('control')
+		names = [name for name in controls if name in state]
+		unknown = set(state).difference(names)
+		if unknown:
+			raise LookupError("{} has no controls {}".format(type(self).__name__, ', '.join(sorted(unknown))))
+		current = self.snapshot(names)
+		changed = [name for name in names if name not in current or current[name] != state[name]]
+		with self.batch():
+			for name in changed:
+				value = state[name]
+				if isinstance(value, list):
+					value = tuple(value)  # Placeholders of multi-value commands take tuples
+				setattr(self, name, value)
+		return changed
+
 	@staticmethod
 	def control(get_command, set_command, docs,
-				validator=lambda v, vs: v, values=(), map_values=False,
+				validator=None, values=(), map_values=False,
 				get_process=lambda v: v, set_process=lambda v: v,
 				check_set_errors=False, check_get_errors=False,
 				**kwargs):
@@ -201,57 +718,12 @@ class BaseInstrument():
 		:param check_set_errors: Toggles checking errors after setting
 		:param check_get_errors: Toggles checking errors after getting
 		"""
-
-		if map_values and isinstance(values, dict):
-			# Prepare the inverse values for performance
-			inverse = {v: k for k, v in values.items()}
-
-		def fget(self):
-			vals = self.values(get_command, **kwargs)
-			if check_get_errors:
-				self.check_errors()
-			if len(vals) == 1:
-				value = get_process(vals[0])
-				if not map_values:
-					return value
-				elif isinstance(values, (list, tuple, range)):
-					return values[int(value)]
-				elif isinstance(values, dict):
-					return inverse[value]
-				else:
-					raise ValueError(
-						'Values of type `{}` are not allowed '
-						'for Instrument.control'.format(type(values))
-					)
-			else:
-				vals = get_process(vals)
-				return vals
-
-		def fset(self, value):
-			value = set_process(validator(value, values))
-			if not map_values:
-				pass
-			elif isinstance(values, (list, tuple, range)):
-				value = values.index(value)
-			elif isinstance(values, dict):
-				value = values[value]
-			else:
-				raise ValueError(
-					'Values of type `{}` are not allowed '
-					'for Instrument.control'.format(type(values))
-				)
-			self.write(set_command.format(value))
-			if check_set_errors:
-				self.check_errors()
-
-		# Add the specified document string to the getter
-		fget.__doc__ = docs
-
-		return property(fget, fset)
+		return Control(get_command, set_command, docs, validator, values, map_values,
+			get_process, set_process, check_set_errors, check_get_errors, **kwargs)
 
 	@staticmethod
 	def measurement(get_command, docs, values=(), map_values=None,
-					get_process=lambda v: v, command_process=lambda c: c,
+					get_process=lambda v: v, command_process=None,
 					check_get_errors=False, **kwargs):
 		""" Returns a property for the class based on the supplied
 		commands. This is a measurement quantity that may only be
@@ -269,39 +741,12 @@ class BaseInstrument():
 							before executing the command, for both getting and setting
 		:param check_get_errors: Toggles checking errors after getting
 		"""
-
-		if map_values and isinstance(values, dict):
-			# Prepare the inverse values for performance
-			inverse = {v: k for k, v in values.items()}
-
-		def fget(self):
-			vals = self.values(command_process(get_command), **kwargs)
-			if check_get_errors:
-				self.check_errors()
-			if len(vals) == 1:
-				value = get_process(vals[0])
-				if not map_values:
-					return value
-				elif isinstance(values, (list, tuple, range)):
-					return values[int(value)]
-				elif isinstance(values, dict):
-					return inverse[value]
-				else:
-					raise ValueError(
-						'Values of type `{}` are not allowed '
-						'for Instrument.measurement'.format(type(values))
-					)
-			else:
-				return get_process(vals)
-
-		# Add the specified document string to the getter
-		fget.__doc__ = docs
-
-		return property(fget)
+		return Measurement(get_command, docs, values, map_values, get_process,
+			command_process, check_get_errors, **kwargs)
 
 	@staticmethod
 	def setting(set_command, docs,
-				validator=lambda x, y: x, values=(), map_values=False,
+				validator=None, values=(), map_values=False,
 				set_process=lambda v: v,
 				check_set_errors=False,
 				**kwargs):
@@ -321,39 +766,15 @@ class BaseInstrument():
 							before value mapping, returning the processed value
 		:param check_set_errors: Toggles checking errors after setting
 		"""
-
-		if map_values and isinstance(values, dict):
-			# Prepare the inverse values for performance
-			inverse = {v: k for k, v in values.items()}
-
-		def fget(self):
-			raise LookupError("Instrument.setting properties can not be read.")
-
-		def fset(self, value):
-			value = set_process(validator(value, values))
-			if not map_values:
-				pass
-			elif isinstance(values, (list, tuple, range)):
-				value = values.index(value)
-			elif isinstance(values, dict):
-				value = values[value]
-			else:
-				raise ValueError(
-					'Values of type `{}` are not allowed '
-					'for Instrument.control'.format(type(values))
-				)
-			self.write(set_command.format(value))
-			if check_set_errors:
-				self.check_errors()
-
-		# Add the specified document string to the getter
-		fget.__doc__ = docs
-
-		return property(fget, fset)
+		return Setting(set_command, docs, validator, values, map_values,
+			set_process, check_set_errors, **kwargs)
 
 
 class HPIBInstrument(BaseInstrument):
-	""" Class for old HPIB equipment that don't follow the SCPI standard. """
+	""" Class for old HPIB equipment that don't follow the SCPI standard.
+	The instrument is set up on the first command sent to it, not on construction.
+	"""
+	compound = False
 	_MEAS = {}
 	_TRG = {'free':'T0', 'hold':'T1', 'imm':'T2', 'delay':'T3'}
 
@@ -361,10 +782,45 @@ class HPIBInstrument(BaseInstrument):
 		super(HPIBInstrument,self).__init__(name, adapter, **kwargs)
 		self.measurement = None
 		self.premeas = ""
+		self._pending_setup = True
+
+	def setup(self):
+		""" Clears the instrument, with automatic operation and free run trigger """
 		self.reset()
 		self.auto()
 		self.trigger()
-	
+
+	def _prepare(self):
+		""" Runs :meth:`setup` before the first command """
+		if self._pending_setup:
+			self._pending_setup = False
+			self.setup()
+
+	def ask(self, command):
+		self._prepare()
+		return super(HPIBInstrument, self).ask(command)
+	query = ask
+
+	def write(self, command, force=False):
+		self._prepare()
+		super(HPIBInstrument, self).write(command, force)
+
+	def values(self, command, **kwargs):
+		self._prepare()
+		return super(HPIBInstrument, self).values(command, **kwargs)
+
+	def read(self):
+		self._prepare()
+		return super(HPIBInstrument, self).read()
+
+	def readBytes(self, size, dec = False):
+		self._prepare()
+		return super(HPIBInstrument, self).readBytes(size, dec)
+
+	def binary_values(self, command, header_bytes=None, dtype=np.float32, **kwargs):
+		self._prepare()
+		return super(HPIBInstrument, self).binary_values(command, header_bytes, dtype, **kwargs)
+
 	def auto(self):
 		self.write('AU')
 
@@ -382,6 +838,7 @@ class HPIBInstrument(BaseInstrument):
 	
 	def reset(self):
 		self.write('CL')
+		self._state_changed()
 		
 	def trigger(self, mode='free'):
 		""" Method to trigger """
@@ -420,6 +877,14 @@ class Instrument(BaseInstrument):
 
 	def complete(self):
 		return self.ask('*OPC?')
+
+	def operation_complete(self, command=None, **kwargs):
+		""" Starts an overlapped operation and returns a Future that completes when
+		the instrument reports it done, through SRQ or by polling the status register.
+		See :func:`operation_complete<Instruments.status.operation_complete>` for the
+		key-word arguments.
+		"""
+		return operation_complete(self, command, **kwargs)
 	
 	def fetch(self):
 		return self.value("FETC?")
@@ -450,10 +915,11 @@ class Instrument(BaseInstrument):
 			return True
 
 	def recover(self, reset=False):
-		"""Return any accumulated errors."""
-		while(self.check_error()):
-			self.clear()
+		"""Prints and clears any accumulated errors, and returns them."""
+		errors = self.check_errors()
+		self.clear()
 		if(reset) : self.reset()
+		return errors
 
 	def recall(self, state=None):
 		"""Recall a saved state."""
@@ -494,16 +960,64 @@ class Channel(BaseInstrument):
 		super(Channel,self).__init__(str(channel), adapter, **kwargs)
 		self.chnum = channel
 		self.parent = parent
+
+	@property
+	def _scope(self):
+		return self.chnum
+
+	@property
+	def _cache(self):
+		""" Channels share the settings cache of their parent """
+		return getattr(self.parent, '_cache', None)
+
+	@property
+	def _sent(self):
+		return getattr(self.parent, '_sent', None)
+
+	@property
+	def _batch(self):
+		""" Channels share the transactions of their parent """
+		return getattr(self.parent, '_batch', None)
+
+	def batch(self):
+		return self.parent.batch()
+
+	def enable_dedupe(self):
+		self.parent.enable_dedupe()
+
+	def disable_dedupe(self):
+		self.parent.disable_dedupe()
+
+	def enable_cache(self, verify=None, on_drift=None):
+		return self.parent.enable_cache(verify, on_drift)
+
+	@property
+	def errors_all(self):
+		return self.parent.errors_all
+
+	@property
+	def error_depth(self):
+		return self.parent.error_depth
+
+	def _report_errors(self, errors):
+		""" Channels log their errors with their parent """
+		return self.parent._report_errors(errors)
+
+	def disable_cache(self):
+		self.parent.disable_cache()
 	
 	def close(self):
+		# The adapter belongs to the parent, which alone releases it
+		self._adapter = None
+		self._name = None
+		self._active = None
 		self.chnum = None
 		self.parent = None
-		super(Channel,self).close()
 	
 	def getChannel(self):
 		return self.chnum
 	
-	def command(self, cmd, value=None, validator=None):
+	def command(self, cmd, value=None, validator=None, force=False):
 		if(hasattr(self,'preamble')):
 			msg = self.preamble + cmd
 			if(value is None):
@@ -513,58 +1027,108 @@ class Channel(BaseInstrument):
 				print("{} {}".format(msg, value))
 				if(validator is None):
 					if(isinstance(value, str)):
-						return self.write("{} {}".format(msg, value))
+						return self.write("{} {}".format(msg, value), force)
 					elif(value):
-						return self.write("{} ON".format(msg))
+						return self.write("{} ON".format(msg), force)
 					else:
-						return self.write("{} OFF".format(msg))
+						return self.write("{} OFF".format(msg), force)
 				elif(value in validator):
-					return self.write("{} {}".format(msg, value))
+					return self.write("{} {}".format(msg, value), force)
 				else:
 					raise ValueError("Invalid {} command {} with value {}".format(self, msg, value))
 		else:
 			raise ValueError("{} has no preamble".format(self))
 	
-	def control(self, getcmd, setcmd, docs):
-		def fget(self):
-			vals = self.values(getcmd.format(self.chnum), **kwargs)
-			if len(vals) == 1:
-				return vals[0]
-			else:
-				return vals
+	@staticmethod
+	def control(get_command, set_command, docs, validator=None, values=(), map_values=False,
+				get_process=lambda v: v, set_process=lambda v: v,
+				check_set_errors=False, check_get_errors=False, **kwargs):
+		""" Returns a property of a channel class that may be set and read. The
+		commands are templates where :code:`{ch}` stands for the channel number,
+		such as :code:`"SENS{ch}:FREQ?"`, and the other arguments are those of
+		:meth:`Instrument.control<BaseInstrument.control>`.
+		"""
+		return ChannelControl(get_command, set_command, docs, validator, values, map_values,
+			get_process, set_process, check_set_errors, check_get_errors, **kwargs)
 
-		def fset(self, value):
-			#value = validator(value, values)
-			self.write(setcmd.format(self.chnum, value))
+	@staticmethod
+	def measurement(get_command, docs, values=(), map_values=None,
+					get_process=lambda v: v, command_process=None,
+					check_get_errors=False, **kwargs):
+		""" Returns a property of a channel class that may only be read, with
+		:code:`{ch}` in get_command standing for the channel number. See
+		:meth:`Instrument.measurement<BaseInstrument.measurement>`.
+		"""
+		return ChannelMeasurement(get_command, docs, values, map_values, get_process,
+			command_process, check_get_errors, **kwargs)
 
-		# Add the specified document string to the getter
-		fget.__doc__ = docs
-		return property(fget, fset)
+	@staticmethod
+	def setting(set_command, docs, validator=None, values=(), map_values=False,
+				set_process=lambda v: v, check_set_errors=False, **kwargs):
+		""" Returns a property of a channel class that may only be set, with
+		:code:`{ch}` in set_command standing for the channel number. See
+		:meth:`Instrument.setting<BaseInstrument.setting>`.
+		"""
+		return ChannelSetting(set_command, docs, validator, values, map_values,
+			set_process, check_set_errors, **kwargs)
 	
-	def measurement(self, getcmd, docs):
-		def fget(self):
-			vals = self.values(getcmd.format(self.chnum), **kwargs)
-			if len(vals) == 1:
-				return vals[0]
-			else:
-				return vals
+class LazyChannel(object):
+	""" Channel of an instrument that is built on first access rather than with
+	the instrument, and then kept as a plain attribute.
 
-		# Add the specified document string to the getter
-		fget.__doc__ = docs
-		return property(fget)
-	
-	def setting(self, setcmd, docs):
-		def fget(self):
-			raise LookupError("Channel.setting properties can not be read.")
+	.. code-block:: python
+
+		class PowerMeter(ChannelizedInstrument):
+			ch1 = LazyChannel(PMChannel, 1)
+			ch2 = LazyChannel(PMChannel, 2, lambda pm: pm._num_channels == 2)
+
+	:param cls: :class:`Channel` class
+	:param number: Channel number
+	:param available: Function of the instrument returning False when it does
+					  not have the channel, or None
+	"""
+	def __init__(self, cls, number, available=None):
+		self.cls = cls
+		self.number = number
+		self.available = available
+		self.name = None
+
+	def __set_name__(self, owner, name):
+		self.name = name
+
+	def __get__(self, instrument, owner=None):
+		if instrument is None:
+			return self
+		if self.available is not None and not self.available(instrument):
+			raise AttributeError("{} has no channel {}".format(instrument._name, self.number))
+		channel = self.cls(self.number, instrument._adapter, instrument)
+		instrument.__dict__[self.name] = channel
+		return channel
+
+	@staticmethod
+	def channels(instrument):
+		""" Returns every channel of instrument declared with LazyChannel, by number,
+		building those not built yet
+		"""
+		found = {}
+		for klass in reversed(type(instrument).__mro__):
+			for attr in vars(klass).values():
+				if isinstance(attr, LazyChannel):
+					found[attr.number] = attr
+		return [getattr(instrument, lazy.name) for number, lazy in sorted(found.items())
+			if lazy.available is None or lazy.available(instrument)]
+
+	@staticmethod
+	def built(instrument):
+		""" Returns the lazy channels of instrument that have been built, by name """
+		built = {}
+		for klass in type(instrument).__mro__:
+			for name, attr in vars(klass).items():
+				if isinstance(attr, LazyChannel) and name in instrument.__dict__:
+					built[name] = instrument.__dict__[name]
+		return built
 
-		def fset(self, value):
-			#value = validator(value, values)
-			self.write(setcmd.format(self.chnum, value))
 
-		# Add the specified document string to the getter
-		fget.__doc__ = docs
-		return property(fget, fset)
-	
 class ChannelizedInstrument(Instrument):
 	""" Class for equipment with channels. """
 
@@ -574,10 +1138,10 @@ class ChannelizedInstrument(Instrument):
 		self.active = 1
 	
 	def close(self):
-		for i in range(len(self.channels)):
-			self.remChannel(len(self.channels) - i - 1)
-		del self.channels
-		del self.active
+		channels = getattr(self, 'channels', [])
+		for i in range(len(channels)):
+			self.remChannel(len(channels) - 1)
+		super(ChannelizedInstrument,self).close()
 	
 	def addChannel(self, ch):
 		if(isinstance(ch, Channel)):
@@ -595,6 +1159,22 @@ class ChannelizedInstrument(Instrument):
 	
 	def getChannel(self, ind):
 		return self.channels[ind]
+
+	def read_channels(self, name, channels=None):
+		""" Reads the channel property name of several channels in one
+		transaction, such as :code:`pm.read_channels("fetch_power")` sending
+		:code:`FETC1?;FETC2?`, and returns the values in channel order
+
+		:param name: Name of a property declared with :meth:`Channel.control`
+					 or :meth:`Channel.measurement`
+		:param channels: Channels to read, or None for every channel
+		"""
+		if channels is None:
+			channels = LazyChannel.channels(self) or self.channels
+		prop = getattr(type(channels[0]), name, None)
+		if not hasattr(prop, 'read_all'):
+			raise LookupError("{} has no channel property {}".format(type(channels[0]).__name__, name))
+		return prop.read_all(channels)
 	
 	def remChannel(self, ind = -1):
 		self.channels[ind].close()
@@ -620,6 +1200,7 @@ class ConfiguredInstrument(Instrument):
 	
 	def recall(self):
 		self.write('RCL')
+		self._state_changed()
 	
 	def save(self):
 		self.write('SAV')
@@ -1,13 +1,28 @@
-from Instruments.instrument import Channel, Instrument, ChannelizedInstrument, RFInstrument
+from Instruments.instrument import Channel, Instrument, ChannelizedInstrument, LazyChannel, RFInstrument
 from Instruments.validators import strict_range, strict_discrete_set
 import time
 
 class PMChannel(Channel):
 	_UNITS = ["w", "W", "dbm", "DBM"]	# LINEAR (W, %) , LOG (dBm, dB)
 	_SENSE = ["SENS1", "SENS2", "SENS1-SENS2", "SENS2-SENS1", "SENS1/SENS2", "SENS2/SENS1"]
+	frequency = Channel.control("SENS{ch}:FREQ?", "SENS{ch}:FREQ {}",
+		""" Frequency of the signal, for the sensor calibration factor (Hz) """)
+	gain = Channel.control("CALC{ch}:GAIN?", "CALC{ch}:GAIN {}",
+		""" Display offset, [-100, 100] dB """)
+	gain_enabled = Channel.control("CALC{ch}:GAIN:STATE?", "CALC{ch}:GAIN:STATE {}",
+		""" Display offset state, 0 or 1 """, cast=int)
+	units_power = Channel.control("UNIT{ch}:POW?", "UNIT{ch}:POW {}",
+		""" Power units, W or DBM """, cast=str)
+	lower_limit = Channel.control("CALC{ch}:LIM:LOW?", "CALC{ch}:LIM:LOW {}",
+		""" Lower test limit, [-150, 200] W / % / dBm / dB """)
+	upper_limit = Channel.control("CALC{ch}:LIM:UPP?", "CALC{ch}:LIM:UPP {}",
+		""" Upper test limit, [-150, 200] W / % / dBm / dB """)
+	fetch_power = Channel.measurement("FETC{ch}?", """ Last power measured, W or dBm """)
+	read_power = Channel.measurement("READ{ch}?", """ Power measured after a new trigger, W or dBm """)
+	measure_power = Channel.measurement("MEAS{ch}?", """ Power measured with a default configuration, W or dBm """)
+
 	def __init__(self, channel, adapter, parent, **kwargs):
 		super(PMChannel, self).__init__(channel, adapter, parent, **kwargs)
-		#self.pow = Channel.measurement("FETC{}?".format(self.chnum), "RF Power, W or dBm")
 	
 	def init(self):
 		return self.query("INIT{}".format(self.chnum))
@@ -28,9 +43,8 @@ class PMChannel(Channel):
 		if(cal):
 			state = self.offsetenable()
 			self.offsetenable(0)
-			self.write("CAL{}".format(self.chnum))
+			self.parent.operation_complete("CAL{}".format(self.chnum), timeout=60).result()
 			self.offsetenable(state)
-			time.sleep(40)
 		self.parent.powref = 1
 		time.sleep(1)
 		p = self.power()
@@ -40,17 +54,17 @@ class PMChannel(Channel):
 	
 	def freq(self, f = None):
 		if(f == None):
-			return self.value("SENS{}:FREQ?".format(self.chnum))
+			return self.frequency
 		elif(isinstance(f, int) or isinstance(f, float) or isinstance(f, str)):
-			self.write("SENS{}:FREQ {}".format(self.chnum, f))
+			self.frequency = f
 		else:
 			print("INVALID PM FREQ: ", f)
 	
 	def measure(self):
-		return self.value("MEAS{}?".format(self.chnum))
+		return self.measure_power
 	
 	def power(self):
-		return self.value("FETC{}?".format(self.chnum))
+		return self.fetch_power
 			
 	def powerStable(self, timeout = 10, delay = 0.1, maxtol = 0.05):
 		stable = 0
@@ -67,31 +81,31 @@ class PMChannel(Channel):
 		return None
 	
 	def read(self):
-		return self.value("READ{}?".format(self.chnum))
+		return self.read_power
 	
 	def offset(self, offset = None):
 	#   MIN      DEF       MAX        UNITS
 	#  -100 << (  0  ) << +100    W / % / dBm / dB
 		if(offset == None):
-			return self.value("CALC{}:GAIN?".format(self.chnum))
+			return self.gain
 		elif(isinstance(offset, int) or isinstance(offset, float)):
-			self.write("CALC{}:GAIN {}".format(self.chnum, offset))
+			self.gain = offset
 		else:
 			print("INVALID OFFSET: ", offset)
 	
 	def offsetenable(self, offset = None):
 		if(offset == None):
-			return int(self.query("CALC{}:GAIN:STATE?".format(self.chnum)))
+			return self.gain_enabled
 		elif(offset in self._ONOFF):
-			self.write("CALC{}:GAIN:STATE {}".format(self.chnum, offset))
+			self.gain_enabled = offset
 		else:
 			print("INVALID ENABLE for OFFSET: ", offset)
 	
 	def units(self, unit = None):
 		if(unit == None):
-			return self.query("UNIT{}:POW?".format(self.chnum))
+			return self.units_power
 		elif(unit in self._UNITS):
-			self.write("UNIT{}:POW {}".format(self.chnum, unit))
+			self.units_power = unit
 		else:
 			print("INVALID UNITS: ", unit)
 	
@@ -129,9 +143,9 @@ class PMChannel(Channel):
 	#   MIN      DEF       MAX        UNITS
 	#  -150 << ( -90 ) << +200    W / % / dBm / dB
 		if(lim == None):
-			return self.value("CALC{}:LIM:LOW?".format(self.chnum))
+			return self.lower_limit
 		elif(isinstance(lim, int) or isinstance(lim, float)):
-			self.write("CALC{}:LIM:LOW {}".format(self.chnum, lim))
+			self.lower_limit = lim
 		else:
 			print("INVALID LIMITS: ", lim)
 	
@@ -139,9 +153,9 @@ class PMChannel(Channel):
 	#   MIN      DEF       MAX        UNITS
 	#  -150 << ( -90 ) << +200    W / % / dBm / dB
 		if(lim == None):
-			return self.value("CALC{}:LIM:UPP?".format(self.chnum))
+			return self.upper_limit
 		elif(isinstance(lim, int) or isinstance(lim, float)):
-			self.write("CALC{}:LIM:UPP {}".format(self.chnum, lim))
+			self.upper_limit = lim
 		else:
 			print("INVALID LIMITS: ", lim)
 		
@@ -150,14 +164,16 @@ class PowerMeter(RFInstrument, ChannelizedInstrument):
 	SCmodels = ["E4418B"]
 	MCmodels = ["E4419B"]
 	_MATH = ["A", "B", "A-B", "B-A", "A/B", "B/A"]
+	ch1 = LazyChannel(PMChannel, 1)
+	ch2 = LazyChannel(PMChannel, 2, lambda pm: pm._num_channels == 2)
+
 	def __init__(self, name, adapter, **kwargs):
 		super(PowerMeter, self).__init__(name, adapter, **kwargs)
-		self.ch1 = PMChannel(1, adapter, self)
+		self._num_channels = 1
 		try:
 			if(self._mdl in self.MCmodels):
 				print("Dual Channel Power Meter Detected!")
 				self._num_channels = 2
-				self.ch2 = PMChannel(2, adapter, self)
 				self.readDIF = Instrument.measurement("READ:DIF?", "Power difference, in dB or W")
 				self.readRAT = Instrument.measurement("READ:DIF?", "Power ratio, in dB")
 		except:
@@ -165,10 +181,10 @@ class PowerMeter(RFInstrument, ChannelizedInstrument):
 	
 	def close(self):
 		#ChannelizedInstrument.close(self)
-		del self.ch1
+		for name, ch in LazyChannel.built(self).items():
+			ch.close()
+			delattr(self, name)
 		if(self._num_channels == 2):
-			self.ch2.close()
-			self.ch2 = None
 			readDIF = None
 			readRAT = None
 		super(PowerMeter,self).close()
@@ -0,0 +1,339 @@
+from Adapters.adapter import parse_values
+
+
+def format_command(command, value):
+	""" Returns command with value inserted, for both printf style (%e) and
+	str.format style ({}) placeholders. Tuples fill several placeholders.
+	"""
+	if '%' in command:
+		return command % value
+	if isinstance(value, tuple):
+		return command.format(*value)
+	return command.format(value)
+
+
+def _formatter(command):
+	""" Returns the function inserting a value into command, choosing the
+	placeholder style once instead of on every write
+	"""
+	if '%' in command:
+		return command.__mod__
+	def format(value):
+		if isinstance(value, tuple):
+			return command.format(*value)
+		return command.format(value)
+	return format
+
+
+def _parser(separator=',', cast=float, container=list):
+	""" Returns the function splitting a reply into values, as
+	:func:`parse_values<Adapters.adapter.parse_values>` does. Single numbers,
+	the usual reply to a property query, are cast directly.
+	"""
+	if container is list and cast in (float, int):
+		def parse(reply):
+			if separator not in reply:
+				try:
+					return [cast(reply)]
+				except ValueError:
+					pass
+			return parse_values(reply, separator, cast, container)
+		return parse
+	return lambda reply: parse_values(reply, separator, cast, container)
+
+
+def _decoder(values, map_values, get_process, kind):
+	""" Returns the function turning the parsed values of a reply into the
+	value of the property
+	"""
+	if not map_values:
+		def decode(vals):
+			return get_process(vals[0] if len(vals) == 1 else vals)
+	elif isinstance(values, (list, tuple, range)):
+		def decode(vals):
+			if len(vals) == 1:
+				return values[int(get_process(vals[0]))]
+			return get_process(vals)
+	elif isinstance(values, dict):
+		inverse = {v: k for k, v in values.items()}
+		def decode(vals):
+			if len(vals) == 1:
+				return inverse[get_process(vals[0])]
+			return get_process(vals)
+	else:
+		def decode(vals):
+			if len(vals) == 1:
+				raise ValueError('Values of type `{}` are not allowed '
+								 'for Instrument.{}'.format(type(values), kind))
+			return get_process(vals)
+	return decode
+
+
+def _encoder(values, map_values, set_process, kind):
+	""" Returns the function turning a validated value into the argument written """
+	if not map_values:
+		return set_process
+	if isinstance(values, (list, tuple, range)):
+		return lambda value: values.index(set_process(value))
+	if isinstance(values, dict):
+		return lambda value: values[set_process(value)]
+	def encode(value):
+		raise ValueError('Values of type `{}` are not allowed '
+						 'for Instrument.{}'.format(type(values), kind))
+	return encode
+
+
+def _identity(value):
+	return value
+
+
+def write_checked(instrument, command):
+	""" Writes command and checks the errors it caused, in a single transaction
+	when the instrument accepts compound commands, or at the end of the
+	transaction already open
+	"""
+	with instrument.batch():
+		instrument.write(command)
+		instrument.check_errors()
+
+
+class Property(object):
+	""" Base class of the instrument property descriptors. The commands, the
+	value mapping, the reply parser and the validator are resolved when the
+	class is created, so that each access only runs the steps it needs.
+	"""
+	kind = None
+	get_command = None
+	set_command = None
+
+	def __init__(self, docs):
+		self.__doc__ = docs
+		self.name = None
+
+	def __set_name__(self, owner, name):
+		self.name = name
+
+	def __repr__(self):
+		return "<{}({!r}, {!r})>".format(type(self).__name__, self.name,
+			self.get_command or self.set_command)
+
+	@property
+	def readable(self):
+		return self.get_command is not None
+
+	@property
+	def writable(self):
+		return self.set_command is not None
+
+
+class Measurement(Property):
+	""" Property that may only be read from the instrument. See
+	:meth:`BaseInstrument.measurement<Instruments.instrument.BaseInstrument.measurement>`.
+	"""
+	kind = 'measurement'
+
+	def __init__(self, get_command, docs, values=(), map_values=None,
+				 get_process=_identity, command_process=None,
+				 check_get_errors=False, **kwargs):
+		super(Measurement, self).__init__(docs)
+		self.get_command = get_command
+		self.values = values
+		self.map_values = map_values
+		self.command_process = command_process
+		self.check_get_errors = check_get_errors
+		self.kwargs = kwargs
+		self._parse = _parser(**kwargs)
+		self._decode = _decoder(values, map_values, get_process, self.kind)
+
+	def query(self, instrument):
+		""" Returns the command reading the property """
+		if self.command_process is None:
+			return self.get_command
+		return self.command_process(self.get_command)
+
+	def decode(self, reply):
+		""" Returns the value of the property from a reply of the instrument """
+		return self._decode(self._parse(reply))
+
+	def read(self, instrument):
+		""" Queries the value of the property from the instrument """
+		if not self.check_get_errors:
+			return self._decode(self._parse(instrument.ask(self.query(instrument))))
+		# The error queue is read in the same transaction as the value
+		with instrument.batch() as b:
+			reply = b.ask(self.query(instrument))
+			instrument.check_errors()
+			# Within an outer batch, the reply is only there once it is sent
+			b.execute()
+		return self._decode(self._parse(reply.value))
+
+	def __get__(self, instrument, owner=None):
+		if instrument is None:
+			return self
+		return self.read(instrument)
+
+	def __set__(self, instrument, value):
+		raise AttributeError("Instrument.measurement properties can not be set.")
+
+
+class Control(Measurement):
+	""" Property that may be set and read from the instrument. See
+	:meth:`BaseInstrument.control<Instruments.instrument.BaseInstrument.control>`.
+	"""
+	kind = 'control'
+
+	def __init__(self, get_command, set_command, docs,
+				 validator=None, values=(), map_values=False,
+				 get_process=_identity, set_process=_identity,
+				 check_set_errors=False, check_get_errors=False,
+				 **kwargs):
+		super(Control, self).__init__(get_command, docs, values, map_values,
+			get_process, None, check_get_errors, **kwargs)
+		self.set_command = set_command
+		self.validator = validator
+		self.check_set_errors = check_set_errors
+		self._format = _formatter(set_command)
+		self._encode = _encoder(values, map_values, set_process, self.kind)
+
+	def format(self, instrument, value):
+		""" Returns the command setting the property to a validated value """
+		return self._format(self._encode(value))
+
+	def __get__(self, instrument, owner=None):
+		if instrument is None:
+			return self
+		cache = instrument._cache
+		if cache is None:
+			return self.read(instrument)
+		key = (instrument._scope, self.get_command)
+		cached, value = cache.get(key)
+		if not cached:
+			value = self.read(instrument)
+			cache.put(key, value, read=True)
+		return value
+
+	def __set__(self, instrument, value):
+		if self.validator is not None:
+			value = self.validator(value, self.values)
+		command = self.format(instrument, value)
+		if self.check_set_errors:
+			write_checked(instrument, command)
+		else:
+			instrument.write(command)
+		cache = instrument._cache
+		if cache is not None:
+			key = (instrument._scope, self.get_command)
+			instrument._commit(lambda: cache.put(key, value))
+
+
+class Setting(Property):
+	""" Property that may only be set. See
+	:meth:`BaseInstrument.setting<Instruments.instrument.BaseInstrument.setting>`.
+	"""
+	kind = 'setting'
+
+	def __init__(self, set_command, docs,
+				 validator=None, values=(), map_values=False,
+				 set_process=_identity, check_set_errors=False,
+				 **kwargs):
+		super(Setting, self).__init__(docs)
+		self.set_command = set_command
+		self.values = values
+		self.map_values = map_values
+		self.validator = validator
+		self.check_set_errors = check_set_errors
+		self._format = _formatter(set_command)
+		self._encode = _encoder(values, map_values, set_process, 'setting')
+
+	def format(self, instrument, value):
+		""" Returns the command setting the property to a validated value """
+		return self._format(self._encode(value))
+
+	def __get__(self, instrument, owner=None):
+		if instrument is None:
+			return self
+		raise LookupError("Instrument.setting properties can not be read.")
+
+	def __set__(self, instrument, value):
+		if self.validator is not None:
+			value = self.validator(value, self.values)
+		command = self.format(instrument, value)
+		if self.check_set_errors:
+			write_checked(instrument, command)
+		else:
+			instrument.write(command)
+
+
+class ChannelProperty(object):
+	""" Mixin of the channel property descriptors, whose commands are templates
+	with a :code:`{ch}` placeholder for the channel number. The commands of each
+	channel are built on its first access and reused.
+	"""
+	_templates = None
+
+	def _commands(self, channel):
+		""" Returns the query and the formatter of the commands of a channel """
+		templates = self._templates
+		if templates is None:
+			templates = self._templates = {}
+		commands = templates.get(channel.chnum)
+		if commands is None:
+			number = str(channel.chnum)
+			query = self.get_command.replace('{ch}', number) if self.get_command else None
+			format = _formatter(self.set_command.replace('{ch}', number)) if self.set_command else None
+			commands = templates[channel.chnum] = (query, format)
+		return commands
+
+	def query(self, channel):
+		query = self._commands(channel)[0]
+		if self.command_process is None:
+			return query
+		return self.command_process(query)
+
+	def format(self, channel, value):
+		return self._commands(channel)[1](self._encode(value))
+
+	def read_all(self, channels):
+		""" Reads the property of several channels in one transaction of their
+		parent, and returns the values in the order of channels. Cached controls
+		are not queried.
+
+		:param channels: Channels of the same instrument
+		"""
+		if not self.readable:
+			raise LookupError("Channel.setting properties can not be read.")
+		values = [None] * len(channels)
+		pending = []
+		with channels[0].batch() as b:
+			for i, channel in enumerate(channels):
+				cache = channel._cache if self.kind == 'control' else None
+				if cache is not None:
+					cached, value = cache.get((channel._scope, self.get_command))
+					if cached:
+						values[i] = value
+						continue
+				pending.append((i, channel, cache, b.ask(self.query(channel))))
+		for i, channel, cache, reply in pending:
+			values[i] = self.decode(reply.value)
+			if cache is not None:
+				cache.put((channel._scope, self.get_command), values[i], read=True)
+		return values
+
+
+class ChannelMeasurement(ChannelProperty, Measurement):
+	""" Measurement of a channel. See
+	:meth:`Channel.measurement<Instruments.instrument.Channel.measurement>`.
+	"""
+
+
+class ChannelControl(ChannelProperty, Control):
+	""" Control of a channel. See
+	:meth:`Channel.control<Instruments.instrument.Channel.control>`.
+	"""
+
+
+class ChannelSetting(ChannelProperty, Setting):
+	""" Setting of a channel. See
+	:meth:`Channel.setting<Instruments.instrument.Channel.setting>`.
+	"""
+	command_process = None
@@ -0,0 +1,88 @@
+import re
+
+# Model patterns without regular expression syntax are also indexed for exact lookup
+_LITERAL = re.compile(r'[\w\- ]+$')
+
+
+class DriverRegistry(object):
+	""" Index of the instrument driver classes by the models they support, for
+	auto-detection. Every subclass of
+	:class:`BaseInstrument<Instruments.instrument.BaseInstrument>` that declares
+	its own :code:`models` list, the category name followed by model patterns, is
+	registered when the class is created.
+
+	A model is first looked up in a dictionary of the literal patterns, then
+	searched with the compiled regular expressions, and the result is remembered.
+	When several drivers support a model, the most specific one wins: the highest
+	:code:`priority` attribute, then an exact or full match over a partial one,
+	then the most derived class, then the first registered.
+	"""
+	def __init__(self):
+		self._drivers = []
+		self._exact = {}
+		self._patterns = []
+		self._found = {}
+
+	def __len__(self):
+		return len(self._drivers)
+
+	def __iter__(self):
+		return iter(self._drivers)
+
+	def __repr__(self):
+		return "<DriverRegistry({} drivers)>".format(len(self._drivers))
+
+	def register(self, cls):
+		""" Adds a driver class, unless it declares no model pattern """
+		models = cls.__dict__.get('models')
+		if not models or len(models) < 2 or cls in self._drivers:
+			return
+		order = len(self._drivers)
+		self._drivers.append(cls)
+		for pattern in models[1:]:
+			if _LITERAL.match(pattern):
+				self._exact.setdefault(pattern, []).append((order, cls))
+			self._patterns.append((re.compile(pattern), order, cls))
+		self._found.clear()
+
+	def unregister(self, cls):
+		if cls not in self._drivers:
+			return
+		self._drivers.remove(cls)
+		for model, entries in list(self._exact.items()):
+			entries[:] = [entry for entry in entries if entry[1] is not cls]
+			if not entries:
+				del self._exact[model]
+		self._patterns = [entry for entry in self._patterns if entry[2] is not cls]
+		self._found.clear()
+
+	def candidates(self, model):
+		""" Returns the driver classes supporting model, most specific first """
+		found = self._found.get(model)
+		if found is not None:
+			return list(found)
+		ranks = {}
+		for order, cls in self._exact.get(model, ()):
+			ranks[cls] = (getattr(cls, 'priority', 0), 1, len(cls.__mro__), -order)
+		for regex, order, cls in self._patterns:
+			match = regex.search(model)
+			if match:
+				full = 1 if match.group(0) == model else 0
+				rank = (getattr(cls, 'priority', 0), full, len(cls.__mro__), -order)
+				ranks[cls] = max(rank, ranks.get(cls, rank))
+		found = sorted(ranks, key=ranks.get, reverse=True)
+		self._found[model] = found
+		return list(found)
+
+	def lookup(self, model):
+		""" Returns the most specific driver class supporting model, or None """
+		found = self.candidates(model)
+		return found[0] if found else None
+
+
+registry = DriverRegistry()
+
+
+def find_driver(model):
+	""" Returns the most specific registered driver class for model, or None """
+	return registry.lookup(model)
@@ -34,17 +34,20 @@ class rfSW(Instrument):
 		
 	
 	def set_frequency_start_stop(self, start, stop):
-		self.write(':SENS1:FREQ:STAR ' + str(start))
-		self.write(':SENS1:FREQ:STOP ' + str(stop))
+		with self.batch():
+			self.write(':SENS1:FREQ:STAR ' + str(start))
+			self.write(':SENS1:FREQ:STOP ' + str(stop))
 
 	def set_frequency_center_span(self, center, span=None):
-		self.write('SENS1:FREQ:CENT ' + str(center))
-		if not span == None:
-			self.write('SENS1:FREQ:SPAN ' + str(span))
+		with self.batch():
+			self.write('SENS1:FREQ:CENT ' + str(center))
+			if not span == None:
+				self.write('SENS1:FREQ:SPAN ' + str(span))
 
 	def set_sweep_parameters(self, number_of_points, power):
-		self.write(':SENS1:SWE:POIN ' + str(number_of_points))
-		self.write(':SOUR1:POW ' + str(power))
+		with self.batch():
+			self.write(':SENS1:SWE:POIN ' + str(number_of_points))
+			self.write(':SOUR1:POW ' + str(power))
 
 	def set_averaging(self, enable, number_of_averages=None):
 		if enable:
@@ -64,16 +67,17 @@ class rfSW(Instrument):
 
 	def configure_display_scale(self, reference_value, reference_position=None,
 								number_of_divisions=None, scale_per_division=None):
-		self.write('DISP:WIND1:TRAC1:Y:RLEV ' + str(reference_value))
+		with self.batch():
+			self.write('DISP:WIND1:TRAC1:Y:RLEV ' + str(reference_value))
 
-		if not reference_position == None:
-			self.write('DISP:WIND1:TRAC1:Y:RPOS ' + str(reference_position))
+			if not reference_position == None:
+				self.write('DISP:WIND1:TRAC1:Y:RPOS ' + str(reference_position))
 
-		if not number_of_divisions == None:
-			self.write('DISP:WIND1:Y:DIV ' + str(number_of_divisions))
+			if not number_of_divisions == None:
+				self.write('DISP:WIND1:Y:DIV ' + str(number_of_divisions))
 
-		if not scale_per_division == None:
-			self.write('DISP:WIND1:TRAC1:Y:PDIV ' + str(scale_per_division))
+			if not scale_per_division == None:
+				self.write('DISP:WIND1:TRAC1:Y:PDIV ' + str(scale_per_division))
 
 	def set_background_color(self, red, green, blue):
 		''' Colors are integers of range 0 through 5'''
@@ -91,13 +95,16 @@ class rfSW(Instrument):
 		self.write(':CALC1:MARK1:BWID ON')
 		if not dB_down == None:
 			self.write(':CALC1:MARK1:BWID:THR ' + str(dB_down))
-		return [float(i) for i in (self.ask(':CALC1:MARK:BWID:DATA?').split(','))]
+		return self.values(':CALC1:MARK:BWID:DATA?')
 
 	def peak_search(self):
 		''' Enable peak search, find peak, and return X and Y positions'''
-		self.write(':CALC:MARK1:FUNC:TYPE PEAK')
-		self.write(':CALC:MARK1:FUNC:EXEC')
-		return float(self.ask(':CALC:MARK1:X?')), float(self.ask(':CALC:MARK1:Y?').split(',')[0])
+		with self.batch() as b:
+			b.write(':CALC:MARK1:FUNC:TYPE PEAK')
+			b.write(':CALC:MARK1:FUNC:EXEC')
+			x = b.values(':CALC:MARK1:X?')
+			y = b.values(':CALC:MARK1:Y?')
+		return x.value[0], y.value[0]
 
 	def max_search(self, marker=None):
 		''' Enable max search, find max, and return X and Y positions'''
@@ -106,12 +113,13 @@ class rfSW(Instrument):
 
 		marker_text = 'MARK' + str(marker)
 
-		self.write(':CALC:' + marker_text + ' ON')
-		self.write(':CALC:' + marker_text + ':FUNC:TYPE MAX')
-		self.write(':CALC:' + marker_text + ':FUNC:EXEC')
-
-		return (float(self.ask(':CALC:' + marker_text + ':X?')),
-				float(self.ask(':CALC:' + marker_text + ':Y?').split(',')[0]))
+		with self.batch() as b:
+			b.write(':CALC:' + marker_text + ' ON')
+			b.write(':CALC:' + marker_text + ':FUNC:TYPE MAX')
+			b.write(':CALC:' + marker_text + ':FUNC:EXEC')
+			x = b.values(':CALC:' + marker_text + ':X?')
+			y = b.values(':CALC:' + marker_text + ':Y?')
+		return x.value[0], y.value[0]
 
 	def min_search(self, marker=None):
 		'''Enable min search, find min, and return X and Y positions'''
@@ -120,17 +128,18 @@ class rfSW(Instrument):
 
 		marker_text = 'MARK' + str(marker)
 
-		self.write(':CALC:' + marker_text + ' ON')
-		self.write(':CALC:' + marker_text + ':FUNC:TYPE MIN')
-		self.write(':CALC:' + marker_text + ':FUNC:EXEC')
-
-		return (float(self.ask(':CALC:' + marker_text + ':X?')),
-				float(self.ask(':CALC:' + marker_text + ':Y?').split(',')[0]))
+		with self.batch() as b:
+			b.write(':CALC:' + marker_text + ' ON')
+			b.write(':CALC:' + marker_text + ':FUNC:TYPE MIN')
+			b.write(':CALC:' + marker_text + ':FUNC:EXEC')
+			x = b.values(':CALC:' + marker_text + ':X?')
+			y = b.values(':CALC:' + marker_text + ':Y?')
+		return x.value[0], y.value[0]
 
 
 	def get_trace(self):
-		freqList = [float(i) for i in self.ask(':SENS1:FREQ:DATA?').split(',')]
-		amplList = [float(i) for i in self.ask(':CALC1:DATA:FDAT?').split(',')[::2]]
+		freqList = self.values(':SENS1:FREQ:DATA?', container=np.ndarray)
+		amplList = self.values(':CALC1:DATA:FDAT?', container=np.ndarray)[::2]
 		return np.transpose([freqList, amplList])
 
 	def set_marker(self, freq, marker=None):
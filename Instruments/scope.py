@@ -1,4 +1,5 @@
-from Instruments.instrument import Channel, BaseInstrument, ChannelizedInstrument
+from Instruments.instrument import Channel, BaseInstrument, ChannelizedInstrument, LazyChannel
+from functools import cached_property
 from Instruments.validators import strict_discrete_set
 
 class ScopeChannel(Channel):
@@ -72,6 +73,12 @@ class DSOChannel(ScopeChannel):
 class MSOChannel(ScopeChannel):
 	_SOURCE_VALUES = ["CH1", "CH2", "CH3", "CH4", "MATH"]
 	_CPL = ["AC", "DC", "DCREJ"]
+	label_name = Channel.control("CH{ch}:LAB:NAM?", "CH{ch}:LAB:NAM {}", """ Label of the channel """, cast=str)
+	vertical_position = Channel.control("CH{ch}:POS?", "CH{ch}:POS {}", """ Vertical position (divisions) """)
+	scale_ratio = Channel.control("CH{ch}:SCALERAT?", "CH{ch}:SCALERAT %e", """ Vertical scale ratio """)
+	input_termination = Channel.control("CH{ch}:TER?", "CH{ch}:TER %e", """ Input termination, 50 or 1E6 Ohm """,
+		validator=strict_discrete_set, values=[50, 1e6])
+	probe_gain = Channel.measurement("CH{ch}:PRO:GAIN?", """ Gain of the probe """)
 	
 	def __init__(self, channel, adapter, parent, **kwargs):
 		super(MSOChannel, self).__init__(channel, adapter, parent, **kwargs)
@@ -102,9 +109,9 @@ class MSOChannel(ScopeChannel):
 		
 	def label(self, name = None):
 		if(name == None):
-			return self.ask("CH{}:LAB:NAM?".format(self.chnum))
+			return self.label_name
 		else:
-			return self.write("CH{}:LAB:NAM {}".format(self.chnum, name))
+			self.label_name = name
 		
 	# def offset(self, voffset = None):
 		# if(voffset == None):
@@ -114,9 +121,9 @@ class MSOChannel(ScopeChannel):
 		
 	def position(self, pos = None):
 		if(pos == None):
-			return self.ask("CH{}:POS?".format(self.chnum))
+			return self.vertical_position
 		else:
-			return self.write("CH{}:POS %d".format(self.chnum, pos))
+			self.vertical_position = pos
 		
 	# def scale(self, div = None):
 		# if(div == None):
@@ -126,15 +133,15 @@ class MSOChannel(ScopeChannel):
 		
 	def scaleratio(self, div = None):
 		if(div == None):
-			return self.ask("CH{}:SCALERAT?".format(self.chnum))
+			return self.scale_ratio
 		else:
-			return self.write("CH{}:SCALERAT {:e}".format(self.chnum, div))
+			self.scale_ratio = div
 		
 	def termination(self, term = None):
 		if(term == None):
-			return self.ask("CH{}:TER?".format(self.chnum))
+			return self.input_termination
 		elif(term == 50 or term == 1e6):
-			return self.write("CH{}:TER {:e}".format(self.chnum, term))
+			self.input_termination = term
 		else:
 			raise ValueError("Invalid termination {} provided to {}".format(term, self.parent))
 		
@@ -143,7 +150,7 @@ class MSOChannel(ScopeChannel):
 		return self.ask("CH{}:PRO?".format(self.chnum))
 		
 	def gain(self):
-		return self.ask("CH{}:PRO:GAIN?".format(self.chnum))
+		return self.probe_gain
 	
 	@property
 	def value(self):
@@ -195,14 +202,14 @@ class DSO(Oscilloscope):
 	models = ["SCP", r"DSO\d\d\d\d[ABCD]?"]
 	_ACQ = ["AVE", "ENV", "SAM", "PEAK", "HIR"]
 	_TIM = ["MAIN", "WIND", "XY", "ROLL"]
+	ch1 = LazyChannel(DSOChannel, 1)
+	ch2 = LazyChannel(DSOChannel, 2)
+	ch3 = LazyChannel(DSOChannel, 3)
+	ch4 = LazyChannel(DSOChannel, 4)
 	
 	def __init__(self, name, adapter, **kwargs):
 		super(DSO, self).__init__(name, adapter, **kwargs)
 		#self._maxsamplerate = self.ask("ACQuire:MAXSamplerate?")
-		self.ch1 = DSOChannel(1, adapter, self)
-		self.ch2 = DSOChannel(2, adapter, self)
-		self.ch3 = DSOChannel(3, adapter, self)
-		self.ch4 = DSOChannel(4, adapter, self)
 	
 	def clearDisplay(self):
 		self.write("DISP:CLEAR")
@@ -244,13 +251,18 @@ class DSO(Oscilloscope):
 class MSO(Oscilloscope):
 	models = ["SCP", r"MSO\d\d\d\d[ABCD]?"]
 	acq_modes = ["AVE", "ENV", "SAM", "PEAK", "HIR"]
+	ch1 = LazyChannel(MSOChannel, 1)
+	ch2 = LazyChannel(MSOChannel, 2)
+	ch3 = LazyChannel(MSOChannel, 3)
+	ch4 = LazyChannel(MSOChannel, 4)
+
 	def __init__(self, name, adapter, **kwargs):
 		super(MSO, self).__init__(name, adapter, **kwargs)
-		self._maxsamplerate = self.ask("ACQuire:MAXSamplerate?")
-		self.ch1 = MSOChannel(1, adapter, self)
-		self.ch2 = MSOChannel(2, adapter, self)
-		self.ch3 = MSOChannel(3, adapter, self)
-		self.ch4 = MSOChannel(4, adapter, self)
+
+	@cached_property
+	def _maxsamplerate(self):
+		""" Maximum sample rate of the scope, queried on first use """
+		return self.ask("ACQuire:MAXSamplerate?")
 	
 	def autoscale(self):
 		self.write("AUT")
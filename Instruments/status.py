@@ -0,0 +1,137 @@
+import threading
+import time
+from concurrent.futures import Future
+
+# IEEE 488.2 status register bits
+ESR_OPC = 0x01  # Operation complete, in the standard event status register
+STB_MAV = 0x10  # Message available
+STB_ESB = 0x20  # Event status bit, summary of the enabled ESR bits
+STB_RQS = 0x40  # Service request
+
+
+def _register(reply):
+	""" Returns the integer value of a status register query reply """
+	return int(float(reply.strip()))
+
+
+def operation_complete(instrument, command=None, timeout=60, interval=0.01, max_interval=1.0,
+					   growth=1.5, srq=None):
+	""" Starts an overlapped operation and returns a Future that completes with the
+	elapsed seconds once the instrument reports it done, instead of sleeping for
+	its worst case duration.
+
+	The operation is sent followed by :code:`*OPC`, with the OPC bit enabled in
+	:code:`*ESE`, once a :code:`*ESR?` query has cleared the event status
+	register (:code:`*CLS` would also empty the error queue). When the adapter
+	supports service requests, :code:`*SRE 32` raises SRQ on completion and a
+	worker thread waits for it. Otherwise, or if waiting for SRQ fails, the worker
+	polls :code:`*ESR?`, starting at interval seconds and growing by growth up to
+	max_interval, so short operations are seen quickly and long ones cost few bus
+	transactions.
+
+	The worker queries the adapter directly, outside the transactions and caches
+	of the instrument, holding the lock of the connection for each query, and
+	the previous :code:`*ESE` and :code:`*SRE` are restored before the Future
+	completes. Only adapters with a lock, such as those of the
+	:class:`AdapterPool<Adapters.pool.AdapterPool>` or a
+	:class:`LockedAdapter<Adapters.pool.LockedAdapter>`, are polled while the
+	caller goes on using the instrument, and they are free for other calls while
+	the worker waits for SRQ. With other adapters, the caller's queries would
+	get the replies of the worker, so the operation is waited for before
+	returning the completed Future.
+
+	.. code-block:: python
+
+		done = operation_complete(pm, "CAL1", timeout=60)
+		...	# Other work
+		done.result()
+
+	The Future fails with TimeoutError after timeout seconds. Wrap it with
+	:code:`asyncio.wrap_future` to await it.
+
+	:param instrument: SCPI instrument running the operation
+	:param command: Command starting the operation, or None to wait for the
+					operations already pending
+	:param timeout: Seconds to wait for completion
+	:param interval: First polling interval in seconds
+	:param max_interval: Longest polling interval in seconds
+	:param growth: Factor between successive polling intervals
+	:param srq: True to wait for SRQ, False to poll, or None to wait for SRQ if
+				the adapter supports it
+	"""
+	adapter = instrument._adapter
+	lock = getattr(adapter, 'lock', None)
+	overlapped = lock is not None
+	if not overlapped:
+		lock = threading.RLock()
+	if srq is None:
+		srq = getattr(adapter, 'srq', False)
+
+	with instrument.batch() as b:
+		b.ask("*ESR?")
+		ese = b.ask("*ESE?")
+		sre = b.ask("*SRE?") if srq else None
+		b.write("*ESE %d" % ESR_OPC)
+		if srq:
+			b.write("*SRE %d" % STB_ESB)
+		if command:
+			b.write(command)
+		b.write("*OPC")
+		# Sent now, even within a batch already open
+		b.execute()
+
+	future = Future()
+	start = time.time()
+	deadline = start + timeout
+
+	def complete():
+		""" Reads the status register and returns True if OPC is set """
+		with lock:
+			return bool(_register(adapter.ask("*ESR?")) & ESR_OPC)
+
+	def restore():
+		with lock:
+			adapter.write("*ESE %d" % _register(ese.value))
+			if sre is not None:
+				adapter.write("*SRE %d" % _register(sre.value))
+
+	def poll():
+		delay = interval
+		while not future.done():
+			if complete():
+				return True
+			now = time.time()
+			if now >= deadline:
+				return False
+			time.sleep(min(delay, deadline - now))
+			delay = min(delay * growth, max_interval)
+		return False
+
+	def wait():
+		try:
+			done = False
+			if srq:
+				try:
+					adapter.wait_for_srq(max(0, deadline - time.time()))
+					done = complete()
+				except Exception:
+					pass  # No SRQ line or timed out, the status register tells
+			if not done:
+				done = poll()
+			restore()
+			if done:
+				result = time.time() - start
+				if not future.done():
+					future.set_result(result)
+			elif not future.done():
+				future.set_exception(TimeoutError("%s did not complete %s within %g s" % (
+					instrument, command or "pending operations", timeout)))
+		except Exception as e:
+			if not future.done():
+				future.set_exception(e)
+
+	if overlapped:
+		threading.Thread(target=wait, daemon=True, name="opc-%s" % (command or "wait")).start()
+	else:
+		wait()
+	return future
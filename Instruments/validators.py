@@ -1,4 +1,6 @@
+from bisect import bisect_left
 from decimal import Decimal
+import numpy as np
 
 
 def strict_range(value, values):
@@ -143,4 +145,217 @@ def discreteTruncate(number, discreteSet):
 	for item in discreteSet:
 		if number <= item:
 			return item
-	return False
\ No newline at end of file
+	return False
+
+
+class ValidationError(ValueError):
+	""" Raised by the validator classes with every value that failed, along with
+	its index when an array was validated
+	:param message: Description of the failure
+	:param indices: Indices of the values that failed, or None for a scalar
+	:param values: The values that failed
+	"""
+	def __init__(self, message, indices=None, values=None):
+		super(ValidationError, self).__init__(message)
+		self.indices = indices
+		self.values = values
+
+
+class Validator(object):
+	""" Base class of the validators whose valid values are given once, so that
+	bounds and sorted sets are computed on construction rather than on every
+	call. Validators are called like the validator functions, with the values
+	argument ignored, and so may be given as the validator of
+	:meth:`control<Instruments.instrument.BaseInstrument.control>` properties.
+
+	A list or NumPy array is validated whole, and the result is a NumPy array.
+	Every value that fails is reported in a single :class:`ValidationError`.
+	Tuples, which fill the placeholders of commands taking several values, are
+	returned unchanged.
+	"""
+	shown = 10  # Failing values listed in the error message
+
+	def __call__(self, value, values=None):
+		if isinstance(value, tuple):
+			return value
+		if np.ndim(value) == 0:
+			return self.scalar(value)
+		return self.array(np.asarray(value))
+
+	def scalar(self, value):
+		raise NameError("Validator (sub)class has not implemented scalar validation")
+
+	def array(self, values):
+		raise NameError("Validator (sub)class has not implemented array validation")
+
+	def _fail(self, values, failed, reason):
+		""" Raises a ValidationError for the values where failed is True """
+		indices = np.flatnonzero(failed)
+		bad = values.ravel()[indices]
+		listed = ', '.join('[{}]={}'.format(i, v) for i, v in zip(indices[:self.shown], bad[:self.shown]))
+		if len(indices) > self.shown:
+			listed += ', ...'
+		raise ValidationError('{} of {} values {}: {}'.format(len(indices), values.size, reason, listed),
+			indices, bad)
+
+
+class StrictRange(Validator):
+	""" Returns values within [min(values), max(values)], and raises otherwise.
+	The vector version of :func:`strict_range`.
+	:param values: A range of values (range, list, etc.)
+	"""
+	def __init__(self, values):
+		self.low = min(values)
+		self.high = max(values)
+
+	def __repr__(self):
+		return "StrictRange([{:g}, {:g}])".format(self.low, self.high)
+
+	def scalar(self, value):
+		if self.low <= value <= self.high:
+			return value
+		raise ValidationError('Value of {:g} is not in range [{:g},{:g}]'.format(
+			value, self.low, self.high), None, value)
+
+	def array(self, values):
+		# Negated, so that NaN, which compares False to anything, fails
+		failed = ~((values >= self.low) & (values <= self.high))
+		if failed.any():
+			self._fail(values, failed, 'not in range [{:g},{:g}]'.format(self.low, self.high))
+		return values
+
+
+class StrictDiscreteRange(StrictRange):
+	""" Returns values within the range that are multiples of step, and raises
+	otherwise. The vector version of :func:`strict_discrete_range`; arrays are
+	checked in floating point, to a millionth of a step.
+	:param values: A range of values (range, list, etc.)
+	:param step: Minimum stepsize (resolution limit)
+	"""
+	def __init__(self, values, step):
+		super(StrictDiscreteRange, self).__init__(values)
+		self.step = step
+		self._step = Decimal(str(step))
+
+	def __repr__(self):
+		return "StrictDiscreteRange([{:g}, {:g}], {:g})".format(self.low, self.high, self.step)
+
+	def scalar(self, value):
+		super(StrictDiscreteRange, self).scalar(value)
+		if Decimal(str(value)) % self._step == 0:
+			return value
+		raise ValidationError('Value of {:g} is not a multiple of {:g}'.format(
+			value, self.step), None, value)
+
+	def array(self, values):
+		super(StrictDiscreteRange, self).array(values)
+		steps = values / self.step
+		failed = np.abs(steps - np.round(steps)) > 1e-6
+		if failed.any():
+			self._fail(values, failed, 'not a multiple of {:g}'.format(self.step))
+		return values
+
+
+class TruncatedRange(StrictRange):
+	""" Returns values clipped to the range. The vector version of
+	:func:`truncated_range`.
+	:param values: A range of values (range, list, etc.)
+	"""
+	def __repr__(self):
+		return "TruncatedRange([{:g}, {:g}])".format(self.low, self.high)
+
+	def scalar(self, value):
+		if value > self.high:
+			return self.high
+		if value < self.low:
+			return self.low
+		return value
+
+	def array(self, values):
+		return np.clip(values, self.low, self.high)
+
+
+class StrictDiscreteSet(Validator):
+	""" Returns values in the discrete set, and raises otherwise. The vector
+	version of :func:`strict_discrete_set`.
+	:param values: A set of values that are valid
+	"""
+	def __init__(self, values):
+		self.values = list(values)
+		try:
+			self._set = frozenset(self.values)
+		except TypeError:
+			self._set = self.values
+		try:
+			self._sorted = np.unique(np.asarray(self.values, dtype=float))
+		except (TypeError, ValueError):
+			self._sorted = None  # Not numeric, arrays are checked element by element
+
+	def __repr__(self):
+		return "StrictDiscreteSet({})".format(self.values)
+
+	def __call__(self, value, values=None):
+		if self._sorted is None and np.ndim(value) != 0:
+			# Keep mixed numbers and strings as they are, rather than as strings
+			return self.array(np.asarray(value, dtype=object))
+		return super(StrictDiscreteSet, self).__call__(value, values)
+
+	def scalar(self, value):
+		if value in self._set:
+			return value
+		raise ValidationError('Value of {} is not in the discrete set {}'.format(
+			value, self.values), None, value)
+
+	def array(self, values):
+		if self._sorted is None or values.dtype.kind not in 'biuf':
+			failed = np.array([v not in self._set for v in values.ravel()]).reshape(values.shape)
+		else:
+			index = np.clip(np.searchsorted(self._sorted, values), 0, len(self._sorted) - 1)
+			failed = self._sorted[index] != values
+		if failed.any():
+			self._fail(values, failed, 'not in the discrete set {}'.format(self.values))
+		return values
+
+
+class TruncatedDiscreteSet(Validator):
+	""" Returns the smallest value of the set that is not less than each value,
+	or the largest value of the set. The vector version of
+	:func:`truncated_discrete_set`.
+	:param values: A set of values that are valid
+	"""
+	def __init__(self, values):
+		self.values = sorted(values)
+		self._sorted = np.asarray(self.values)
+
+	def __repr__(self):
+		return "TruncatedDiscreteSet({})".format(self.values)
+
+	def scalar(self, value):
+		index = bisect_left(self.values, value)
+		return self.values[min(index, len(self.values) - 1)]
+
+	def array(self, values):
+		index = np.searchsorted(self._sorted, values, side='left')
+		return self._sorted[np.minimum(index, len(self._sorted) - 1)]
+
+
+class DiscreteTruncate(TruncatedDiscreteSet):
+	""" Truncates numbers to the closest element of the positive discrete set
+	that is not smaller. The vector version of :func:`discreteTruncate`:
+	a scalar out of the set's range returns False, while every out of range
+	element of an array is reported in a :class:`ValidationError`.
+	:param values: A set of values that are valid
+	"""
+	def __repr__(self):
+		return "DiscreteTruncate({})".format(self.values)
+
+	def scalar(self, value):
+		if value < 0 or value > self.values[-1]:
+			return False
+		return super(DiscreteTruncate, self).scalar(value)
+
+	def array(self, values):
+		failed = (values < 0) | (values > self.values[-1])
+		if failed.any():
+			self._fail(values, failed, 'not in [0,{}]'.format(self.values[-1]))
+		return super(DiscreteTruncate, self).array(values)
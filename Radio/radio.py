@@ -7,7 +7,10 @@ Created on Fri Jun 14 14:40:09 2019
 
 import Utilities.win
 from Utilities.SerialPort import SerialPort
+from Utilities.capture import Capture
+from Utilities.matcher import PromptMatcher
 #from WF import Waveform, VULOS
+import os
 import re
 from serial import Serial
 import time
@@ -23,15 +26,21 @@ class Console():
 	NORM = 'NORM'
 	PROGRAM = 'PRGM'
 	_ASCII = [">", F3, NORM, LOAD, INSTALL, PROGRAM]
+	# Prompts of each mode. The '#' prompt is only the CONSOLE one at the beginning of
+	# a line; a '#' anywhere else is probably from a debug print, so it is ignored.
+	PROMPTS = PromptMatcher({NORM: 'NORM>', F3: 'F3>', PROGRAM: 'PRGM>', INSTALL: 'INST>',
+		LOAD: 'LOAD>', BIT: 'BIT>', CONSOLE: re.compile(r'^(?:/tmp |~ )?#|/tmp #', re.M)})
 	
-	def __init__(self, name=None, comport=None, baud=115200, asyncr=False, filepath=None, debugOn=False):
+	def __init__(self, name=None, comport=None, baud=115200, asyncr=False, filepath=None, debugOn=False, capture=None):
 		""" Console Constructor
 				name: any string (ie, 'RCP')
 				comport: 'COMn' string (ie, 'COM21')
 				baud: the baud rate to use
 				async: (T/F) use an asynchronous background thread for all reads
-				filepath: log file name ('.txt')
+				filepath: log file name, the transcript being written to segments
+						  such as 'rcp.000001.log' next to it
 				AduSN: Associated Relay ('E0####')
+				capture: Capture to share with other consoles, instead of filepath
 		"""
 		self._debugOn = debugOn
 		
@@ -40,6 +49,13 @@ class Console():
 		else:
 			self._name = comport
 		
+		#Open the transcript, if requested
+		self._own_capture = capture is None and filepath != None
+		if self._own_capture:
+			capture = Capture(os.path.dirname(filepath) or '.', os.path.splitext(os.path.basename(filepath))[0])
+		self.capture = capture
+		self.logenabled = capture is not None
+		
 		try:
 			if(comport == None) :
 				print("Let's find a COM Port")
@@ -49,9 +65,11 @@ class Console():
 			elif(isinstance(comport, SerialPort)):
 				print("Using this SerialPort object")
 				self.handle = comport
+				if capture is not None:
+					self.handle.set_capture(capture)
 			elif(isinstance(comport, str)):
 				print("Starting new SerialPort")
-				self.handle = SerialPort(name, comport, baud)
+				self.handle = SerialPort(name, comport, baud, capture=capture)
 			else:
 				print("What is this?")
 		except Exception as se:
@@ -59,14 +77,6 @@ class Console():
 			print(se)
 		self.port = comport
 		
-		#Open log file, if requested
-		self.logenabled = False
-		if(filepath != None) :
-			self.logfile = open(filepath,"w")
-			self.logfile.write("Log file\n")
-			self.logfile.flush()
-			self.logenabled = True
-		
 		self.boot = False
 		self.timeoff = time.perf_counter()
 		self.lasttime = time.perf_counter()
@@ -74,6 +84,8 @@ class Console():
 	def close(self):
 		if self.isOpen():
 			self.handle.close()
+		if getattr(self, '_own_capture', False):
+			self.capture.close()
 	
 	def __del__(self):
 		self.close()
@@ -111,6 +123,10 @@ class Console():
 		self.send(cmd)
 		return self.handle.waitFor(prompt, timeout, False, useRegex, caseSensitive)
 	
+	def send_and_expect(self, cmd = "\n", prompts=PROMPTS, timeout = 5):
+		self.send(cmd)
+		return self.handle.expect(prompts, timeout)
+	
 	def send_and_timeout(self, cmd = "\n", prompt="#", timeout = 5, useRegex=False, caseSensitive=False):
 		self.send(cmd)
 		return self.handle.waitFor(prompt, timeout, True, useRegex, caseSensitive)
@@ -122,10 +138,9 @@ class Console():
 		# return validateASCII(response) or response.find('#')
 	
 	def publish(self, msg):
-		if self.debugOn : print(msg)
+		if self._debugOn : print(msg)
 		if(self.logenabled) :
-			self.logfile.write("Log file\n")
-			self.logfile.flush()
+			self.capture.note(self._name, msg)
 
 	def startUSB(self, timeout = 10):
 		driveNumber = -1
@@ -259,27 +274,12 @@ class Channel():
 			# if no RED port, always assume CONSOLE
 			self.currentMode = Console.CONSOLE
 			return self.currentMode
-		while True:
-			ret = self.red.send_and_wait('\n',"NORM>|F3>|PRGM>|INST>|LOAD>|#", 1, True, False)
-			if not ret: 
-				self.currentMode = None
-				print('Error Getting ASCII Mode')
-			elif ret.find('NORM>')>=0: self.currentMode = Console.NORM
-			elif ret.find('F3>')>=0: self.currentMode = Console.F3
-			elif ret.find('PRGM>')>=0: self.currentMode = Console.PROGRAM
-			elif ret.find('INST>')>=0: self.currentMode = Console.INSTALL
-			elif ret.find('LOAD>')>=0: self.currentMode = Console.LOAD
-			elif ret.find('BIT>')>=0: self.currentMode = Console.BIT
-			elif ret.find('#')==0 or ret.find('/tmp #')==0 or ret.find('~ #')==0 or "/tmp #" in ret: 
-				# make sure the # prompt is at the beginning of the line before deciding this is CONSOLE
-				self.currentMode = Console.CONSOLE
-			elif ret.find('#')>=0: 
-				# got a spurious '#' character, probably from a debug print... so ignore and retry
-				continue
-			else: 
-				self.currentMode = None
-				raise Exception('Got Invalid ASCII Mode: %s'%ret)
-			break
+		match = self.red.send_and_expect('\n', Console.PROMPTS, 1)
+		if match is None:
+			self.currentMode = None
+			print('Error Getting ASCII Mode')
+		else:
+			self.currentMode = match.key
 		return self.currentMode
 
 class Radio():
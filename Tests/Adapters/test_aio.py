@@ -0,0 +1,60 @@
+import threading
+import unittest
+from Adapters.adapter import FakeAdapter
+from Adapters.aio import AsyncAdapter, AsyncBridge, run_concurrently
+
+
+class BlockingAdapter(FakeAdapter):
+	""" FakeAdapter whose reads wait at a barrier, or for another read to
+	start, and which records whether two reads were ever in progress at once """
+	def __init__(self, name, barrier=None, **kwargs):
+		super(BlockingAdapter, self).__init__(name, **kwargs)
+		self.barrier = barrier
+		self.lock = threading.Lock()
+		self.started = threading.Event()
+		self.overlapped = threading.Event()
+		self.active = 0
+
+	def read(self):
+		with self.lock:
+			self.active += 1
+			first = not self.started.is_set()
+			self.started.set()
+			if self.active > 1:
+				self.overlapped.set()
+		try:
+			if self.barrier is not None:
+				self.barrier.wait()
+			elif first:
+				# Gives a second read the chance to start alongside this one
+				self.overlapped.wait(0.1)
+			return super(BlockingAdapter, self).read()
+		finally:
+			with self.lock:
+				self.active -= 1
+
+
+class TestAsync(unittest.TestCase):
+	def test_values(self):
+		a = AsyncAdapter(FakeAdapter("Fake"))
+		self.assertEqual(run_concurrently(a.values("1,2")), [[1.0, 2.0]])
+
+	def test_concurrent_adapters(self):
+		# Every read waits for the others, so the queries only return if they
+		# are all in flight at once
+		barrier = threading.Barrier(3, timeout=5)
+		adapters = [AsyncAdapter(BlockingAdapter("Slow{}".format(i), barrier)) for i in range(3)]
+		replies = run_concurrently(*[a.ask(str(i)) for i, a in enumerate(adapters)])
+		self.assertEqual(replies, ["0", "1", "2"])
+		self.assertFalse(barrier.broken)
+
+	def test_same_adapter_is_serialized(self):
+		adptr = BlockingAdapter("Slow")
+		a, b = AsyncAdapter(adptr), AsyncBridge(adptr)
+		replies = run_concurrently(a.ask("x"), b.call("ask", "y"))
+		self.assertEqual(replies, ["x", "y"])
+		self.assertFalse(adptr.overlapped.is_set())
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+import numpy as np
+from Adapters.block import BlockReader, block_header
+
+
+def make_block(values, dtype='<f4', definite=True):
+	data = np.asarray(values, dtype=dtype).tobytes()
+	if definite:
+		length = str(len(data)).encode()
+		return b'#' + str(len(length)).encode() + length + data + b'\n'
+	return b'#0' + data + b'\n'
+
+
+class Stream(object):
+	""" Feeds bytes to a readinto function in small chunks, like a socket. """
+	def __init__(self, data, chunk=7):
+		self.data = data
+		self.pos = 0
+		self.chunk = chunk
+
+	def readinto(self, buf):
+		n = min(len(buf), self.chunk, len(self.data) - self.pos)
+		buf[:n] = self.data[self.pos:self.pos + n]
+		self.pos += n
+		return n
+
+
+class TestBlock(unittest.TestCase):
+	def setUp(self):
+		self.reader = BlockReader(size=16)
+		self.values = np.linspace(-1, 1, 8192, dtype=np.float32)
+
+	def test_header(self):
+		self.assertEqual(block_header(b'#41024'), (6, 1024))
+		self.assertEqual(block_header(b'#0abc'), (2, None))
+		self.assertRaises(ValueError, block_header, b'1234')
+
+	def test_parse_definite(self):
+		data = self.reader.parse(make_block(self.values))
+		np.testing.assert_array_equal(data, self.values)
+
+	def test_parse_big_endian(self):
+		data = self.reader.parse(make_block(self.values, '>f4'), is_big_endian=True)
+		np.testing.assert_array_equal(data, self.values)
+
+	def test_parse_indefinite(self):
+		data = self.reader.parse(make_block(self.values, definite=False))
+		np.testing.assert_array_equal(data, self.values)
+
+	def test_parse_header_bytes(self):
+		raw = b'HDR' + self.values.tobytes()
+		np.testing.assert_array_equal(self.reader.parse(raw, header_bytes=3), self.values)
+
+	def test_parse_truncated(self):
+		self.assertRaises(ValueError, self.reader.parse, make_block(self.values)[:100])
+
+	def test_read_stream(self):
+		stream = Stream(make_block(self.values, '<f8'), chunk=1000)
+		data = self.reader.read(stream.readinto, dtype=np.float64)
+		np.testing.assert_array_equal(data, self.values)
+		self.assertEqual(stream.pos, len(stream.data))
+
+	def test_read_stream_indefinite(self):
+		stream = Stream(make_block(self.values, definite=False), chunk=333)
+		data = self.reader.read(stream.readinto, copy=True)
+		np.testing.assert_array_equal(data, self.values)
+
+	def test_read_reuses_buffer(self):
+		block = make_block(self.values)
+		first = self.reader.read(Stream(block, 4096).readinto)
+		second = self.reader.read(Stream(block, 4096).readinto)
+		self.assertTrue(np.shares_memory(first, second))
+
+	def test_read_timeout(self):
+		stream = Stream(make_block(self.values)[:50])
+		self.assertRaises(ValueError, self.reader.read, stream.readinto)
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,116 @@
+import socket
+import socketserver
+import threading
+import unittest
+import numpy as np
+from Adapters.lan import LANAdapter
+
+IDN = "Agilent Technologies,N9020A,MY12345678,A.14.16"
+TRACE = np.linspace(-100, 0, 8192, dtype=np.float32)
+
+
+class SCPIHandler(socketserver.StreamRequestHandler):
+	""" Loopback stand-in for a SCPI-RAW instrument """
+	def handle(self):
+		self.server.connections += 1
+		for line in self.rfile:
+			replies = []
+			for command in line.decode().strip().split(';'):
+				header, _, value = command.lstrip(':').partition(' ')
+				if header == '*IDN?':
+					replies.append(IDN.encode())
+				elif header == 'SLOW?':
+					# Half a reply, then the rest once the client has given up
+					self.wfile.write(b'12')
+					self.wfile.flush()
+					self.server.resume.wait(5)
+					replies.append(b'34')
+				elif header == 'TRAC:DATA?':
+					data = TRACE.astype('>f4').tobytes()
+					length = str(len(data)).encode()
+					replies.append(b'#' + str(len(length)).encode() + length + data)
+				elif header.endswith('?'):
+					replies.append(self.server.settings.get(header[:-1], '0').encode())
+				else:
+					self.server.settings[header] = value
+			if replies:
+				reply = b';'.join(replies) + b'\n'
+				# Send in fragments to exercise reassembly
+				for i in range(0, len(reply), 1000):
+					self.wfile.write(reply[i:i + 1000])
+					self.wfile.flush()
+
+
+class TestLAN(unittest.TestCase):
+	@classmethod
+	def setUpClass(cls):
+		cls.server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), SCPIHandler)
+		cls.server.daemon_threads = True
+		cls.server.connections = 0
+		cls.server.settings = {}
+		cls.server.resume = threading.Event()
+		cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+		cls.thread.start()
+
+	@classmethod
+	def tearDownClass(cls):
+		cls.server.shutdown()
+		cls.server.server_close()
+
+	def setUp(self):
+		host, port = self.server.server_address
+		self.adptr = LANAdapter("TCPIP0::{}::{}::SOCKET".format(host, port), timeout=2)
+
+	def tearDown(self):
+		self.adptr.close()
+
+	def test_ask(self):
+		self.assertEqual(self.adptr.ask("*IDN?"), IDN)
+
+	def test_values(self):
+		self.adptr.write(":SENS:FREQ:CENT 1.5E+09")
+		self.assertEqual(self.adptr.values(":SENS:FREQ:CENT?"), [1.5e9])
+
+	def test_binary_values(self):
+		for i in range(3):
+			data = self.adptr.binary_values(":TRAC:DATA? TRACE1", is_big_endian=True)
+			np.testing.assert_array_equal(data, TRACE)
+		self.assertEqual(self.adptr.ask("*IDN?"), IDN)
+
+	def test_independent_traces(self):
+		first = self.adptr.binary_values(":TRAC:DATA? TRACE1", is_big_endian=True)
+		second = self.adptr.binary_values(":TRAC:DATA? TRACE1", is_big_endian=True)
+		self.assertTrue(first.flags.writeable and second.flags.writeable)
+		second[:] = 0
+		np.testing.assert_array_equal(first, TRACE)
+		# Shared with the receive buffer only when asked for
+		shared = self.adptr.binary_values(":TRAC:DATA? TRACE1", is_big_endian=True, copy=False)
+		self.assertTrue(np.shares_memory(shared, np.frombuffer(self.adptr.blocks._buffer, np.uint8)))
+
+	def test_compound(self):
+		reply = self.adptr.ask(":SENS:FREQ:SPAN 10;:SENS:FREQ:SPAN?;*IDN?")
+		self.assertEqual(reply, "10;" + IDN)
+
+	def test_timeout(self):
+		self.adptr.connection.settimeout(0.1)
+		try:
+			self.assertRaises(socket.timeout, self.adptr.ask, "SLOW?")
+		finally:
+			self.server.resume.set()
+		# The rest of the slow reply is not read as the reply to the next query
+		self.assertEqual(self.adptr.ask("*IDN?"), IDN)
+
+	def test_options(self):
+		host, port = self.server.server_address
+		self.assertRaises(TypeError, LANAdapter, host, port, query_delay=1)
+
+	def test_persistent(self):
+		self.adptr.ask("*IDN?")
+		before = self.server.connections
+		for i in range(20):
+			self.adptr.ask("*IDN?")
+		self.assertEqual(self.server.connections, before)
+
+
+if __name__ == '__main__':
+	unittest.main()
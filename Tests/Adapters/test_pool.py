@@ -0,0 +1,105 @@
+import threading
+import time
+import unittest
+from Adapters.adapter import FakeAdapter
+from Adapters.pool import AdapterPool, resource_key
+
+
+class ClosingAdapter(FakeAdapter):
+	""" FakeAdapter counting how often it is opened and closed """
+	opened = 0
+
+	def __init__(self, name, **kwargs):
+		super(ClosingAdapter, self).__init__(name, **kwargs)
+		ClosingAdapter.opened += 1
+		self.closed = False
+
+	def close(self):
+		self.closed = True
+
+
+class TestPool(unittest.TestCase):
+	def setUp(self):
+		ClosingAdapter.opened = 0
+		self.pool = AdapterPool(ClosingAdapter, idle_timeout=0.1)
+
+	def tearDown(self):
+		self.pool.close_all()
+
+	def test_key(self):
+		self.assertEqual(resource_key(13), "GPIB0::13::INSTR")
+		self.assertEqual(resource_key(" gpib0::13::instr"), "GPIB0::13::INSTR")
+
+	def test_shared(self):
+		a = self.pool.acquire("GPIB0::13::INSTR")
+		b = self.pool.acquire(13)
+		self.assertIsNot(a, b)
+		self.assertEqual(ClosingAdapter.opened, 1)
+		self.assertEqual(self.pool.references(13), 2)
+		a.write("5")
+		self.assertEqual(b.read(), "5")
+		a.close()
+		a.close()
+		self.assertEqual(self.pool.references(13), 1)
+		self.assertFalse(b.closed)
+		self.assertEqual(b.ask("10"), "10")
+		b.close()
+
+	def test_options(self):
+		a = self.pool.acquire("GPIB0::7::INSTR", timeout=5000)
+		self.assertRaises(ValueError, self.pool.acquire, 7, timeout=2000)
+		self.assertEqual(self.pool.references(7), 1)
+		# The same options, or none, share the connection
+		self.pool.acquire(7, timeout=5000).close()
+		self.pool.acquire(7).close()
+		a.close()
+
+	def test_idle_timeout(self):
+		a = self.pool.acquire("GPIB0::6::INSTR")
+		adapter = a._adapter
+		a.close()
+		# Reacquiring within the timeout reuses the connection
+		b = self.pool.acquire("GPIB0::6::INSTR")
+		self.assertIs(b._adapter, adapter)
+		b.close()
+		time.sleep(0.3)
+		self.assertTrue(adapter.closed)
+		self.assertNotIn("GPIB0::6::INSTR", self.pool)
+		self.pool.acquire("GPIB0::6::INSTR").close()
+		self.assertEqual(ClosingAdapter.opened, 2)
+
+	def test_collected(self):
+		a = self.pool.acquire("GPIB0::8::INSTR")
+		adapter = a._adapter
+		del a
+		# The connection is closed at once rather than by an idle timer thread
+		self.assertTrue(adapter.closed)
+		self.assertNotIn("GPIB0::8::INSTR", self.pool)
+
+	def test_wrappers(self):
+		a = self.pool.acquire("GPIB0::9::INSTR")
+		self.assertIs(a.read_raw, a.read_raw)
+		a.close()
+		with self.assertRaises(AttributeError):
+			a.ask("1")
+		with self.assertRaises(AttributeError):
+			a.read_raw
+
+	def test_threads(self):
+		handles = []
+		def worker():
+			h = self.pool.acquire("GPIB0::7::INSTR")
+			handles.append(h)
+			for i in range(50):
+				self.assertEqual(h.ask(str(i)), str(i))
+		threads = [threading.Thread(target=worker) for i in range(4)]
+		for t in threads:
+			t.start()
+		for t in threads:
+			t.join()
+		self.assertEqual(ClosingAdapter.opened, 1)
+		self.assertEqual(self.pool.references("GPIB0::7::INSTR"), 4)
+
+
+if __name__ == '__main__':
+	unittest.main()
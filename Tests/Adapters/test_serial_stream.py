@@ -0,0 +1,89 @@
+import os
+import threading
+import time
+import unittest
+import numpy as np
+import serial
+from Adapters.serial import SerialAdapter
+
+
+class TestSerialStream(unittest.TestCase):
+	""" Talks to the adapter through a pseudo terminal pair """
+	def setUp(self):
+		self.master, slave = os.openpty()
+		self.port = serial.Serial(os.ttyname(slave), timeout=2)
+		os.close(slave)
+		self.adptr = SerialAdapter(self.port, write_termination='\n', buffer_size=64)
+
+	def tearDown(self):
+		self.port.close()
+		os.close(self.master)
+
+	def reply(self, *chunks, delay=0.01):
+		""" Sends chunks from the instrument side after the command arrives """
+		def send():
+			os.read(self.master, 1024)
+			for chunk in chunks:
+				time.sleep(delay)
+				os.write(self.master, chunk)
+		thread = threading.Thread(target=send)
+		thread.start()
+		return thread
+
+	def test_terminator(self):
+		thread = self.reply(b"FIREBERD ", b"6000A\n")
+		start = time.time()
+		self.assertEqual(self.adptr.ask("*IDN?"), "FIREBERD 6000A")
+		self.assertLess(time.time() - start, 1)  # Well below the port timeout
+		thread.join()
+
+	def test_leftover(self):
+		thread = self.reply(b"ON\nOFF\nPART")
+		self.assertEqual(self.adptr.ask("CONFIG:RTS?"), "ON")
+		thread.join()
+		self.assertEqual(self.adptr.readline(), "OFF")
+		self.port.timeout = 0.1
+		self.assertEqual(self.adptr.readline(), "PART")
+
+	def test_read(self):
+		thread = self.reply(b"ON\nOFF\n", b"PA", b"RT\n")
+		self.assertEqual(self.adptr.ask("CONFIG:RTS?"), "ON")
+		thread.join()
+		self.port.timeout = 0.1
+		# Every line until the port times out, as readlines() joined them
+		self.assertEqual(self.adptr.read(), "OFF\n\nPART\n")
+
+	def test_overflow(self):
+		thread = self.reply(b"X" * 100 + b"\nOK\n")
+		self.assertRaises(ValueError, self.adptr.ask, "DUMP")
+		thread.join()
+		self.assertEqual(self.adptr.readline(), "OK")
+
+	def test_lines(self):
+		thread = self.reply(*[b"line %d\n" % i for i in range(40)], delay=0)
+		self.adptr.write("DUMP")
+		thread.join()
+		self.port.timeout = 0.1
+		self.assertEqual(list(self.adptr.lines()), ["line %d" % i for i in range(40)])
+
+	def test_binary(self):
+		data = np.arange(100, dtype=np.float32)
+		block = b"#3400" + data.tobytes() + b"\n"
+		thread = self.reply(b"OK\n" + block[:50], block[50:])
+		self.assertEqual(self.adptr.ask("FORM REAL"), "OK")
+		np.testing.assert_array_equal(self.adptr.binary_values("DATA?"), data)
+		thread.join()
+
+	def test_independent_binary(self):
+		data = np.arange(100, dtype=np.float32)
+		block = b"#3400" + data.tobytes() + b"\n"
+		thread = self.reply(block, block)
+		first = self.adptr.binary_values("DATA?")
+		second = self.adptr.binary_values("DATA?")
+		thread.join()
+		second += 1
+		np.testing.assert_array_equal(first, data)
+
+
+if __name__ == '__main__':
+	unittest.main()
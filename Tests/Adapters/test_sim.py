@@ -0,0 +1,92 @@
+import unittest
+import numpy as np
+from Adapters.sim import MODELS, SimulatedAdapter, SimulatedBench, SimulatedError, short_header
+from Adapters.pool import AdapterPool
+from Instruments.instrument import splitResourceID
+from Instruments.netan import NetAnalyzer
+from Instruments.powmeter import PowerMeter
+from Instruments.specan import SpecAnalyzer
+
+
+class TestSimulated(unittest.TestCase):
+	def test_short_header(self):
+		self.assertEqual(short_header(":FORMat:TRACe:DATA?"), "FORM:TRAC:DATA?")
+		self.assertEqual(short_header("TRACE:DATA?"), "TRAC:DATA?")
+		self.assertEqual(short_header("SENS1:FREQUENCY:CENTER"), "SENS:FREQ:CENT")
+		self.assertEqual(short_header("sens2:pow"), "SENS2:POW")
+		self.assertEqual(short_header("*IDN?"), "*IDN?")
+
+	def test_state(self):
+		a = SimulatedAdapter()
+		a.write(":SENS:FREQ:CENT 1E9")
+		self.assertEqual(a.values(":SENSe:FREQuency:CENTer?"), [1e9])
+		self.assertEqual(a.ask("*RST;*OPC?"), "1")
+		self.assertEqual(a.ask("FREQ:CENT?"), "0")
+
+	def test_compound(self):
+		a = SimulatedAdapter('E4419B', seed=1)
+		reply = a.ask(":SENS2:FREQ 5E+07;:SENS2:FREQ?;*IDN?")
+		freq, idn = reply.split(';', 1)
+		self.assertEqual(float(freq), 5e7)
+		self.assertEqual(splitResourceID(idn)[1], "E4419B")
+
+	def test_strict(self):
+		a = SimulatedAdapter(strict=True)
+		self.assertRaises(SimulatedError, a.ask, "BOGUS?")
+		self.assertTrue(a.ask("SYST:ERR?").startswith("-113"))
+		self.assertTrue(a.ask("SYST:ERR?").startswith("+0"))
+
+	def test_timing(self):
+		waits = []
+		a = SimulatedAdapter(latency=0.001, bandwidth=1000, sleep=waits.append)
+		a.ask("*IDN?")
+		self.assertEqual(a.transactions, 2)
+		self.assertAlmostEqual(sum(waits), 0.002 + (len("*IDN?") + len("0\n")) / 1000.0)
+		self.assertAlmostEqual(a.busy, sum(waits))
+
+	def test_errors(self):
+		a = SimulatedAdapter(error_rate=0.5, seed=3)
+		errors = 0
+		for i in range(100):
+			try:
+				a.write("*CLS")
+			except SimulatedError:
+				errors += 1
+		self.assertTrue(20 < errors < 80)
+
+	def test_instruments(self):
+		for model in MODELS:
+			a = SimulatedAdapter(model)
+			self.assertEqual(splitResourceID(a.ask("*IDN?"))[1], model)
+
+		sa = SpecAnalyzer(splitResourceID(MODELS['N9020A']['*IDN?']), SimulatedAdapter('N9020A', seed=1))
+		trace = sa.trace()
+		self.assertEqual(trace.shape, (1001,))
+		self.assertLess(abs(np.argmax(trace) - 500), 10)
+		# Each trace is an array of its own, which the caller may change
+		second = sa.trace()
+		self.assertTrue(trace.flags.writeable and second.flags.writeable)
+		before = second.copy()
+		trace[:] = 0
+		np.testing.assert_array_equal(second, before)
+		sa.set_frequency_center_span(2e9, 1e6)
+		self.assertEqual(sa.peak_search()[0], 2e9)
+
+		na = NetAnalyzer(splitResourceID(MODELS['E5071C']['*IDN?']), SimulatedAdapter('E5071C'))
+		self.assertEqual(na.get_trace().shape, (201, 2))
+
+		pm = PowerMeter(splitResourceID(MODELS['E4418B']['*IDN?']), SimulatedAdapter('E4418B', seed=1))
+		self.assertAlmostEqual(pm.ch1.power(), -10.0, delta=0.1)
+
+	def test_bench(self):
+		bench = SimulatedBench({"GPIB0::13::INSTR": "E4418B", "GPIB0::18::INSTR": "N9020A"})
+		self.assertEqual(len(bench.list_resources()), 2)
+		pool = AdapterPool(bench.open, idle_timeout=None)
+		pm = pool.acquire("GPIB0::13::INSTR")
+		self.assertIn("E4418B", pm.ask("*IDN?"))
+		self.assertRaises(SimulatedError, pool.acquire, "GPIB0::1::INSTR")
+		pool.close_all()
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,62 @@
+import json
+import unittest
+from Adapters.pool import AdapterPool
+from Adapters.sim import SimulatedAdapter, SimulatedBench, SimulatedError
+from Adapters.stats import BUCKETS, InstrumentedAdapter, command_key
+
+
+class TestStats(unittest.TestCase):
+	def setUp(self):
+		self.sim = SimulatedAdapter('E4418B', seed=1)
+		self.adptr = InstrumentedAdapter(self.sim, slowest=3)
+
+	def test_key(self):
+		self.assertEqual(command_key(":SENSe1:FREQuency 1E9"), "SENS:FREQ")
+		self.assertEqual(command_key("*CLS;:FETC?"), "*CLS;FETC?")
+		self.assertEqual(command_key(None), "<read>")
+
+	def test_counters(self):
+		for i in range(10):
+			self.adptr.values("FETC?")
+		self.adptr.write("SENS:FREQ 50E6")
+		self.assertEqual(self.adptr.ask("SENS:FREQ?"), "50E6")
+		snap = self.adptr.snapshot()
+		fetch = snap['commands']['FETC?']
+		self.assertEqual(fetch['calls'], 10)
+		self.assertEqual(sum(fetch['histogram'].values()), 10)
+		self.assertEqual(fetch['bytes_out'], 50)
+		self.assertEqual(snap['commands']['SENS:FREQ?']['bytes_in'], 4)
+		self.assertEqual(snap['calls'], 12)
+		self.assertEqual(len(snap['slowest']), 3)
+		self.assertEqual(self.adptr.top(1, by='calls')[0][0], "FETC?")
+		json.loads(self.adptr.to_json())
+
+	def test_histogram(self):
+		self.sim.latency = 0.002
+		self.adptr.ask("*IDN?")
+		stats = self.adptr.snapshot()['commands']['*IDN?']
+		# Two transactions of 2 ms, so nothing faster than the 2.5 ms bucket
+		self.assertEqual(sum(stats['histogram'][str(b)] for b in BUCKETS[:5]), 0)
+		self.assertGreaterEqual(stats['min'], 0.004)
+
+	def test_errors(self):
+		self.sim.error_rate = 1.0
+		self.assertRaises(SimulatedError, self.adptr.write, "*RST")
+		self.sim.error_rate = 0.0
+		self.assertRaises(SimulatedError, self.adptr.read)
+		self.adptr.write("*RST")
+		stats = self.adptr.snapshot()['commands']
+		self.assertEqual(stats['*RST']['errors'], 1)
+		self.assertEqual(stats['*RST']['retries'], 1)
+		self.assertEqual(stats['<read>']['timeouts'], 1)
+
+	def test_pool(self):
+		bench = SimulatedBench({"GPIB0::13::INSTR": "E4418B"})
+		pool = AdapterPool(bench.open, idle_timeout=None, instrumented=True)
+		pool.acquire(13).ask("*IDN?")
+		self.assertEqual(pool.stats()["GPIB0::13::INSTR"]['commands']['*IDN?']['calls'], 1)
+		pool.close_all()
+
+
+if __name__ == '__main__':
+	unittest.main()
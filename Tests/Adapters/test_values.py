@@ -0,0 +1,33 @@
+import unittest
+import numpy as np
+from Adapters.adapter import FakeAdapter, parse_values
+
+
+class TestValues(unittest.TestCase):
+	def setUp(self):
+		self.adptr = FakeAdapter("Fake")
+
+	def test_list(self):
+		self.assertEqual(self.adptr.values("1,2.5,-3E+01"), [1.0, 2.5, -30.0])
+
+	def test_array(self):
+		trace = np.linspace(-90, 0, 8192)
+		reply = ",".join("%+.9E" % v for v in trace)
+		data = self.adptr.values(reply, container=np.ndarray)
+		self.assertIsInstance(data, np.ndarray)
+		np.testing.assert_allclose(data, trace)
+
+	def test_cast(self):
+		self.assertEqual(self.adptr.values("+5,6", cast=int), [5, 6])
+		self.assertEqual(self.adptr.values("1,0,+1.0E+00", cast=bool), [True, False, True])
+		self.assertEqual(parse_values("1;2", separator=";", cast=np.float32,
+			container=np.ndarray).dtype, np.float32)
+
+	def test_fallback(self):
+		self.assertEqual(self.adptr.values("1.5,ON,2"), [1.5, "ON", 2.0])
+		self.assertEqual(self.adptr.values("5.0", cast=int), ["5.0"])
+		self.assertEqual(parse_values(""), [""])
+
+
+if __name__ == '__main__':
+	unittest.main()
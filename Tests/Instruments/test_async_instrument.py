@@ -0,0 +1,58 @@
+import asyncio
+import threading
+import unittest
+from Adapters.aio import run_concurrently
+from Adapters.pool import AdapterPool
+from Adapters.sim import MODELS, SimulatedAdapter
+from Instruments.aio import AsyncInstrument
+from Instruments.dmm import DMM
+from Instruments.instrument import splitResourceID
+from Instruments.powmeter import PowerMeter
+
+
+def meter(adptr):
+	return PowerMeter(splitResourceID(MODELS['E4419B']['*IDN?']), adptr)
+
+
+class TestAsyncInstrument(unittest.TestCase):
+	def test_properties(self):
+		pm = meter(SimulatedAdapter('E4419B', seed=1))
+		ch1 = AsyncInstrument(pm.ch1)
+		async def configure():
+			await ch1.set('frequency', 3e8)
+			return await ch1.get('frequency'), await ch1.get('fetch_power')
+		frequency, power = asyncio.run(configure())
+		self.assertEqual(frequency, 3e8)
+		self.assertAlmostEqual(power, -10.0, delta=0.1)
+		# The channel runs in the worker of its parent's connection
+		self.assertIs(ch1._key, AsyncInstrument(pm)._key)
+
+	def test_run_concurrently(self):
+		# Every bus transaction waits for one on the other instrument, so the
+		# reads only return if both are in flight at once
+		barrier = threading.Barrier(2, timeout=5)
+		sleep = lambda delay: barrier.wait()
+		pm = AsyncInstrument(meter(SimulatedAdapter('E4419B', latency=0.001, sleep=sleep, seed=1)))
+		dmm = AsyncInstrument(DMM(splitResourceID(MODELS['34410A']['*IDN?']),
+			SimulatedAdapter('34410A', latency=0.001, sleep=sleep, seed=1)))
+		power, volts = run_concurrently(pm.value("FETC?"), dmm.value("READ?"))
+		self.assertAlmostEqual(power, -10.0, delta=0.1)
+		self.assertAlmostEqual(volts, 1.0, delta=0.01)
+		self.assertFalse(barrier.broken)
+
+	def test_pooled_connection(self):
+		pool = AdapterPool(lambda address: SimulatedAdapter('E4419B'), idle_timeout=None)
+		try:
+			a = AsyncInstrument(meter(pool.acquire("GPIB0::13::INSTR")))
+			b = AsyncInstrument(meter(pool.acquire("GPIB0::13::INSTR")))
+			# Two handles, one connection and one worker
+			self.assertIsNot(a.obj._adapter, b.obj._adapter)
+			self.assertIs(a._key, b._key)
+			threads = run_concurrently(a.call(threading.current_thread), b.call(threading.current_thread))
+			self.assertIs(threads[0], threads[1])
+		finally:
+			pool.close_all()
+
+
+if __name__ == '__main__':
+	unittest.main()
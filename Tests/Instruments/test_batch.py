@@ -0,0 +1,85 @@
+import unittest
+from Adapters.adapter import FakeAdapter
+from Adapters.sim import MODELS, SimulatedAdapter
+from Instruments.instrument import HPIBInstrument, Instrument, compound, splitResourceID
+
+
+class TestCompound(unittest.TestCase):
+	def test_scpi(self):
+		self.assertEqual(compound(["SENS1:FREQ 1E9", "INIT", "*OPC", ":CALC:MARK1:X?"]),
+			":SENS1:FREQ 1E9;:INIT;*OPC;:CALC:MARK1:X?")
+		self.assertEqual(compound(["INIT1", "FETC1?;"]), "INIT1;FETC1?")
+
+	def test_not_scpi(self):
+		self.assertEqual(compound(["AU", "T0", "1.1"]), "AU;T0;1.1")
+		self.assertEqual(compound(["*CLS", "D1", "M1"]), "*CLS;D1;M1")
+
+
+class TestTransaction(unittest.TestCase):
+	def setUp(self):
+		self.adptr = SimulatedAdapter('N9020A', responses={'PAIR?': 'A;B'})
+		self.sa = Instrument(splitResourceID(MODELS['N9020A']['*IDN?']), self.adptr)
+		self.adptr.transactions = 0
+
+	def test_replies(self):
+		with self.sa.batch() as b:
+			b.write("SENS:FREQ:CENT 2E9")
+			x = b.values("CALC:MARK:X?")
+			idn = b.ask("*IDN?")
+			points = b.values("SWE:POIN?", cast=int)
+			self.assertFalse(idn.done)
+		self.assertEqual(x.value, [2e9])
+		self.assertEqual(idn.value, MODELS['N9020A']['*IDN?'])
+		self.assertEqual(points.value, [1001])
+		# One message written and one reply read
+		self.assertEqual(self.adptr.transactions, 2)
+
+	def test_value_before_execute(self):
+		with self.sa.batch() as b:
+			idn = b.ask("*IDN?")
+			self.assertRaises(LookupError, getattr, idn, 'value')
+		self.assertTrue(idn.done)
+
+	def test_reply_count(self):
+		with self.assertRaises(ValueError):
+			with self.sa.batch() as b:
+				b.ask("PAIR?")
+				b.ask("*IDN?")
+
+	def test_nested(self):
+		with self.sa.batch() as outer:
+			outer.write("SENS:FREQ:CENT 3E9")
+			with self.sa.batch() as inner:
+				self.assertIs(inner, outer)
+				x = inner.values("CALC:MARK:X?")
+			# Sent when the outer block ends
+			self.assertFalse(x.done)
+			self.assertEqual(self.adptr.transactions, 0)
+		self.assertEqual(x.value, [3e9])
+		self.assertEqual(self.adptr.transactions, 2)
+
+	def test_sequential(self):
+		self.adptr.compound = False
+		with self.sa.batch() as b:
+			b.write("SENS:FREQ:CENT 2E9")
+			x = b.values("CALC:MARK:X?")
+			idn = b.ask("*IDN?")
+		self.assertEqual(x.value, [2e9])
+		self.assertEqual(idn.value, MODELS['N9020A']['*IDN?'])
+		# A write, then a write and a read per query
+		self.assertEqual(self.adptr.transactions, 5)
+
+	def test_hpib(self):
+		written = []
+		adptr = FakeAdapter("HP8901A")
+		adptr.write = written.append
+		hp = HPIBInstrument("HP8901A", adptr)
+		with hp.batch():
+			hp.write("FR 100 MZ")
+			self.assertEqual(written, [])
+		# Not compounded, so each command goes out on its own, setup first
+		self.assertEqual(written, ["CL", "AU", "T0", "FR 100 MZ"])
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -5,7 +5,8 @@ Created on Tue May 12 17:36:17 2020
 @author: asasson
 """
 
-from Adapters.visa import VISAAdapter
+from Adapters.pool import acquire
+from Adapters.visa import resource_manager
 from Instruments.audiomod import AudioAnalyzer, ModulationAnalyzer
 from Instruments.dmm import DMM
 from Instruments.fireberd import FireBERD
@@ -21,7 +22,6 @@ from Instruments.scope import Oscilloscope
 from Instruments.specan import SpecAnalyzer
 from Radio.radio import Console, Channel, Radio
 from Utilities import devmngr, win
-import visa
 
 res = {}
 def regInstr(addr, mm, adptr, instr):
@@ -42,31 +42,27 @@ addr_list = [addr_aud,
 			 ]
 
 res = {}
-rm = visa.ResourceManager()
-print(rm.list_resources())
+print(resource_manager().list_resources())
 print(win.listSerialPorts())
 
 for addr in addr_list:
 		
 	if(addr is not None):
 		try:
-			r = rm.open_resource(addr)
+			adptr = acquire(addr)
 			if(addr is addr_aud):
 				pass
-				adptr = VISAAdapter("TestAdapter", r)
 				instr =  AudioAnalyzer("AudioAn", adptr)
 				res[addr] = [["HP", "8903A"], adptr, instr]
 			if(addr is addr_modan):
-				adptr = VISAAdapter("TestAdapter", r)
 				instr =  ModulationAnalyzer("ModAn", adptr)
 				res[addr] = [["HP", "8901A"], adptr, instr]
 			else:
-				mm = splitResourceID(r.query('*idn?')[:-1])
+				mm = splitResourceID(adptr.ask('*idn?')[:-1])
 				print(mm)
 				for cl in instruments:
 					sup = cl.checkSupport(mm[1])
 					if(sup):
-						adptr = VISAAdapter("TestAdapter", r)
 						instr =  cl(mm, adptr)
 						res[addr] = [mm, adptr, instr]
 		except:
@@ -0,0 +1,80 @@
+import time
+import unittest
+from Adapters.sim import MODELS, SimulatedAdapter
+from Instruments.instrument import splitResourceID
+from Instruments.specan import SpecAnalyzer
+
+
+class TestSettingsCache(unittest.TestCase):
+	def setUp(self):
+		self.adptr = SimulatedAdapter('N9020A')
+		self.sa = SpecAnalyzer(splitResourceID(MODELS['N9020A']['*IDN?']), self.adptr)
+		self.cache = self.sa.enable_cache()
+
+	def test_write_through(self):
+		self.sa.start_frequency = 1e6
+		self.sa.stop_frequency = 3e9
+		self.assertEqual(self.adptr.state['SENS:FREQ:STAR'], '1.000000e+06')
+		count = self.adptr.transactions
+		self.assertEqual(self.sa.start_frequency, 1e6)
+		self.assertEqual(self.sa.stop_frequency, 3e9)
+		self.assertEqual(self.adptr.transactions, count)
+		self.assertEqual(self.cache.hits, 2)
+
+	def test_read_once(self):
+		self.assertEqual(self.sa.center_frequency, 1e9)
+		count = self.adptr.transactions
+		self.assertEqual(self.sa.center_frequency, 1e9)
+		self.assertEqual(self.adptr.transactions, count)
+
+	def test_invalidate(self):
+		self.sa.center_frequency = 2e9
+		self.sa.reset()
+		self.assertEqual(len(self.cache), 0)
+		self.assertEqual(self.sa.center_frequency, 1e9)
+		self.sa.center_frequency = 2e9
+		self.sa.recall(1)
+		self.assertEqual(len(self.cache), 0)
+		self.sa.center_frequency = 2e9
+		self.sa.invalidate_cache(":SENS:FREQ:CENT?;")
+		self.assertEqual(len(self.cache), 0)
+
+	def test_aborted_batch(self):
+		self.sa.center_frequency = 2e9
+		with self.assertRaises(RuntimeError):
+			with self.sa.batch():
+				self.sa.center_frequency = 3e9
+				raise RuntimeError("aborted")
+		# The write was never sent, so the cache keeps the value of the instrument
+		self.assertEqual(self.adptr.state['SENS:FREQ:CENT'], '2.000000e+09')
+		self.assertEqual(self.sa.center_frequency, 2e9)
+		with self.sa.batch():
+			self.sa.center_frequency = 3e9
+		self.assertEqual(self.sa.center_frequency, 3e9)
+
+	def test_reset_in_batch(self):
+		with self.sa.batch():
+			self.sa.center_frequency = 2e9
+			self.sa.reset()
+		self.assertEqual(len(self.cache), 0)
+
+	def test_verify(self):
+		drift = []
+		self.sa.enable_cache(verify=0.01, on_drift=lambda *args: drift.append(args))
+		self.sa.center_frequency = 2e9
+		self.adptr.write(":SENS:FREQ:CENT 3E9")  # Changed behind our back
+		self.assertEqual(self.sa.center_frequency, 2e9)
+		time.sleep(0.02)
+		self.assertEqual(self.sa.center_frequency, 3e9)
+		self.assertEqual(drift, [((None, ":SENS:FREQ:CENT?;"), 2e9, 3e9)])
+
+	def test_disabled(self):
+		self.sa.disable_cache()
+		self.sa.center_frequency = 2e9
+		count = self.adptr.transactions
+		self.assertEqual(self.sa.center_frequency, 2e9)
+		self.assertEqual(self.adptr.transactions, count + 2)
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+from Adapters.sim import MODELS, SimulatedAdapter
+from Instruments.freqcount import FreqCounter
+from Instruments.instrument import Channel, splitResourceID
+from Instruments.powmeter import PMChannel, PowerMeter
+from Instruments.properties import ChannelControl
+
+
+class TestChannelProperties(unittest.TestCase):
+	def setUp(self):
+		self.adptr = SimulatedAdapter('E4419B')
+		self.pm = PowerMeter(splitResourceID(MODELS['E4419B']['*IDN?']), self.adptr)
+		self.sent = []
+		execute = self.adptr.execute
+		def record(command):
+			self.sent.append(command.lstrip(":"))
+			return execute(command)
+		self.adptr.execute = record
+
+	def test_descriptor(self):
+		self.assertIsInstance(PMChannel.frequency, ChannelControl)
+		self.assertEqual(PMChannel.frequency.name, 'frequency')
+
+	def test_templates(self):
+		self.pm.ch1.frequency = 3e8
+		self.pm.ch2.gain = 3
+		self.assertEqual(self.sent, ["SENS1:FREQ 300000000.0", "CALC2:GAIN 3"])
+		self.sent.clear()
+		self.pm.ch2.power()
+		self.assertEqual(self.sent, ["FETC2?"])
+
+	def test_read_channels(self):
+		count = self.adptr.transactions
+		powers = self.pm.read_channels('fetch_power')
+		self.assertEqual(self.adptr.transactions, count + 2)
+		self.assertEqual(self.sent, ["FETC1?", "FETC2?"])
+		self.assertEqual(len(powers), 2)
+		self.assertAlmostEqual(powers[0], -10.0, delta=1)
+		self.assertAlmostEqual(powers[1], -20.0, delta=1)
+		self.assertRaises(LookupError, self.pm.read_channels, 'bogus')
+
+	def test_cache_scope(self):
+		self.pm.enable_cache()
+		self.pm.ch1.gain = 3
+		self.pm.ch2.gain = 5
+		count = self.adptr.transactions
+		self.assertEqual(self.pm.ch1.gain, 3)
+		self.assertEqual(self.pm.ch2.gain, 5)
+		self.assertEqual(self.pm.read_channels('gain'), [3, 5])
+		self.assertEqual(self.adptr.transactions, count)
+
+	def test_parent_batch(self):
+		count = self.adptr.transactions
+		with self.pm.batch():
+			self.pm.ch1.gain = 1
+			self.pm.ch2.gain = 2
+		self.assertEqual(self.adptr.transactions, count + 1)
+		self.assertEqual(self.adptr.state['CALC:GAIN'], '1')
+		self.assertEqual(self.adptr.state['CALC2:GAIN'], '2')
+
+	def test_setting(self):
+		class Sensor(Channel):
+			zero = Channel.setting("CAL{ch}:ZERO:AUTO {}", """ Zeroes the sensor """)
+		self.assertRaises(LookupError, Sensor.zero.read_all, [self.pm.ch1])
+		self.assertEqual(Sensor.zero.format(self.pm.ch2, 'ONCE'), "CAL2:ZERO:AUTO ONCE")
+
+	def test_normalized_cache(self):
+		adptr = SimulatedAdapter('53131A')
+		counter = FreqCounter(splitResourceID(MODELS['53131A']['*IDN?']), adptr)
+		counter.enable_cache()
+		counter.ch1.imp("1E6")
+		self.assertEqual(adptr.state['INP:IMP'], '1e+06')
+		self.assertEqual(counter.ch1.imp(), 1e6)
+		counter.invalidate_cache()
+		self.assertEqual(counter.ch1.imp(), 1e6)
+		self.assertRaises(ValueError, setattr, counter.ch1, 'impedance', 75)
+
+
+if __name__ == '__main__':
+	unittest.main()
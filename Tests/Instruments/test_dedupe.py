@@ -0,0 +1,110 @@
+import unittest
+from Adapters.sim import MODELS, SimulatedAdapter
+from Adapters.adapter import FakeAdapter
+from Instruments.instrument import HPIBInstrument, splitResourceID
+from Instruments.powmeter import PowerMeter
+
+
+class TestDedupe(unittest.TestCase):
+	def setUp(self):
+		self.adptr = SimulatedAdapter('E4419B')
+		self.pm = PowerMeter(splitResourceID(MODELS['E4419B']['*IDN?']), self.adptr)
+		self.pm.enable_dedupe()
+		self.adptr.transactions = 0
+
+	def test_skip(self):
+		for i in range(5):
+			self.pm.ch1.freq(300000000)
+			self.pm.ch2.freq(300000000)
+		self.assertEqual(self.adptr.transactions, 2)
+		self.pm.ch1.freq(400000000)
+		self.assertEqual(self.adptr.transactions, 3)
+		self.assertEqual(self.pm.ch1.freq(), 4e8)
+
+	def test_headers(self):
+		self.pm.write(":SENSe1:FREQuency 1E9")
+		self.pm.write("SENS:FREQ 1E9")
+		self.assertEqual(self.adptr.transactions, 1)
+
+	def test_actions(self):
+		for i in range(3):
+			self.pm.write("INIT1")
+			self.pm.write("*ESE 1")
+		self.assertEqual(self.adptr.transactions, 6)
+
+	def test_compound(self):
+		self.pm.write("CALC1:GAIN 3;:CALC1:GAIN:STAT 1")
+		self.pm.write("CALC1:GAIN 3;:CALC1:GAIN:STAT 0")
+		self.assertEqual(self.adptr.state['CALC:GAIN:STAT'], '0')
+		self.assertEqual(self.adptr.bytes_written, len("CALC1:GAIN 3;:CALC1:GAIN:STAT 1") + len(":CALC1:GAIN:STAT 0"))
+
+	def test_quoted(self):
+		written = self._record()
+		self.pm.write('DISP:TEXT "A;B"')
+		self.pm.write('DISP:TEXT "A;C"')
+		self.pm.write('DISP:TEXT "A;C"')
+		self.assertEqual(written, ['DISP:TEXT "A;B"', 'DISP:TEXT "A;C"'])
+
+	def test_queries(self):
+		written = self._record()
+		for i in range(2):
+			self.pm.write("MEAS:VOLT:DC? 10,0.001")
+			self.assertEqual(float(self.pm.read()), 0.0)
+		self.assertEqual(written, ["MEAS:VOLT:DC? 10,0.001"] * 2)
+
+	def test_relative_headers(self):
+		written = self._record()
+		self.pm.write("SENS1:FREQ 1E9;AVER:COUN 4")
+		# AVER:COUN is SENS:AVER:COUN, not the root AVER:COUN
+		self.pm.write("AVER:COUN 4")
+		self.pm.write("SENS1:FREQ 1E9;AVER:COUN 8")
+		self.assertEqual(written, ["SENS1:FREQ 1E9;AVER:COUN 4", "AVER:COUN 4", ":SENS1:AVER:COUN 8"])
+		self.assertEqual(self.pm._sent['SENS:AVER:COUN'], '8')
+
+	def _record(self):
+		""" Returns the list of the messages written to the adapter """
+		written = []
+		write = self.adptr.write
+		def record(command):
+			written.append(command)
+			write(command)
+		self.adptr.write = record
+		return written
+
+	def test_hpib_reset(self):
+		written = []
+		adptr = FakeAdapter("HP8901A")
+		adptr.write = written.append
+		hp = HPIBInstrument("HP8901A", adptr)
+		hp.enable_dedupe()
+		hp.write("FR 100 MZ")
+		hp.write("FR 100 MZ")
+		hp.reset()
+		hp.write("FR 100 MZ")
+		self.assertEqual(written.count("FR 100 MZ"), 2)
+
+	def test_aborted_batch(self):
+		with self.assertRaises(RuntimeError):
+			with self.pm.batch():
+				self.pm.write("SENS1:FREQ 1E9")
+				raise RuntimeError("aborted")
+		self.assertEqual(self.adptr.transactions, 0)
+		# The retry is sent, since the aborted write never was
+		self.pm.write("SENS1:FREQ 1E9")
+		self.assertEqual(self.adptr.transactions, 1)
+		self.assertEqual(self.adptr.state['SENS:FREQ'], '1E9')
+
+	def test_force_and_reset(self):
+		self.pm.command_value("SENS1:FREQ", 1e9)
+		self.pm.command_value("SENS1:FREQ", 1e9, force=True)
+		self.assertEqual(self.adptr.transactions, 2)
+		self.pm.reset()
+		self.pm.command_value("SENS1:FREQ", 1e9)
+		self.assertEqual(self.adptr.transactions, 4)
+		self.pm.recall(1)
+		self.pm.command_value("SENS1:FREQ", 1e9)
+		self.assertEqual(self.adptr.transactions, 6)
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+from Adapters.sim import SimulatedAdapter
+from Instruments.errors import SCPIError, parse_errors, split_replies
+from Instruments.instrument import Instrument
+
+
+class Source(Instrument):
+	power = Instrument.control(":POW?", ":POW %g", """ Output power (dBm) """, check_set_errors=True)
+	level = Instrument.measurement(":LEV?", """ Level """, check_get_errors=True)
+
+
+class AllSource(Source):
+	errors_all = True
+
+
+class TestErrors(unittest.TestCase):
+	def setUp(self):
+		self.adptr = SimulatedAdapter(responses={':LEV?': '3'})
+		self.src = Source("Test,Source,1,1", self.adptr)
+
+	def queue(self, *errors):
+		self.adptr.errors.extend(errors)
+
+	def test_parse(self):
+		self.assertEqual(parse_errors('-113,"Undefined header;POWR"'), [SCPIError(-113, 'Undefined header;POWR')])
+		self.assertEqual(parse_errors('+0,"No error"'), [SCPIError(0, 'No error')])
+		self.assertEqual(parse_errors('-222,"Data out of range",-350,"Queue ""overflow"""'),
+			[SCPIError(-222, 'Data out of range'), SCPIError(-350, 'Queue "overflow"')])
+		self.assertIsNone(parse_errors('1.5E+00'))
+		self.assertEqual(str(SCPIError(-222, 'Data out of range')), '-222,"Data out of range"')
+		self.assertEqual(split_replies('1;-113,"Undefined header;X";+0,"No error"'),
+			['1', '-113,"Undefined header;X"', '+0,"No error"'])
+
+	def test_check_errors(self):
+		self.assertEqual(self.src.check_errors(), [])
+		self.queue('-222,"Data out of range"', '-113,"Undefined header;FOO"')
+		count = self.adptr.transactions
+		errors = self.src.check_errors()
+		self.assertEqual([e.code for e in errors], [-222, -113])
+		self.assertEqual(self.adptr.transactions, count + 2)
+		self.assertEqual(list(self.src.error_log), errors)
+		self.assertEqual(self.src.check_errors(), [])
+
+	def test_long_queue(self):
+		self.queue(*['-222,"Data out of range"'] * 20)
+		self.assertEqual(len(self.src.read_errors()), 20)
+		self.assertEqual(len(self.adptr.errors), 0)
+
+	def test_sequential(self):
+		self.adptr.compound = False
+		self.queue('-222,"Data out of range"')
+		count = self.adptr.transactions
+		self.assertEqual([e.code for e in self.src.check_errors()], [-222])
+		# One query for the error and one for the empty queue
+		self.assertEqual(self.adptr.transactions, count + 4)
+		count = self.adptr.transactions
+		self.assertEqual(self.src.level, 3.0)
+		self.assertEqual(self.adptr.transactions, count + 4)
+
+	def test_errors_all(self):
+		src = AllSource("Test,Source,1,1", self.adptr)
+		self.queue('-222,"Data out of range"', '-221,"Settings conflict"')
+		count = self.adptr.transactions
+		self.assertEqual([e.code for e in src.check_errors()], [-222, -221])
+		self.assertEqual(self.adptr.transactions, count + 2)
+
+	def test_checked_set(self):
+		count = self.adptr.transactions
+		self.src.power = -10
+		self.assertEqual(self.adptr.transactions, count + 2)
+		self.assertEqual(self.adptr.state['POW'], '-10')
+		self.adptr.responses['POW'] = lambda sim, args: sim.errors.append('-222,"Data out of range"')
+		self.src.power = 30
+		self.assertEqual(self.src.error_log[-1].code, -222)
+
+	def test_checked_get(self):
+		count = self.adptr.transactions
+		self.assertEqual(self.src.level, 3.0)
+		self.assertEqual(self.adptr.transactions, count + 2)
+
+	def test_checked_get_in_batch(self):
+		with self.src.batch() as b:
+			self.src.power = -10
+			self.assertEqual(self.src.level, 3.0)
+		self.assertEqual(self.adptr.state['POW'], '-10')
+
+	def test_deferred(self):
+		self.adptr.responses['POW'] = lambda sim, args: sim.errors.append('-222,"Data out of range;%s"' % args)
+		count = self.adptr.transactions
+		with self.src.batch() as b:
+			for p in (30, 40, 50):
+				self.src.power = p
+		self.assertEqual(self.adptr.transactions, count + 2)
+		self.assertEqual([e.message for e in b.errors],
+			["Data out of range;30", "Data out of range;40", "Data out of range;50"])
+
+	def test_recover(self):
+		self.queue('-222,"Data out of range"')
+		self.assertEqual(len(self.src.recover()), 1)
+		self.assertEqual(self.src.check_errors(), [])
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,95 @@
+import gc
+import unittest
+from Adapters.pool import AdapterPool
+from Adapters.sim import MODELS, SimulatedAdapter
+from Instruments.audiomod import ModulationAnalyzer
+from Instruments.freqcount import FreqCounter
+from Instruments.instrument import LazyChannel, splitResourceID
+from Instruments.powmeter import PMChannel, PowerMeter
+from Instruments.scope import MSO, MSOChannel
+
+
+def build(cls, model):
+	adptr = SimulatedAdapter(model)
+	return cls(splitResourceID(MODELS[model]['*IDN?']), adptr), adptr
+
+
+class TestLazy(unittest.TestCase):
+	def test_no_traffic(self):
+		for cls, model in [(PowerMeter, 'E4419B'), (MSO, 'MSO4034'), (FreqCounter, '53131A')]:
+			instr, adptr = build(cls, model)
+			self.assertEqual(adptr.transactions, 0, cls.__name__)
+
+	def test_channels(self):
+		pm, adptr = build(PowerMeter, 'E4419B')
+		self.assertEqual(LazyChannel.built(pm), {})
+		ch = pm.ch2
+		self.assertIsInstance(ch, PMChannel)
+		self.assertIs(pm.ch2, ch)
+		self.assertEqual(ch.chnum, 2)
+		self.assertIs(ch.parent, pm)
+		self.assertEqual(LazyChannel.built(pm), {'ch2': ch})
+		del pm.ch2
+		self.assertEqual(LazyChannel.built(pm), {})
+		self.assertIsNot(pm.ch2, ch)
+
+	def test_channel_keeps_adapter(self):
+		pool = AdapterPool(lambda address: SimulatedAdapter('E4419B'), idle_timeout=None)
+		try:
+			pm = PowerMeter(splitResourceID(MODELS['E4419B']['*IDN?']), pool.acquire("GPIB0::13::INSTR"))
+			pm.ch2.power()
+			del pm.ch2
+			gc.collect()
+			self.assertEqual(pool.references(13), 1)
+			self.assertTrue(pm.ask("*IDN?"))
+			pm.close()
+			pm.close()
+			self.assertEqual(pool.references(13), 0)
+		finally:
+			pool.close_all()
+
+	def test_unavailable(self):
+		pm, adptr = build(PowerMeter, 'E4418B')
+		self.assertIsInstance(pm.ch1, PMChannel)
+		self.assertRaises(AttributeError, getattr, pm, 'ch2')
+		self.assertFalse(hasattr(pm, 'ch2'))
+
+	def test_memoized(self):
+		mso, adptr = build(MSO, 'MSO4034')
+		self.assertIsInstance(mso.ch4, MSOChannel)
+		self.assertEqual(adptr.transactions, 0)
+		rate = mso._maxsamplerate
+		self.assertEqual(mso._maxsamplerate, rate)
+		self.assertEqual(adptr.transactions, 2)
+		idn = mso.id
+		self.assertEqual(mso.id, idn)
+		self.assertEqual(adptr.transactions, 4)
+
+	def test_hpib_setup(self):
+		adptr = SimulatedAdapter(responses={'*IDN?': 'HP,8901A,0,0'})
+		ma = ModulationAnalyzer('HP,8901A,0,0', adptr)
+		self.assertEqual(adptr.transactions, 0)
+		sent = []
+		adptr.execute = lambda command: sent.append(command)
+		ma.write('M1')
+		ma.write('M2')
+		self.assertEqual(sent, ['CL', 'AU', 'T0', ma.att['auto'], 'M1', 'M2'])
+
+	def test_hpib_setup_before_read(self):
+		reads = [
+			(lambda ma: ma.read(), []),
+			(lambda ma: ma.readBytes(4), []),
+			(lambda ma: ma.binary_values("TR", header_bytes=0), ['TR']),
+		]
+		for read, commands in reads:
+			adptr = SimulatedAdapter(responses={'*IDN?': 'HP,8901A,0,0'})
+			ma = ModulationAnalyzer('HP,8901A,0,0', adptr)
+			sent = []
+			adptr.execute = lambda command: sent.append(command)
+			adptr._output.append(b'\0\0\0\0\n')
+			read(ma)
+			self.assertEqual(sent, ['CL', 'AU', 'T0', ma.att['auto']] + commands)
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+from Adapters.sim import SimulatedAdapter
+from Instruments.instrument import Instrument
+from Instruments.properties import Control, Measurement, Setting
+from Instruments.validators import strict_range
+
+
+class Source(Instrument):
+	output = Instrument.control(":OUTP?", ":OUTP %d", """ Output state """,
+		values={True: 1, False: 0}, map_values=True, cast=int)
+	mode = Instrument.control(":MODE?", ":MODE {}", """ Sweep mode """,
+		values=['CW', 'SWEEP', 'LIST'], map_values=True)
+	power = Instrument.control(":POW?", ":POW %g DBM", """ Output power (dBm) """,
+		validator=strict_range, values=[-100, 20])
+	limits = Instrument.control(":LIM?", ":LIM {},{}", """ Power limits (dBm) """)
+	temperature = Instrument.measurement(":TEMP?", """ Temperature (C) """)
+	level = Instrument.setting(":LEV %d", """ Level """)
+
+
+class TestProperties(unittest.TestCase):
+	def setUp(self):
+		self.adptr = SimulatedAdapter(responses={':TEMP?': '31.5'})
+		self.src = Source("Test,Source,1,1", self.adptr)
+
+	def test_mapping(self):
+		self.src.output = True
+		self.src.mode = 'SWEEP'
+		self.assertEqual(self.adptr.state['OUTP'], '1')
+		self.assertEqual(self.adptr.state['MODE'], '1')
+		self.assertIs(self.src.output, True)
+		self.assertEqual(self.src.mode, 'SWEEP')
+
+	def test_validate_and_format(self):
+		self.src.power = -10
+		self.assertEqual(self.src.power, -10.0)
+		self.assertRaises(ValueError, setattr, self.src, 'power', 30)
+		self.src.limits = (-20, 10)
+		self.assertEqual(self.src.limits, [-20.0, 10.0])
+
+	def test_kinds(self):
+		self.assertEqual(self.src.temperature, 31.5)
+		self.assertRaises(AttributeError, setattr, self.src, 'temperature', 1)
+		self.src.level = 3
+		self.assertEqual(self.adptr.state['LEV'], '3')
+		self.assertRaises(LookupError, getattr, self.src, 'level')
+
+	def test_introspection(self):
+		props = Source.properties()
+		self.assertIsInstance(props['output'], Control)
+		self.assertIsInstance(props['temperature'], Measurement)
+		self.assertIsInstance(props['level'], Setting)
+		self.assertEqual(props['mode'].name, 'mode')
+		self.assertEqual(props['power'].__doc__, """ Output power (dBm) """)
+		self.assertEqual(sorted(Source.properties('control')), ['limits', 'mode', 'output', 'power'])
+
+	def test_read_properties(self):
+		self.src.output = False
+		self.src.mode = 'LIST'
+		self.src.power = 5
+		self.src.limits = (-30, 15)
+		count = self.adptr.transactions
+		values = self.src.read_properties()
+		self.assertEqual(self.adptr.transactions, count + 2)
+		self.assertEqual(values, {'output': False, 'mode': 'LIST', 'power': 5.0, 'limits': [-30.0, 15.0]})
+		self.assertEqual(self.src.read_properties(['temperature']), {'temperature': 31.5})
+		self.assertRaises(LookupError, self.src.read_properties, ['level'])
+
+	def test_read_properties_cached(self):
+		self.src.enable_cache()
+		self.src.power = 5
+		count = self.adptr.transactions
+		self.assertEqual(self.src.read_properties(['power', 'mode']), {'power': 5.0, 'mode': 'CW'})
+		self.assertEqual(self.adptr.transactions, count + 2)
+		self.assertEqual(self.src.mode, 'CW')
+		self.assertEqual(self.adptr.transactions, count + 2)
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+from Instruments.dmm import DMM
+from Instruments.generators import ArbGen, SigGen
+from Instruments.gps import GSG, GSG_55
+from Instruments.instrument import Instrument
+from Instruments.powmeter import PowerMeter
+from Instruments.registry import DriverRegistry, registry
+from Instruments.scope import MSO, Oscilloscope
+from Instruments.specan import SignalAnalyzer
+
+
+class TestRegistry(unittest.TestCase):
+	def test_lookup(self):
+		self.assertIs(registry.lookup("E4419B"), PowerMeter)
+		self.assertIs(registry.lookup("34410A"), DMM)
+		self.assertIs(registry.lookup("E4438C"), SigGen)
+		self.assertIs(registry.lookup("N9020A"), SignalAnalyzer)
+		self.assertIsNone(registry.lookup("Model 2612"))
+
+	def test_most_specific(self):
+		self.assertEqual(registry.candidates("GSG-55"), [GSG_55, GSG])
+		self.assertEqual(registry.candidates("MSO4034"), [MSO, Oscilloscope])
+		self.assertIs(registry.lookup("33522A"), ArbGen)
+
+	def test_subclass_hook(self):
+		class Meter9000(Instrument):
+			models = ["DMM", r"9\d\d\dA"]
+		class Meter9001(Meter9000):
+			models = ["DMM", r"9001A"]
+		class Inherited(Meter9000):
+			pass
+		try:
+			self.assertIs(registry.lookup("9000A"), Meter9000)
+			self.assertIs(registry.lookup("9001A"), Meter9001)
+			self.assertNotIn(Inherited, registry)
+			self.assertEqual(Inherited.checkSupport("9002A"), "DMM")
+			self.assertIsNone(Meter9000.checkSupport("DMM"))
+		finally:
+			registry.unregister(Meter9000)
+			registry.unregister(Meter9001)
+		self.assertIsNone(registry.lookup("9001A"))
+
+	def test_priority(self):
+		class Base(object):
+			models = ["X", r"X\d+"]
+		class Preferred(object):
+			models = ["X", r"X\d$"]
+			priority = 1
+		reg = DriverRegistry()
+		reg.register(Base)
+		reg.register(Preferred)
+		self.assertEqual(reg.candidates("X12"), [Base])
+		self.assertEqual(reg.candidates("X1"), [Preferred, Base])
+		self.assertEqual(len(reg), 2)
+
+
+if __name__ == '__main__':
+	unittest.main()
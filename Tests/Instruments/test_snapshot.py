@@ -0,0 +1,52 @@
+import json
+import unittest
+from Adapters.sim import MODELS, SimulatedAdapter
+from Instruments.instrument import splitResourceID
+from Instruments.specan import SpecAnalyzer
+
+
+class TestSnapshot(unittest.TestCase):
+	def setUp(self):
+		self.adptr = SimulatedAdapter('N9020A')
+		self.sa = SpecAnalyzer(splitResourceID(MODELS['N9020A']['*IDN?']), self.adptr)
+
+	def configure(self, center):
+		self.sa.center_frequency = center
+		self.sa.frequency_points = 401
+		self.sa.sweep_time = 0.05
+
+	def test_snapshot(self):
+		self.configure(2e9)
+		count = self.adptr.transactions
+		state = self.sa.snapshot()
+		self.assertEqual(self.adptr.transactions, count + 2)
+		self.assertEqual(set(state), set(SpecAnalyzer.properties('control')))
+		self.assertEqual(state['center_frequency'], 2e9)
+		self.assertEqual(state['frequency_points'], 401)
+		self.assertEqual(json.loads(json.dumps(state)), state)
+
+	def test_restore(self):
+		self.configure(2e9)
+		state = json.loads(json.dumps(self.sa.snapshot()))
+		self.configure(3e9)
+		self.sa.frequency_points = 1001
+		count = self.adptr.transactions
+		self.assertEqual(self.sa.restore(state), ['frequency_points', 'center_frequency'])
+		self.assertEqual(self.adptr.transactions, count + 3)
+		self.assertEqual(self.sa.snapshot(), state)
+		count = self.adptr.transactions
+		self.assertEqual(self.sa.restore(state), [])
+		self.assertEqual(self.adptr.transactions, count + 2)
+
+	def test_unknown(self):
+		self.assertRaises(LookupError, self.sa.restore, {'center_frequency': 1e9, 'bogus': 1})
+
+	def test_skip_failing(self):
+		self.adptr.responses['SENS:SWE:TIME?'] = lambda sim, args: 1 / 0
+		state = self.sa.snapshot()
+		self.assertNotIn('sweep_time', state)
+		self.assertEqual(state['center_frequency'], 1e9)
+
+
+if __name__ == '__main__':
+	unittest.main()
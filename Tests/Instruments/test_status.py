@@ -0,0 +1,109 @@
+import asyncio
+import time
+import unittest
+from Adapters.pool import AdapterPool, LockedAdapter
+from Adapters.sim import MODELS, SimulatedAdapter
+from Instruments.aio import AsyncInstrument
+from Instruments.instrument import splitResourceID
+from Instruments.powmeter import PowerMeter
+from Instruments.status import operation_complete
+
+
+class TestOperationComplete(unittest.TestCase):
+	def meter(self, **kwargs):
+		adptr = SimulatedAdapter('E4418B', durations={'CAL': 0.2}, **kwargs)
+		return PowerMeter(splitResourceID(MODELS['E4418B']['*IDN?']), LockedAdapter(adptr)), adptr
+
+	def test_srq(self):
+		pm, adptr = self.meter()
+		start = time.time()
+		future = pm.operation_complete("CAL1", timeout=5)
+		self.assertFalse(future.done())
+		self.assertEqual(adptr.state['*SRE'], '32')
+		self.assertGreaterEqual(future.result(), 0.2)
+		self.assertLess(time.time() - start, 1)
+
+	def test_restores_enables(self):
+		pm, adptr = self.meter()
+		adptr.state.update({'*ESE': '4', '*SRE': '16'})
+		pm.operation_complete("CAL1", timeout=5).result()
+		self.assertEqual((adptr.state['*ESE'], adptr.state['*SRE']), ('4', '16'))
+
+	def test_caller_queries(self):
+		pm, adptr = self.meter(srq=False)
+		ask = adptr.ask
+		active = []
+		overlaps = []
+		def checked(command):
+			active.append(command)
+			if len(active) > 1:
+				overlaps.append(list(active))
+			try:
+				time.sleep(0.002)
+				return ask(command)
+			finally:
+				active.remove(command)
+		adptr.ask = checked
+		future = operation_complete(pm, "CAL1", timeout=5, interval=0.001, max_interval=0.001)
+		queries = 0
+		while not future.done():
+			self.assertEqual(pm.ask("*IDN?"), MODELS['E4418B']['*IDN?'])
+			queries += 1
+		self.assertGreater(queries, 0)
+		self.assertGreaterEqual(future.result(), 0.2)
+		self.assertEqual(overlaps, [])
+
+	def test_unlocked(self):
+		adptr = SimulatedAdapter('E4418B', durations={'CAL': 0.2}, srq=False)
+		pm = PowerMeter(splitResourceID(MODELS['E4418B']['*IDN?']), adptr)
+		# Nothing would keep the worker and the caller apart, so it waits first
+		future = pm.operation_complete("CAL1", timeout=5)
+		self.assertTrue(future.done())
+		self.assertGreaterEqual(future.result(), 0.2)
+
+	def test_poll(self):
+		pm, adptr = self.meter(srq=False)
+		future = operation_complete(pm, "CAL1", timeout=5, interval=0.01, max_interval=0.05)
+		self.assertGreaterEqual(future.result(), 0.2)
+		# Adaptive polling: far fewer status reads than 10 ms polling would need
+		self.assertLess(adptr.transactions, 30)
+
+	def test_pooled(self):
+		pool = AdapterPool(lambda address: SimulatedAdapter('E4418B', durations={'CAL': 2}), idle_timeout=None)
+		try:
+			adptr = pool.acquire("GPIB0::13::INSTR")
+			pm = PowerMeter(splitResourceID(MODELS['E4418B']['*IDN?']), adptr)
+			future = pm.operation_complete("CAL1", timeout=5)
+			# The connection is not held while waiting for SRQ
+			self.assertTrue(pm.ask("*IDN?"))
+			self.assertLess(time.time(), adptr._adapter._busy_until)
+			self.assertGreater(future.result(), 0)
+		finally:
+			pool.close_all()
+
+	def test_keeps_errors(self):
+		pm, adptr = self.meter()
+		adptr.errors.append('-222,"Data out of range"')
+		pm.operation_complete("CAL1", timeout=5).result()
+		self.assertEqual([e.code for e in pm.read_errors()], [-222])
+
+	def test_timeout(self):
+		pm, adptr = self.meter(srq=False)
+		future = pm.operation_complete("CAL1", timeout=0.05)
+		self.assertRaises(TimeoutError, future.result)
+
+	def test_calibrate(self):
+		pm, adptr = self.meter()
+		start = time.time()
+		pm.ch1.calibrate(1)
+		self.assertLess(time.time() - start, 5)  # Used to sleep for 40 s
+
+	def test_async(self):
+		pm, adptr = self.meter()
+		apm = AsyncInstrument(pm)
+		elapsed = asyncio.run(apm.operation_complete("CAL1", timeout=5))
+		self.assertGreaterEqual(elapsed, 0.2)
+
+
+if __name__ == '__main__':
+	unittest.main()
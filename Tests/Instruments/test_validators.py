@@ -0,0 +1,103 @@
+import unittest
+import numpy as np
+from Adapters.sim import MODELS, SimulatedAdapter
+from Instruments.generators import ArbGen, SigGen
+from Instruments.instrument import Instrument, splitResourceID
+from Instruments.validators import (DiscreteTruncate, StrictDiscreteRange, StrictDiscreteSet, StrictRange,
+	TruncatedDiscreteSet, TruncatedRange, ValidationError, discreteTruncate, strict_discrete_range,
+	strict_range, truncated_discrete_set, truncated_range)
+
+
+class TestValidators(unittest.TestCase):
+	def test_matches_functions(self):
+		sets = [1, 10, 100, 1000]
+		cases = [
+			(StrictRange([-100, 20]), lambda v: strict_range(v, [-100, 20]), [-100, 0, 20, 25, -101]),
+			(StrictDiscreteRange([0, 10], 0.1), lambda v: strict_discrete_range(v, [0, 10], 0.1), [0.3, 9.9, 0.35, 11]),
+			(TruncatedRange([101, 8192]), lambda v: truncated_range(v, [101, 8192]), [50, 401, 9000]),
+			(TruncatedDiscreteSet(sets), lambda v: truncated_discrete_set(v, sets), [0, 1, 5, 100, 2000]),
+			(DiscreteTruncate(sets), lambda v: discreteTruncate(v, list(sets)), [-1, 0, 5, 1000, 2000]),
+		]
+		for validator, function, values in cases:
+			for value in values:
+				try:
+					expected = function(value)
+				except ValueError:
+					self.assertRaises(ValidationError, validator, value)
+				else:
+					self.assertEqual(validator(value), expected, (validator, value))
+
+	def test_arrays(self):
+		points = np.linspace(1e6, 3e9, 5000)
+		self.assertIs(StrictRange([9e3, 3e9])(points), points)
+		np.testing.assert_array_equal(TruncatedRange([0, 1])([-1, 0.5, 2]), [0, 0.5, 1])
+		np.testing.assert_array_equal(TruncatedDiscreteSet([1, 10, 100])([0, 2, 10, 500]), [1, 10, 10, 100])
+		np.testing.assert_array_equal(StrictDiscreteRange([0, 10], 0.1)(np.arange(0, 100) / 10.0),
+			np.arange(0, 100) / 10.0)
+		self.assertEqual(list(StrictDiscreteSet([0, 1, "OFF", "ON"])(["ON", 0])), ["ON", 0])
+		self.assertRaises(ValidationError, StrictDiscreteSet([0, 1, "OFF", "ON"]), ["ON", 2])
+
+	def test_all_violations(self):
+		values = np.zeros(100)
+		values[[3, 50, 99]] = 30
+		try:
+			StrictRange([-100, 20])(values)
+		except ValidationError as e:
+			self.assertEqual(list(e.indices), [3, 50, 99])
+			self.assertIn("3 of 100 values", str(e))
+		else:
+			self.fail("No ValidationError")
+		with self.assertRaises(ValidationError) as cm:
+			StrictDiscreteSet([101, 201, 401])([101, 150, 401, 1001])
+		self.assertEqual(list(cm.exception.indices), [1, 3])
+		with self.assertRaises(ValidationError) as cm:
+			DiscreteTruncate([1, 10])([-1, 5, 11])
+		self.assertEqual(list(cm.exception.values), [-1, 11])
+
+	def test_nan(self):
+		values = np.array([1.0, np.nan, 2.0])
+		for validator in (StrictRange([0, 10]), StrictDiscreteRange([0, 10], 0.5)):
+			with self.assertRaises(ValidationError) as cm:
+				validator(values)
+			self.assertEqual(list(cm.exception.indices), [1])
+			self.assertRaises(ValidationError, validator, float('nan'))
+
+	def test_control(self):
+		validator = StrictRange([-100, 20])
+		self.assertEqual(validator(-10, [-100, 20]), -10)
+		self.assertTrue(issubclass(ValidationError, ValueError))
+
+	def test_tuples(self):
+		self.assertEqual(StrictRange([0, 10])((1, 20)), (1, 20))
+		class Source(Instrument):
+			limits = Instrument.control("SOUR:LIM?", "SOUR:LIM {},{}", "Lower and upper limits",
+				validator=StrictRange([-10, 10]))
+		adptr = SimulatedAdapter()
+		source = Source("Source", adptr)
+		source.limits = (-1, 2.5)
+		self.assertEqual(adptr.state['SOUR:LIM'], '-1,2.5')
+
+	def test_list_sweep(self):
+		adptr = SimulatedAdapter('E4438C')
+		sg = SigGen(splitResourceID(MODELS['E4438C']['*IDN?']), adptr)
+		points = np.linspace(1e9, 2e9, 1001)
+		sg.list_frequencies = points
+		np.testing.assert_array_equal(np.array(adptr.state['SOUR:LIST:FREQ'].split(','), dtype=float), points)
+		adptr.transactions = 0
+		points[[3, 700]] = [7e9, 100e3]
+		with self.assertRaises(ValidationError) as cm:
+			sg.list_frequencies = points
+		self.assertEqual(list(cm.exception.indices), [3, 700])
+		self.assertEqual(adptr.transactions, 0)
+
+	def test_arb_samples(self):
+		adptr = SimulatedAdapter('33522A')
+		arb = ArbGen(splitResourceID(MODELS['33522A']['*IDN?']), adptr)
+		samples = np.sin(np.linspace(0, 2 * np.pi, 4000))
+		arb.arb_data = samples
+		self.assertEqual(adptr.state['DATA'].count(','), 4000)
+		self.assertRaises(ValidationError, setattr, arb, 'arb_data', samples * 1.5)
+
+
+if __name__ == '__main__':
+	unittest.main()
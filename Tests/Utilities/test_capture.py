@@ -0,0 +1,109 @@
+import os
+import queue
+import tempfile
+import time
+import unittest
+from unittest import mock
+from Utilities.SerialPort import SerialPort
+from Utilities.capture import INDEX, NOTE, RX, TX, Capture, CaptureLog
+
+
+class TestCaptureLog(unittest.TestCase):
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+
+	def test_records(self):
+		log = CaptureLog(self.directory, "rcp")
+		log.append(1e9, TX, "COM6", "bit")
+		log.append(1e9 + 1, RX, "COM6 RCP", "BIT: PASS")
+		records = list(log.records())
+		self.assertEqual([(r.time, r.direction, r.source, r.text) for r in records],
+			[(1e9, TX, "COM6", "bit"), (1e9 + 1, RX, "COM6 RCP", "BIT: PASS")])
+		self.assertEqual(list(log.records(start=1e9 + 0.5)), records[1:])
+		log.close()
+		self.assertEqual(os.path.getsize(os.path.join(self.directory, "rcp.000001.idx")), 2 * INDEX.size)
+		with open(os.path.join(self.directory, "rcp.000001.log")) as f:
+			self.assertEqual(f.read(), str(records[0]) + "\n" + str(records[1]) + "\n")
+
+	def test_unwritten(self):
+		log = CaptureLog(self.directory, "rcp")
+		log.append(1e9, TX, "COM6", "bit")
+		# Indexed by a capture that ended before the line reached the segment
+		log._index.write(INDEX.pack(1e9 + 1, log._position, 20, 10, RX))
+		self.assertEqual([r.text for r in log.records()], ["bit"])
+		log.close()
+
+	def test_rotation(self):
+		log = CaptureLog(self.directory, "rcp", segment_size=256, max_segments=2)
+		for i in range(30):
+			log.append(1e9 + i, RX, "COM6", "line %d" % i)
+		segments = log.segments()
+		self.assertEqual(len(segments), 2)
+		texts = [r.text for r in log.records()]
+		self.assertEqual(texts[-1], "line 29")
+		self.assertEqual(texts, ["line %d" % i for i in range(30 - len(texts), 30)])
+		log.close()
+		# A new log continues after the segments on disk
+		self.assertEqual(CaptureLog(self.directory, "rcp").segment, segments[-1] + 1)
+
+
+class TestCapture(unittest.TestCase):
+	def test_no_loss(self):
+		with Capture(tempfile.mkdtemp(), segment_size=64 * 1024) as capture:
+			start = time.perf_counter()
+			for i in range(20000):
+				capture.rx("COM6", "line %d" % i)
+			self.assertLess(time.perf_counter() - start, 1)
+			capture.note("RCP", "done")
+			self.assertTrue(capture.flush(10))
+			records = list(capture.log.records())
+		self.assertEqual(len(records), 20001)
+		self.assertEqual(records[19999].text, "line 19999")
+		self.assertEqual(records[-1][1:], (NOTE, "RCP", "done"))
+
+	def test_index_written(self):
+		with Capture(tempfile.mkdtemp(), "rcp") as capture:
+			capture.rx("COM6", "BIT: PASS")
+			index = os.path.join(capture.log.directory, "rcp.000001.idx")
+			# Written out once the writer is idle, without flush() or close()
+			deadline = time.time() + 5
+			while os.path.getsize(index) < INDEX.size and time.time() < deadline:
+				time.sleep(0.01)
+			self.assertEqual(os.path.getsize(index), INDEX.size)
+
+	def test_closed_at_exit(self):
+		capture = Capture(tempfile.mkdtemp())
+		with mock.patch('atexit.unregister') as unregister:
+			capture.close()
+		unregister.assert_called_once_with(capture.close)
+		self.assertFalse(capture.thread.is_alive())
+
+
+@unittest.skipUnless(hasattr(os, 'openpty'), "needs a pseudo-terminal")
+class TestSerialCapture(unittest.TestCase):
+	def test_console_traffic(self):
+		master, slave = os.openpty()
+		capture = Capture(tempfile.mkdtemp())
+		port = SerialPort("RCP", os.ttyname(slave), asyncr=True, echos=False, capture=capture)
+		os.close(slave)
+		try:
+			# The queue drops lines nobody reads, the transcript keeps them
+			port.q = port.receiver.q = queue.Queue(maxsize=2)
+			port.send("bit")
+			os.write(master, b"".join(b"line %d\r\n" % i for i in range(10)))
+			deadline = time.time() + 2
+			while port.receiver.dropped < 8 and time.time() < deadline:
+				time.sleep(0.01)
+			capture.flush()
+			records = [(r.direction, r.source, r.text) for r in capture.log.records()]
+			self.assertEqual(records, [(TX, "RCP", "bit")] + [(RX, "RCP", "line %d" % i) for i in range(10)])
+			self.assertEqual(port.receiver.dropped, 8)
+		finally:
+			port.receiver.stop()
+			port.handle.close()
+			capture.close()
+			os.close(master)
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,121 @@
+import os
+import tempfile
+import threading
+import unittest
+from Adapters.sim import SimulatedBench
+from Utilities.discovery import DiscoveryCache, bus_of, discover
+
+
+class TestDiscovery(unittest.TestCase):
+	def setUp(self):
+		self.bench = SimulatedBench({
+			"TCPIP0::10.0.0.2::inst0::INSTR": "N9020A",
+			"TCPIP0::10.0.0.3::inst0::INSTR": "E5071C",
+			"GPIB0::13::INSTR": "E4418B",
+			"GPIB0::14::INSTR": "34410A",
+		}, latency=0.05)
+		self.active = {}
+		self.peaks = {}
+		self.opened = []
+		self.lock = threading.Lock()
+		self.hung = threading.Event()  # Set to let the probe of a dead address end
+
+	def tearDown(self):
+		self.hung.set()
+
+	def open(self, address):
+		bus = bus_of(address)
+		with self.lock:
+			self.opened.append(address)
+			self.active[bus] = self.active.get(bus, 0) + 1
+			self.peaks[bus] = max(self.peaks.get(bus, 0), self.active[bus])
+		try:
+			if address == "GPIB0::20::INSTR":
+				self.hung.wait(5)  # Dead address, times out
+			adapter = self.bench.open(address)
+		except Exception:
+			with self.lock:
+				self.active[bus] -= 1
+			raise
+		close = adapter.close
+		def closed():
+			# The probe holds its bus until it closes the adapter
+			with self.lock:
+				self.active[bus] -= 1
+			close()
+		adapter.close = closed
+		return adapter
+
+	def test_bus_of(self):
+		self.assertEqual(bus_of("GPIB0::13::INSTR"), "GPIB0")
+		self.assertEqual(bus_of(" tcpip0::host::5025::SOCKET"), "TCPIP0")
+		self.assertEqual(bus_of(13), "GPIB0")
+
+	def test_parallel(self):
+		# The LAN probes and a GPIB probe only get past the barrier together
+		barrier = threading.Barrier(3, timeout=5)
+		def open(address):
+			if bus_of(address) == "TCPIP0" or address == "GPIB0::13::INSTR":
+				barrier.wait()
+			return self.open(address)
+		found = dict(discover(self.bench.list_resources(), opener=open))
+		self.assertEqual(found["GPIB0::13::INSTR"].split(',')[1], "E4418B")
+		self.assertEqual(found["GPIB0::14::INSTR"].split(',')[1], "34410A")
+		self.assertEqual(found["TCPIP0::10.0.0.3::inst0::INSTR"].split(',')[1], "E5071C")
+		self.assertFalse(barrier.broken)
+		# Two GPIB probes one after the other, the LAN ones alongside
+		self.assertEqual(self.peaks["GPIB0"], 1)
+
+	def test_deadline(self):
+		resources = ["GPIB0::20::INSTR", "TCPIP0::10.0.0.2::inst0::INSTR"]
+		found = list(discover(resources, timeout=0.2, opener=self.open))
+		# Given up on while its probe still hangs
+		self.assertFalse(self.hung.is_set())
+		self.assertEqual(found[0][0], "TCPIP0::10.0.0.2::inst0::INSTR")
+		self.assertEqual(found[1], ("GPIB0::20::INSTR", None))
+
+	def test_expired_keeps_bus(self):
+		hung = threading.Event()
+		finished = threading.Event()
+		probed = []
+		def open(address):
+			if address == "GPIB0::20::INSTR":
+				hung.wait(5)  # Dead address, which holds its probe thread
+				finished.set()
+			else:
+				probed.append(finished.is_set())
+			return self.bench.open(address)
+		found = []
+		try:
+			for resource, idn in discover(["GPIB0::20::INSTR", "GPIB0::13::INSTR"], timeout=0.2, opener=open):
+				found.append((resource, idn))
+				hung.set()  # The dead address gives up once discovery has
+		finally:
+			hung.set()
+		self.assertEqual(found[0], ("GPIB0::20::INSTR", None))
+		self.assertEqual(found[1][0], "GPIB0::13::INSTR")
+		self.assertEqual(found[1][1].split(',')[1], "E4418B")
+		# Not probed on the board before the expired probe let go of it
+		self.assertEqual(probed, [True])
+
+	def test_failed(self):
+		found = dict(discover(["GPIB0::21::INSTR"], opener=self.bench.open))
+		self.assertEqual(found, {"GPIB0::21::INSTR": None})
+
+	def test_cache(self):
+		path = os.path.join(tempfile.mkdtemp(), "discovery.json")
+		cold = dict(discover(self.bench.list_resources(), DiscoveryCache(path), opener=self.open))
+		self.assertTrue(os.path.exists(path))
+		cache = DiscoveryCache(path)
+		self.assertEqual(len(cache), 4)
+		del self.opened[:]
+		warm = dict(discover(self.bench.list_resources(), cache, opener=self.open))
+		self.assertEqual(self.opened, [])
+		self.assertEqual(warm, cold)
+		cache.forget("GPIB0::13::INSTR")
+		self.assertIsNone(cache.get("GPIB0::13::INSTR"))
+		self.assertIsNone(DiscoveryCache(path, max_age=-1).get("GPIB0::14::INSTR"))
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,72 @@
+import threading
+import time
+import unittest
+from Utilities.lock import FairLock
+
+
+class TestFairLock(unittest.TestCase):
+	def wait_for(self, lock, waiting):
+		while lock.waiting < waiting:
+			time.sleep(0.001)
+
+	def test_fifo(self):
+		lock = FairLock("COM6")
+		order = []
+		def worker(n):
+			with lock:
+				order.append(n)
+		lock.acquire()
+		threads = []
+		for n in range(5):
+			threads.append(threading.Thread(target=worker, args=(n,)))
+			threads[-1].start()
+			self.wait_for(lock, n + 1)
+		lock.release()
+		for t in threads:
+			t.join(2)
+		self.assertEqual(order, list(range(5)))
+		self.assertFalse(lock.locked())
+		stats = lock.stats()
+		self.assertEqual(stats['acquisitions'], 6)
+		self.assertEqual(stats['contended'], 5)
+		self.assertGreater(stats['max_wait'], 0)
+
+	def test_handoff(self):
+		lock = FairLock()
+		acquired = []
+		lock.acquire()
+		t = threading.Thread(target=lambda: acquired.append((lock.acquire(), time.perf_counter())))
+		t.start()
+		self.wait_for(lock, 1)
+		released = time.perf_counter()
+		lock.release()
+		t.join(2)
+		self.assertTrue(acquired[0][0])
+		self.assertLess(acquired[0][1] - released, 0.02)
+
+	def test_reentrant(self):
+		lock = FairLock()
+		self.assertTrue(lock.acquire())
+		self.assertTrue(lock.acquire(False))
+		lock.release()
+		self.assertTrue(lock.locked())
+		lock.release()
+		self.assertFalse(lock.locked())
+		self.assertRaises(RuntimeError, lock.release)
+
+	def test_timeout(self):
+		lock = FairLock()
+		lock.acquire()
+		result = []
+		t = threading.Thread(target=lambda: result.append((lock.acquire(False), lock.acquire(timeout=0.05))))
+		t.start()
+		t.join(2)
+		self.assertEqual(result, [(False, False)])
+		self.assertEqual(lock.waiting, 0)
+		self.assertEqual(lock.stats()['timeouts'], 1)
+		lock.release()
+		self.assertFalse(lock.locked())
+
+
+if __name__ == '__main__':
+	unittest.main()
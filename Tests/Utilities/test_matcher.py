@@ -0,0 +1,52 @@
+import re
+import unittest
+from Utilities.matcher import PromptMatcher, compile_prompts
+
+
+class TestPromptMatcher(unittest.TestCase):
+	def setUp(self):
+		self.modes = PromptMatcher({'NORM': 'NORM>', 'F3': 'F3>', 'PRGM': 'PRGM>', 'INST': 'INST>',
+			'CONSOLE': re.compile(r'^(?:/tmp |~ )?#|/tmp #', re.M)})
+
+	def test_literals(self):
+		match = self.modes.search("ready\nunit 3 prgm> \n")
+		self.assertEqual(match.key, 'PRGM')
+		self.assertEqual(match.text, 'prgm>')
+		self.assertEqual(match.line, 'unit 3 prgm>')
+
+	def test_first_end_wins(self):
+		self.assertEqual(self.modes.search("INST> NORM>").key, 'INST')
+		self.assertEqual(self.modes.search("F3>\n# ").key, 'F3')
+
+	def test_anchored_regex(self):
+		scanner = self.modes.scan()
+		self.assertIsNone(scanner.feed("debug # value\n"))
+		match = scanner.feed("~ # \n")
+		self.assertEqual(match.key, 'CONSOLE')
+		self.assertEqual(match.text, '~ #')
+
+	def test_incremental(self):
+		scanner = compile_prompts(("Login OK\n>", "FAIL")).scan()
+		self.assertIsNone(scanner.feed("Log"))
+		self.assertIsNone(scanner.feed("in ok\n"))
+		match = scanner.feed("> ")
+		self.assertEqual(match.key, "Login OK\n>")
+		self.assertEqual(match.text, "Login ok\n>")
+		self.assertIsNone(scanner.feed("FA"))
+		self.assertEqual(scanner.feed("IL").key, "FAIL")
+
+	def test_regex(self):
+		prompts = compile_prompts(r"NORM>|F3", True)
+		self.assertIs(prompts, compile_prompts(r"NORM>|F3", True))
+		self.assertEqual(prompts.search("x f3 y").text, "f3")
+		self.assertIsNone(compile_prompts(r"NORM>", True, True).search("norm>"))
+
+	def test_resume_after_match(self):
+		scanner = compile_prompts(("A>", "B>")).scan()
+		self.assertEqual(scanner.feed("A> B>").key, "A>")
+		self.assertEqual(scanner.feed().key, "B>")
+		self.assertIsNone(scanner.feed())
+
+
+if __name__ == '__main__':
+	unittest.main()
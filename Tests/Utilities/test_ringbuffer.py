@@ -0,0 +1,48 @@
+import unittest
+from Utilities.ringbuffer import RingBuffer
+
+
+class TestRingBuffer(unittest.TestCase):
+	def test_fifo(self):
+		rb = RingBuffer(8)
+		rb.write(b"abcdef")
+		self.assertEqual(rb.read(4), b"abcd")
+		rb.write(b"ghijk")  # Wraps around the end
+		self.assertEqual(len(rb), 7)
+		self.assertEqual(rb.peek(), b"efghijk")
+		self.assertEqual(rb.read(), b"efghijk")
+		self.assertEqual(len(rb), 0)
+
+	def test_find_across_wrap(self):
+		rb = RingBuffer(8)
+		rb.write(b"xxxxxx")
+		rb.skip(6)
+		rb.write(b"ab\r\ncd")  # \r\n straddles the wrap point
+		self.assertEqual(rb.find(b"\r\n"), 2)
+		self.assertEqual(rb.find(b"cd"), 4)
+		self.assertEqual(rb.find(b"cd", 5), -1)
+
+	def test_overflow(self):
+		rb = RingBuffer(4)
+		rb.write(b"abc")
+		rb.write(b"de")
+		self.assertEqual(rb.dropped, 1)
+		self.assertEqual(rb.read(), b"bcde")
+		rb.write(b"123456")
+		self.assertEqual(rb.dropped, 3)
+		self.assertEqual(rb.read(), b"3456")
+
+	def test_fill(self):
+		rb = RingBuffer(8)
+		rb.write(b"abcdef")
+		rb.skip(4)
+		def readinto(buf):
+			buf[:] = b"z" * len(buf)
+			return len(buf)
+		self.assertEqual(rb.fill(readinto), 2)  # Up to the end of the buffer
+		self.assertEqual(rb.fill(readinto, 1), 1)
+		self.assertEqual(rb.read(), b"efzzz")
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,115 @@
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from Utilities.SerialPort import SerialPort
+from Utilities.serialhub import SerialHub, SerialSocket, socket_path
+
+
+@unittest.skipUnless(hasattr(os, 'openpty'), "needs a pseudo-terminal")
+class TestSerialHub(unittest.TestCase):
+	def setUp(self):
+		self.master, slave = os.openpty()
+		self.name = os.ttyname(slave)
+		self.hub = SerialHub()
+		self.port = self.hub.open(self.name)
+		os.close(slave)
+
+	def tearDown(self):
+		self.hub.close()
+		os.close(self.master)
+
+	def read_master(self, size):
+		data = b''
+		deadline = time.time() + 2
+		while len(data) < size and time.time() < deadline:
+			data += os.read(self.master, size - len(data))
+		return data
+
+	def test_fan_out(self):
+		self.assertIs(self.hub.open(self.name), self.port)
+		everything = self.port.subscribe()
+		errors = self.hub.subscribe(self.name, filter=r'ERR|FAIL')
+		os.write(self.master, b"boot\r\nBIT FAIL 3\r\nready\r\n")
+		self.assertEqual([everything.recv(1) for i in range(3)], ["boot", "BIT FAIL 3", "ready"])
+		self.assertEqual(errors.recv(1), "BIT FAIL 3")
+		self.assertEqual(errors.recv(0.2), '')
+		errors.close()
+		self.assertEqual(self.port.subscribers, [everything])
+
+	def test_backpressure(self):
+		oldest = self.port.subscribe(maxsize=2)
+		newest = self.port.subscribe(maxsize=2, policy='drop_newest')
+		os.write(self.master, b"1\n2\n3\n4\n")
+		time.sleep(0.2)
+		self.assertEqual((oldest.recv(0), oldest.recv(0)), ("3", "4"))
+		self.assertEqual((newest.recv(0), newest.recv(0)), ("1", "2"))
+		self.assertEqual((oldest.dropped, newest.dropped), (2, 2))
+		self.assertRaises(ValueError, self.port.subscribe, policy='wait')
+
+	def test_serialized_writes(self):
+		lines = [("thread%d message %d" % (t, i)) for t in range(3) for i in range(20)]
+		def writer(t):
+			for i in range(20):
+				self.port.send("thread%d message %d" % (t, i))
+		threads = [threading.Thread(target=writer, args=(t,)) for t in range(3)]
+		for t in threads:
+			t.start()
+		for t in threads:
+			t.join(5)
+		received = self.read_master(sum(len(l) + 1 for l in lines)).decode().split('\n')
+		self.assertEqual(sorted(received[:-1]), sorted(lines))
+
+	def test_socket(self):
+		path = os.path.join(tempfile.mkdtemp(), "hub.sock")
+		self.port.serve(path)
+		local = self.port.subscribe()
+		remote = SerialSocket(path, timeout=1)
+		time.sleep(0.1)  # Lets the server subscribe the client
+		os.write(self.master, b"hello\r\n")
+		self.assertEqual(local.recv(1), "hello")
+		self.assertEqual(remote.readline(), b"hello\n")
+		remote.write(b"status\n")
+		self.assertEqual(self.read_master(7), b"status\n")
+		remote.close()
+		self.assertEqual(os.stat(path).st_mode & 0o777, 0o600)
+		self.port.server.close()
+		self.assertFalse(os.path.exists(path))
+
+	def test_stale_socket(self):
+		master, slave = os.openpty()
+		name = os.ttyname(slave)
+		path = socket_path(name)
+		# Socket file left behind by a hub that is gone
+		stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+		stale.bind(path)
+		stale.close()
+		try:
+			client = SerialPort("UUT", name, asyncr=False, echos=False)
+			self.assertNotIsInstance(client.handle, SerialSocket)
+			client.handle.close()
+		finally:
+			os.unlink(path)
+			os.close(slave)
+			os.close(master)
+
+	def test_serial_port_client(self):
+		self.assertEqual(socket_path(self.name), os.path.join(tempfile.gettempdir(),
+			"serialhub-%s.sock" % os.path.basename(self.name)))
+		self.port.serve()
+		client = SerialPort("UUT", self.name, asyncr=True, echos=False)
+		try:
+			self.assertIsInstance(client.handle, SerialSocket)
+			time.sleep(0.1)
+			threading.Timer(0.05, os.write, (self.master, b"v1.2\r\nOK\r\n")).start()
+			self.assertEqual(client.send_and_wait("ver", "OK", timeout=2, caseSensitive=True), "OK")
+			self.assertEqual(self.read_master(4), b"ver\n")
+		finally:
+			client.receiver.stop()
+			client.handle.close()
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,57 @@
+import os
+import re
+import threading
+import time
+import unittest
+from Utilities.SerialPort import SerialPort
+from Utilities.matcher import PromptMatcher
+
+
+@unittest.skipUnless(hasattr(os, 'openpty'), "needs a pseudo-terminal")
+class TestSerialReceiver(unittest.TestCase):
+	def setUp(self):
+		self.master, slave = os.openpty()
+		self.port = SerialPort("UUT", os.ttyname(slave), asyncr=True, echos=False)
+		os.close(slave)
+
+	def tearDown(self):
+		self.port.receiver.stop()
+		self.port.handle.close()
+		os.close(self.master)
+
+	def test_line(self):
+		start = time.perf_counter()
+		os.write(self.master, b"first\r\nsec")
+		self.assertEqual(self.port.q.get(timeout=1), "first")
+		self.assertLess(time.perf_counter() - start, 0.1)
+		os.write(self.master, b"ond\r\n")
+		self.assertEqual(self.port.q.get(timeout=1), "second")
+
+	def test_prompt(self):
+		os.write(self.master, b"NORM>")
+		self.assertEqual(self.port.recv(), "NORM>")
+
+	def test_send_and_wait(self):
+		threading.Timer(0.05, os.write, (self.master, b"ver 1.2\r\nOK\r\n")).start()
+		start = time.perf_counter()
+		self.assertEqual(self.port.send_and_wait("ver", "OK", timeout=2, caseSensitive=True), "OK")
+		self.assertLess(time.perf_counter() - start, 0.3)
+		self.assertEqual(os.read(self.master, 64), b"ver\n")
+
+	def test_expect(self):
+		prompts = PromptMatcher({'NORM': 'NORM>', 'CONSOLE': re.compile(r'^#', re.M)})
+		threading.Timer(0.05, os.write, (self.master, b"debug # 1\r\n# ")).start()
+		match = self.port.expect(prompts, timeout=2)
+		self.assertEqual(match.key, 'CONSOLE')
+		self.assertEqual(self.port.waitFor("norm>", 0.2, False), '')
+		self.assertRaises(SerialPort.Timeout, self.port.waitFor, "norm>", 0.2)
+
+	def test_stop(self):
+		start = time.perf_counter()
+		self.port.receiver.stop()
+		self.assertLess(time.perf_counter() - start, 0.1)
+		self.assertFalse(self.port.t.is_alive())
+
+
+if __name__ == '__main__':
+	unittest.main()
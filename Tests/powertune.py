@@ -5,7 +5,8 @@ Created on Thu Feb 12 12:29:52 2020
 @author: asasson
 """
 
-from Adapters.visa import VISAAdapter
+from Adapters.pool import acquire
+from Adapters.visa import resource_manager
 from Instruments.instrument import splitResourceID
 from Instruments.powmeter import PowerMeter
 from Instruments.powsupply import LambdaPS
@@ -14,7 +15,6 @@ from Tests.test import Test
 #import Utilities.Station
 from math import exp
 import time
-import visa
 
 
 class PowerTune(Test):
@@ -24,6 +24,7 @@ class PowerTune(Test):
 		super(PowerTune,self).__init__()
 		self._name = "PowerTune"
 		self._pm = pm
+		self._pm.enable_dedupe()	# The tune loops set the same frequency and offsets over and over
 		self._ch = ch
 		self._red = ch.red
 		self._blk = ch.blk
@@ -284,23 +285,20 @@ if __name__ == "__main__":
 	logfile = open("C:\\Users\\asasson\\Documents\\Logs\\ptune.txt","w")
 	logfile.write("Log file\n")
 	logfile.flush()
-	rm = visa.ResourceManager()
 	try:
-		print('Available Instruments: \n\n', rm.list_resources(),'\n\n')
-		r = rm.open_resource(addr_ps)
-		mm = splitResourceID(r.query('*idn?')[:-1])
+		print('Available Instruments: \n\n', resource_manager().list_resources(),'\n\n')
+		adptr = acquire(addr_ps)
+		mm = splitResourceID(adptr.ask('*idn?')[:-1])
 		print(mm)
-		adptr = VISAAdapter("TestAdapter", r)
 		ps =  LambdaPS(mm, adptr)
 		#ps.output_state(0)
 		ps.voltage(26)
 		time.sleep(1)
 		ps.output_state(1)
 		
-		r = rm.open_resource(addr_pm)
-		mm = splitResourceID(r.query('*idn?')[:-1])
+		adptr = acquire(addr_pm)
+		mm = splitResourceID(adptr.ask('*idn?')[:-1])
 		print(mm)
-		adptr = VISAAdapter("TestAdapter", r)
 		pm =  PowerMeter(mm, adptr)
 		#time.sleep(30)
 	except:
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+Bus throughput benchmarks against simulated instruments, runnable without
+hardware. The latency and bandwidth defaults approximate a GPIB bus.
+Station.autoinit is only timed where Utilities.devmngr imports, which needs
+PyVISA and the Windows extensions.
+
+	python -m Tests.simbench [latency] [bandwidth]
+"""
+
+from Adapters import pool
+from Adapters.sim import MODELS, SimulatedAdapter, SimulatedBench
+from Instruments.instrument import splitResourceID
+from Instruments.powmeter import PowerMeter
+from Instruments.specan import SpecAnalyzer
+import sys
+import time
+
+
+def bench(name, func, adptr, repeat=20):
+	adptr.transactions = adptr.bytes_read = adptr.bytes_written = 0
+	start = time.perf_counter()
+	for i in range(repeat):
+		func()
+	elapsed = (time.perf_counter() - start) / repeat
+	print("%-24s %8.2f ms %6.1f transactions %9d bytes" % (name, elapsed * 1e3,
+		adptr.transactions / float(repeat), (adptr.bytes_read + adptr.bytes_written) // repeat))
+	return elapsed
+
+
+def tune_step(pm):
+	""" Power meter side of one iteration of PowerTune.tune, whose radio side
+	needs the consoles of a radio
+	"""
+	pm.ch1.freq(300000000)
+	pm.ch1.offset(0.12)
+	return pm.ch1.powerStable(delay=0)
+
+
+def bench_station(latency, bandwidth, repeat=5):
+	""" Times Station.autoinit, the discovery and construction of the drivers of
+	a simulated bench, on the stations where Utilities.devmngr can be imported
+	"""
+	try:
+		from Utilities.devmngr import Station
+	except ImportError as e:
+		print("%-24s skipped: %s" % ("Station.autoinit", e))
+		return None
+	bench = SimulatedBench({
+		"GPIB0::13::INSTR": "E4418B",
+		"GPIB0::22::INSTR": "34410A",
+		"GPIB0::3::INSTR": "53131A",
+		"TCPIP0::10.0.0.2::inst0::INSTR": "N9020A",
+	}, latency=latency, bandwidth=bandwidth, seed=0)
+	factory = pool.pool.factory
+	pool.pool.factory = bench.open
+	try:
+		start = time.perf_counter()
+		for i in range(repeat):
+			pool.pool.close_all()  # Every run probes and opens the bench again
+			Station(rm=bench, discovery=None).close()
+		elapsed = (time.perf_counter() - start) / repeat
+	finally:
+		pool.pool.close_all()
+		pool.pool.factory = factory
+	print("%-24s %8.2f ms" % ("Station.autoinit", elapsed * 1e3))
+	return elapsed
+
+
+def main(latency=0.002, bandwidth=1e6):
+	pm_adptr = SimulatedAdapter('E4418B', latency=latency, bandwidth=bandwidth, seed=0)
+	pm = PowerMeter(splitResourceID(MODELS['E4418B']['*IDN?']), pm_adptr)
+	bench("PowerMeter.power", pm.ch1.power, pm_adptr)
+	bench("PowerMeter.powerStable", lambda: pm.ch1.powerStable(delay=0), pm_adptr, 5)
+	pm.enable_dedupe()  # As PowerTune does
+	bench("PowerTune.tune step", lambda: tune_step(pm), pm_adptr, 5)
+	pm.disable_dedupe()
+
+	sa_adptr = SimulatedAdapter('N9020A', latency=latency, bandwidth=bandwidth, seed=0)
+	sa = SpecAnalyzer(splitResourceID(MODELS['N9020A']['*IDN?']), sa_adptr)
+	bench("SpecAnalyzer.trace", sa.trace, sa_adptr)
+	bench("SpecAnalyzer.peak_search", sa.peak_search, sa_adptr)
+	bench("SpecAnalyzer.set_sweep", lambda: sa.set_frequency_center_span(1e9, 1e6), sa_adptr)
+
+	bench_station(latency, bandwidth)
+
+
+if __name__ == "__main__":
+	main(*[float(arg) for arg in sys.argv[1:]])
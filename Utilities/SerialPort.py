@@ -4,10 +4,17 @@
 import serial
 import time
 import re
+import os
 import queue
+import selectors
 import threading
-import win32pipe
-import win32file
+try:
+	import win32pipe
+	import win32file
+except ImportError:
+	win32pipe = win32file = None  # The SerialProxy named pipes only exist on Windows
+from Utilities.lock import FairLock
+from Utilities.matcher import PromptMatcher, compile_prompts
 
 class SerialPipe(object):
 	""" This class mimics the python serial interface, but instead of 
@@ -73,29 +80,132 @@ class SerialPipe(object):
 		#	data = win32file.ReadFile(self.handle, numBytes)
 		pass
 
-def async_serial_receive(handle,q,stop):
-	""" This is the Asynchronous serial port read thread handler function. """
-	while True:
-		# Read a line from the serial port. If data available, this will timeout 
-		# after handle.timeout seconds and return ''.
+class SerialReceiver(object):
+	""" Asynchronous serial port read thread. Each received line is decoded,
+		stripped and put in the queue as soon as its line-end arrives, and a
+		partial line, such as a prompt, once the port has been quiet for idle
+		seconds. The oldest lines are rolled off the queue when it is full.
+
+		When the handle has a file descriptor (a serial port on Linux), the
+		thread waits on it with a selector, along with a pipe that stop() writes
+		to so that the thread ends at once. Other handles, such as a SerialPipe,
+		are read with their blocking readline().
+			handle: serial.Serial or SerialPipe to read from
+			q: queue.Queue receiving the lines
+			idle: seconds without data before a partial line is queued
+			encoding: encoding of the received text
+			capture: function called with every line, even one the queue drops
+	"""
+	def __init__(self,handle,q,idle=0.1,encoding='utf-8',capture=None):
+		self.handle = handle
+		self.q = q
+		self.idle = idle
+		self.encoding = encoding
+		self.capture = capture
+		self.dropped = 0
+		self._buffer = bytearray()
+		self._stop = threading.Event()
 		try:
-			s = handle.readline()
-		except Exception as e:
-			print("Error reading from serial port!: ", e)
-			s = None
-		
-		# If the read returned a line, then add it to the queue. Do some checking 
-		# to roll old messages off the end of the queue if necessary.
-		if s:
-			if q.full():
-				q.get()
-			q.put(s.strip())
+			self._fd = handle.fileno()
+		except (AttributeError, OSError, ValueError):
+			self._fd = None
+		if self._fd is not None:
+			self._wake_r, self._wake_w = os.pipe()
+		else:
+			self._wake_r = self._wake_w = None
+		self.thread = threading.Thread(target=self.run, name="SerialReceiver")
+		# Make the thread a Daemon so that we don't hang at the end of a 
+		# script if we forget to close the Serial Port
+		self.thread.daemon = True
+
+	def start(self):
+		self.thread.start()
+
+	def stop(self,timeout=5):
+		""" Stops the read thread and waits for it to end. """
+		self._stop.set()
+		if self._wake_w is not None:
+			os.write(self._wake_w, b'\0')
+		if self.thread.is_alive() and self.thread is not threading.current_thread():
+			self.thread.join(timeout)
+		if self._wake_w is not None and not self.thread.is_alive():
+			os.close(self._wake_r)
+			os.close(self._wake_w)
+			self._wake_r = self._wake_w = None
+
+	def run(self):
+		if self._fd is None:
+			self._poll()
 		else:
-			time.sleep(1)
-		# Call the stop function to see if the parent thread is trying to
-		# terminate this helper thread
-		if stop():
-			break
+			self._select()
+
+	def _select(self):
+		with selectors.DefaultSelector() as selector:
+			selector.register(self._fd, selectors.EVENT_READ)
+			selector.register(self._wake_r, selectors.EVENT_READ)
+			while not self._stop.is_set():
+				# Only wake up on a timeout to queue a pending partial line
+				events = selector.select(self.idle if self._buffer else None)
+				if not events:
+					self._push(self._buffer)
+					self._buffer.clear()
+					continue
+				for key, mask in events:
+					if key.fd == self._wake_r:
+						return
+					try:
+						data = os.read(self._fd, 4096)
+					except BlockingIOError:
+						continue
+					except OSError as e:
+						print("Error reading from serial port!: ", e)
+						return
+					if not data:
+						return
+					self._receive(data)
+
+	def _poll(self):
+		while not self._stop.is_set():
+			# Read a line from the serial port. If no data is available, this
+			# returns '' after handle.timeout seconds.
+			try:
+				s = self.handle.readline()
+			except Exception as e:
+				print("Error reading from serial port!: ", e)
+				self._stop.wait(self.idle)
+				continue
+			if s:
+				self._push(s)
+
+	def _receive(self,data):
+		""" Queues the complete lines of data, keeping the rest for later. """
+		self._buffer += data
+		end = self._buffer.rfind(b'\n')
+		if end < 0:
+			return
+		lines = self._buffer[:end].split(b'\n')
+		del self._buffer[:end + 1]
+		for line in lines:
+			self._push(line)
+
+	def _push(self,line):
+		if not isinstance(line, str):
+			line = bytes(line).decode(self.encoding, 'replace')
+		line = line.strip()
+		capture = self.capture
+		if capture is not None:
+			capture(line)
+		# Roll old messages off the end of the queue if necessary
+		while True:
+			try:
+				self.q.put_nowait(line)
+				return
+			except queue.Full:
+				try:
+					self.q.get_nowait()
+					self.dropped += 1
+				except queue.Empty:
+					pass
 
 class SerialPort(object):
 	""" This class encapsulates an ASCII Serial Port and provides 2 distinct
@@ -119,11 +229,12 @@ class SerialPort(object):
 		"""	Exception signifying a thread was blocked from getting access to the serial device"""
 		pass
 
-	def __init__(self,name,port,baud=115200,asyncr=False,tx_term='\n',echos=True):
+	def __init__(self,name,port,baud=115200,asyncr=False,tx_term='\n',echos=True,capture=None):
 		""" SerialPortDevice Constructor.
 				port: a "COMn" string
 				baud: the baud rate to use
 				async: True=use an asynchronous background thread for all reads
+				capture: Capture recording every line sent and received
 		"""
 		if name:
 			self._name = name
@@ -131,10 +242,22 @@ class SerialPort(object):
 			self._name = port
 		# Try to open the Serial Port. First, open it directly. If this 
 		# failes, then attempt to open it via the Proxy named pipe. If that
-		# also fails, throw the error.
+		# also fails, throw the error. On Linux, a port served by the serial
+		# hub is shared through its socket instead.
+		hub_socket = None
+		if win32file is None:
+			from Utilities.serialhub import SerialSocket, socket_path
+			hub_socket = socket_path(port)
+		self.handle = None
 		try:
-			self.handle = serial.Serial(port=port, baudrate=baud, bytesize=8, 
-				parity="N", stopbits=1, timeout=3.0, writeTimeout=3.0, xonxoff=0, rtscts=0)
+			if hub_socket is not None and os.path.exists(hub_socket):
+				try:
+					self.handle = SerialSocket(hub_socket, timeout=3.0)
+				except (ConnectionRefusedError, FileNotFoundError):
+					print("No serial hub serving %s, opening it directly" % port)
+			if self.handle is None:
+				self.handle = serial.Serial(port=port, baudrate=baud, bytesize=8, 
+					parity="N", stopbits=1, timeout=3.0, writeTimeout=3.0, xonxoff=0, rtscts=0)
 		except Exception as e:
 			print("Couldn't connect directly to %s - %s"%(port,e))
 			try:
@@ -143,31 +266,36 @@ class SerialPort(object):
 				raise Exception("Error opening Serial Port: %s!!" % port)
 
 		# If Asynchronous, setup and start the helper thread
-		# Pass a lambda function that just returns the stop flag to support 
-		# stopping the thread.
+		self.capture = None
 		self._async = asyncr
 		if self._async:
-			self.stop = False
 			self.q = queue.Queue(maxsize=4096)
-			self.t = threading.Thread(target=async_serial_receive, args=(self.handle, self.q, lambda:self.stop))
-			# Make the thread a Daemon so that we don't hang at the end of a 
-			# script if we forget to close the Serial Port
-			self.t.daemon = True
-			self.t.start()
+			self.receiver = SerialReceiver(self.handle, self.q)
+			self.t = self.receiver.thread
+		self.set_capture(capture)
+		if self._async:
+			self.receiver.start()
 		
 		self.port = port
-		self._lock = threading.RLock()  # re-entrant lock object for thread safe writes
+		self._lock = FairLock(port)  # re-entrant lock object for thread safe writes, granted in request order
 		self.tx_terminator = tx_term #'\n'
 		self.echos = echos
 
 	def __del__(self):
 		self.close()
 
+	def set_capture(self,capture):
+		""" Records every line sent and received in capture, a Capture, or stops
+			recording if None. """
+		self.capture = capture
+		if hasattr(self,'receiver'):
+			name = self._name
+			self.receiver.capture = None if capture is None else (lambda line: capture.rx(name, line))
+
 	def close(self):
 		""" Closes the serial port and stops the Asynchronous read-thread. """
-		if hasattr(self,'_async') and self._async:
-			self.stop = True
-			self.t.join()
+		if hasattr(self,'receiver'):
+			self.receiver.stop()
 		if hasattr(self,'handle'):
 			self.handle.close()
 		if hasattr(self,'port'):
@@ -176,6 +304,15 @@ class SerialPort(object):
 	def send(self,sendStr):
 		""" Writes the given string to the serial port. """
 		self._get_mutex()
+		try:
+			self._write(sendStr)
+		finally:
+			self._release_lock()
+
+	def _write(self,sendStr):
+		""" Writes the given string to the serial port, with the mutex held. """
+		if self.capture is not None:
+			self.capture.tx(self._name, sendStr.strip())
 		try:
 			self.handle.write((sendStr + self.tx_terminator).encode())
 		except serial.writeTimeoutError:
@@ -183,8 +320,6 @@ class SerialPort(object):
 			# tx_terminator to see if that gets things through... if not,
 			# then, we'll just except again
 			self.handle.write(self.tx_terminator.encode())
-		finally:
-			self._release_lock()
 
 	def send_and_wait(self,sendStr,waitStr,timeout=10,timeoutException=True,useRegex=False,caseSensitive=False):
 		""" Writes a string to the serial port, then waits for the given 
@@ -203,32 +338,35 @@ class SerialPort(object):
 				and timeoutException==False)
 		"""
 		self._get_mutex()
-		self.flush_recv()
-		self.send(sendStr)
+		try:
+			self.flush_recv()
+			self._write(sendStr)
 
-		# If this port supports echo'ing of the sends, wait for the read-back
-		# before continuing.
-		if self.echos:
-			self.waitfor(sendStr.strip(),timeout,False,False)
+			# If this port supports echo'ing of the sends, wait for the read-back
+			# before continuing.
+			if self.echos:
+				self.waitFor(sendStr.strip(),timeout,False,False)
 
-		try:
-			return self.waitfor(waitStr,timeout,timeoutException,useRegex,caseSensitive)
+			return self.waitFor(waitStr,timeout,timeoutException,useRegex,caseSensitive)
 		except SerialPort.Timeout:
 			raise SerialPort.Timeout("SerialPortDevice.send_and_wait() timed out. Command: '%s', waited for: '%s'" % (sendStr, waitStr))
 		finally:
 			self._release_lock()
 
-	def recv(self, pub=True):
-		""" Reads a line from the serial port. """
+	def recv(self, pub=True, timeout=None):
+		""" Reads a line from the serial port. In asynchronous mode, waits at 
+			most timeout seconds if given, rather than the port timeout. """
 		# If Asynchronous, read from the Queue (that is filled by the read
 		# thread). If Synchronous, read from the serial port directly.
 		if self._async:
 			try:
-				return self.q.get(timeout=self.handle.timeout)
+				return self.q.get(timeout=self.handle.timeout if timeout is None else timeout)
 			except queue.Empty:
 				return ''
 		else:
 			s = self.handle.readline().strip().decode()
+			if s and self.capture is not None:
+				self.capture.rx(self._name, s)
 			if pub : print(s)
 			return s
 	
@@ -263,7 +401,8 @@ class SerialPort(object):
 
 	def waitFor(self,waitStr,timeout=10,timeoutException=True,useRegex=False,caseSensitive=False):
 		""" Reads from the serial port until waitStr is matched.
-				waitStr: sub string or regex to wait on (if this string matches any part of a read line, return)
+				waitStr: sub string or regex to wait on (if this string matches any part of a read line, return),
+						 or a PromptMatcher
 				timeout: timeout in seconds
 				timeoutException: if True and timed-out, raise the Timeout exception; otherwise return ''
 				useRegex: if True, treat waitStr as a regex expression; if false
@@ -272,30 +411,35 @@ class SerialPort(object):
 			Returns the full line containing the waitStr (or '' if timed-out 
 				and timeoutException==False)
 		"""
-		start_time = time.time()
-		if useRegex:
-			rg = re.compile(waitStr,re.IGNORECASE if not caseSensitive else 0)
-			while (time.time() - start_time) < timeout:
-				s = self.recv()
-				#print(s)
-				if s is not None:
-					m = rg.search(s)
-					if m:
-						return s.strip()
-		else:
-			while (time.time() - start_time) < timeout:
-				s = self.recv()
-				if s is not None:
-					s = s if caseSensitive else s.lower()
-					waitStr = waitStr if caseSensitive else waitStr.lower()
-					if s.find(waitStr) >= 0:
-						return s.strip()
+		if not isinstance(waitStr, PromptMatcher):
+			waitStr = compile_prompts(waitStr, useRegex, caseSensitive)
+		match = self.expect(waitStr, timeout)
+		if match is not None:
+			return match.line
 
 		if timeoutException:
-			raise SerialPort.Timeout("SerialPort.waitfor() timed out waiting for '%s'" % waitStr)
+			raise SerialPort.Timeout("SerialPort.waitfor() timed out waiting for '%s'" % "' or '".join(map(str, waitStr.keys)))
 		else:
 			return ''
 
+	def expect(self,prompts,timeout=10):
+		""" Reads from the serial port until one of prompts is matched, even
+			across lines.
+				prompts: PromptMatcher of the prompts to wait on
+				timeout: timeout in seconds
+			Returns the PromptMatch telling which prompt matched and the
+				matched text, or None if timed-out
+		"""
+		scanner = prompts.scan()
+		start_time = time.time()
+		while (time.time() - start_time) < timeout:
+			s = self.recv(timeout=max(0, start_time + timeout - time.time()))
+			if s:
+				match = scanner.feed(s + '\n')
+				if match is not None:
+					return match
+		return None
+
 	def lock(self, timeout=15):
 		"""	Method to lock a serial port device so that atomic writes can be performed.  The lock is re-entrant so the
 		thread that owns the lock can perform writes on the serial device any number of times.
@@ -310,6 +454,10 @@ class SerialPort(object):
 	def _release_lock(self):
 		self._lock.release()
 
+	def lock_stats(self):
+		"""	Returns the statistics of the waits for the serial port mutex, see FairLock.stats() """
+		return self._lock.stats()
+
 	def _get_mutex(self, timeout=10):
 		"""	Private method to get mutex lock prior to writing data to serial port.  This call is blocking.
 		Args:
@@ -317,20 +465,5 @@ class SerialPort(object):
 		Raises:
 			Timeout
 		"""
-		attempts = 0
-		wait_time = 0.1	 # seconds
-		elapsed_time = 0
-		start_time = time.time()
-		lock_status = self._lock.acquire(0)  # attempt to get the lock
-		if lock_status:
-			return
-		else:
-			# another thread locked the serial port so we'll wait and try again
-			while not lock_status:
-				elapsed_time = time.time() - start_time
-				if elapsed_time > timeout:
-					raise SerialPort.ThreadLockTimeout("Timed out waiting for mutex")
-				else:
-					time.sleep(wait_time)
-					attempts += 1
-					lock_status = self._lock.acquire(0)
+		if not self._lock.acquire(timeout=timeout):
+			raise SerialPort.ThreadLockTimeout("Timed out waiting for mutex")
@@ -9,6 +9,7 @@ import Queue
 import win32pipe
 import win32file
 import logging
+from Utilities.lock import FairLock
 
 class SerialPipe(object):
 	""" This class mimics the python serial interface, but instead of 
@@ -174,7 +175,7 @@ class SerialPortDevice(object):
 			self.t.start()
 			
 		self.port = port
-		self._lock = threading.RLock()  # re-entrant lock object for thread safe writes
+		self._lock = FairLock(port)  # re-entrant lock object for thread safe writes, granted in request order
 		self.logger.debug("SerialPortDevice: Port Opened: %s"%(self.port))
 
 
@@ -194,6 +195,13 @@ class SerialPortDevice(object):
 	def send(self,sendStr):
 		""" Writes the given string to the serial port. """
 		self._get_mutex()
+		try:
+			self._write(sendStr)
+		finally:
+			self._release_lock()
+
+	def _write(self,sendStr):
+		""" Writes the given string to the serial port, with the mutex held. """
 		self.logger.debug("TX: '%s'" % sendStr.strip())
 		try:
 			self.handle.write((sendStr + self.tx_terminator).encode())
@@ -203,8 +211,6 @@ class SerialPortDevice(object):
 			# then, we'll just except again
 			self.logger.warning("Tx Write Timeout!! Trying again...")
 			self.handle.write(self.tx_terminator.encode())
-		finally:
-			self._release_lock()
 
 	def recv(self):
 		""" Reads a line from the serial port. """
@@ -241,15 +247,15 @@ class SerialPortDevice(object):
 		#self.logger.debug(self.send_and_wait.__name__ + "('%s','%s',%d)" % (sendStr,waitStr,timeout))
 
 		self._get_mutex()
-		self.flush_recv()
-		self.send(sendStr)
+		try:
+			self.flush_recv()
+			self._write(sendStr)
 
-		# If this port supports echo'ing of the sends, wait for the read-back
-		# before continuing.
-		if self.echos:
-			self.waitfor(sendStr.strip(),timeout,False,False)
+			# If this port supports echo'ing of the sends, wait for the read-back
+			# before continuing.
+			if self.echos:
+				self.waitfor(sendStr.strip(),timeout,False,False)
 
-		try:
 			return self.waitfor(waitStr,timeout,timeoutException,useRegex,caseSensitive)
 		except SerialPortDevice.Timeout:
 			raise SerialPortDevice.Timeout("SerialPortDevice.send_and_wait() timed out. Command: '%s', waited for: '%s'" % (sendStr, waitStr))
@@ -349,26 +355,13 @@ class SerialPortDevice(object):
 		Raises:
 			Timeout
 		"""
-		attempts = 0
-		wait_time = 0.1	 # seconds
-		elapsed_time = 0
-		start_time = time.time()
-		lock_status = self._lock.acquire(0)  # attempt to get the lock
-		if lock_status:
+		if self._lock.acquire(False):
 			return
-		else:
-			# another thread locked the serial port so we'll wait and try again
-			while not lock_status:
-
-				elapsed_time = time.time() - start_time
-				if elapsed_time > timeout:
-					raise SerialPortDevice.ThreadLockTimeout("Timed out waiting for mutex")
-				else:
-					time.sleep(wait_time)
-					attempts += 1
-					lock_status = self._lock.acquire(0)
-
-			self.logger.debug("Mutex acquired after %d attempts (%.2f seconds)" % (attempts, elapsed_time))
+		# another thread locked the serial port so we'll wait our turn
+		start_time = time.time()
+		if not self._lock.acquire(timeout=timeout):
+			raise SerialPortDevice.ThreadLockTimeout("Timed out waiting for mutex")
+		self.logger.debug("Mutex acquired after %.2f seconds" % (time.time() - start_time))
 
 	def _release_lock(self):
 		self._lock.release()
@@ -0,0 +1,259 @@
+"""
+ capture: Timestamped transcripts of the console traffic
+"""
+import atexit
+import datetime
+import glob
+import mmap
+import os
+import queue
+import re
+import struct
+import threading
+import time
+from collections import namedtuple
+
+RX = 0
+TX = 1
+NOTE = 2
+DIRECTIONS = ('RX', 'TX', '--')
+
+# Index entry of a record: time, offset of the record in the segment, length of
+# the record, offset of the text in the record and direction
+INDEX = struct.Struct('<dIIHB')
+
+
+class CaptureRecord(namedtuple('CaptureRecord', 'time direction source text')):
+	""" Line of a capture: the time it was captured, RX, TX or NOTE, the name of
+	the port or console, and the text
+	"""
+	__slots__ = ()
+
+	def __str__(self):
+		return _format(self.time, self.direction, self.source, self.text)[0]
+
+
+def _format(t, direction, source, text):
+	""" Returns the transcript line of a record and the length of its header """
+	header = "%s %s %s: " % (datetime.datetime.fromtimestamp(t).isoformat(timespec='microseconds'),
+		DIRECTIONS[direction], source)
+	return header + text, len(header)
+
+
+class CaptureLog(object):
+	""" Append-only transcript split into segment files. Each segment is a text
+	file written through a memory map of segment_size bytes, so that appending a
+	line is a copy into memory, and the operating system writes the pages back
+	on its own. A segment is cut to the length used when the next one starts.
+
+	Next to each segment, an index file holds one :data:`INDEX` entry per line,
+	from which :meth:`records` reads the lines back without parsing the text.
+
+		directory/console.000001.log	2026-10-18T09:30:00.125000 TX COM6: bit
+		directory/console.000001.idx
+
+	This class is not thread-safe; :class:`Capture` writes it from one thread.
+
+	:param directory: Directory of the segment files, created if needed
+	:param name: Prefix of the segment files
+	:param segment_size: Bytes of a segment
+	:param max_segments: Segments kept, the oldest being deleted, or None to keep all
+	"""
+	def __init__(self, directory, name='console', segment_size=16 * 1024 * 1024, max_segments=None):
+		self.directory = directory
+		self.name = name
+		self.segment_size = segment_size
+		self.max_segments = max_segments
+		self._map = None
+		self._file = None
+		self._index = None
+		self._position = 0
+		os.makedirs(directory, exist_ok=True)
+		segments = self.segments()
+		self.segment = segments[-1] + 1 if segments else 1
+		self._open()
+
+	def __repr__(self):
+		return "<CaptureLog(%r, %r, segment %d)>" % (self.directory, self.name, self.segment)
+
+	def _path(self, segment, extension):
+		return os.path.join(self.directory, "%s.%06d.%s" % (self.name, segment, extension))
+
+	def segments(self):
+		""" Returns the numbers of the segments on disk, oldest first """
+		pattern = re.compile(re.escape(self.name) + r'\.(\d{6})\.log$')
+		found = []
+		for path in glob.glob(os.path.join(glob.escape(self.directory), glob.escape(self.name) + ".*.log")):
+			match = pattern.match(os.path.basename(path))
+			if match:
+				found.append(int(match.group(1)))
+		return sorted(found)
+
+	def _open(self):
+		self._file = open(self._path(self.segment, 'log'), 'w+b')
+		self._file.truncate(self.segment_size)
+		self._map = mmap.mmap(self._file.fileno(), self.segment_size)
+		self._index = open(self._path(self.segment, 'idx'), 'wb')
+		self._position = 0
+
+	def _close_segment(self):
+		self._index.close()
+		self._map.close()
+		self._file.truncate(self._position)
+		self._file.close()
+		self._map = self._file = self._index = None
+
+	def _rotate(self):
+		self._close_segment()
+		self.segment += 1
+		self._open()
+		if self.max_segments:
+			for old in self.segments()[:-self.max_segments]:
+				for extension in ('log', 'idx'):
+					try:
+						os.remove(self._path(old, extension))
+					except OSError:
+						pass
+
+	def append(self, t, direction, source, text):
+		""" Adds a line to the transcript
+
+		:param t: Time of the line, as returned by time.time()
+		:param direction: RX, TX or NOTE
+		"""
+		line, header = _format(t, direction, source, text)
+		data = (line + '\n').encode('utf-8', 'replace')
+		if self._position + len(data) > self.segment_size and self._position:
+			self._rotate()
+		if len(data) > self.segment_size:
+			data = data[:self.segment_size - 1] + b'\n'
+		self._map[self._position:self._position + len(data)] = data
+		self._index.write(INDEX.pack(t, self._position, len(data) - 1, min(header, 0xffff), direction))
+		self._position += len(data)
+
+	def flush(self):
+		""" Writes the index out, so that readers see every line appended """
+		if self._index is not None:
+			self._index.flush()
+
+	def close(self):
+		if self._map is not None:
+			self._close_segment()
+
+	def records(self, start=None, end=None):
+		""" Yields the CaptureRecord of every line kept, oldest first, or of the
+		lines captured between the times start and end. A segment is read up to
+		the first record left NUL, where a capture that did not close ended.
+		"""
+		self.flush()
+		for segment in self.segments():
+			try:
+				with open(self._path(segment, 'idx'), 'rb') as f:
+					index = f.read()
+			except OSError:
+				continue
+			count = len(index) // INDEX.size
+			if not count:
+				continue
+			if (start is not None and INDEX.unpack_from(index, (count - 1) * INDEX.size)[0] < start) or \
+				(end is not None and INDEX.unpack_from(index, 0)[0] > end):
+				continue
+			with open(self._path(segment, 'log'), 'rb') as f:
+				data = f.read()
+			for t, offset, length, header, direction in INDEX.iter_unpack(index[:count * INDEX.size]):
+				if data[offset:offset + 1] in (b'', b'\0'):
+					break  # Indexed, but never written out: a record starts with its time
+				if (start is not None and t < start) or (end is not None and t > end):
+					continue
+				line = data[offset:offset + length].decode('utf-8', 'replace')
+				source = line[:header - 2].split(' ', 2)[2]
+				yield CaptureRecord(t, direction, source, line[header:])
+
+
+_STOP = object()
+
+
+class Capture(object):
+	""" Records the lines sent and received by consoles into a
+	:class:`CaptureLog` from a thread of its own. Recording a line only puts it
+	in an unbounded queue, so the serial port read threads never wait for the
+	disk, and no line is dropped however far behind the writer falls. The index
+	is written out whenever the writer has caught up, and the capture is closed
+	when the interpreter exits.
+
+	.. code-block:: python
+
+		capture = Capture("C:\\\\Logs\\\\soak", "radio1")
+		rcp = Console("RCP", "COM6", capture=capture)
+		...
+		capture.close()
+		for record in capture.log.records():
+			print(record)
+
+	:param directory: Directory of the segment files
+	:param name: Prefix of the segment files
+	:param kwargs: Key-word arguments of :class:`CaptureLog`
+	"""
+	def __init__(self, directory, name='console', **kwargs):
+		self.log = CaptureLog(directory, name, **kwargs)
+		self.lines = 0
+		self._queue = queue.SimpleQueue()
+		self.thread = threading.Thread(target=self._run, name="Capture")
+		self.thread.daemon = True
+		self.thread.start()
+		atexit.register(self.close)
+
+	def __repr__(self):
+		return "<Capture(%r, %d lines)>" % (self.log, self.lines)
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, type, value, traceback):
+		self.close()
+
+	def record(self, direction, source, text):
+		""" Queues a line for the transcript, timestamped now """
+		self._queue.put((time.time(), direction, source, text))
+
+	def rx(self, source, text):
+		self.record(RX, source, text)
+
+	def tx(self, source, text):
+		self.record(TX, source, text)
+
+	def note(self, source, text):
+		self.record(NOTE, source, text)
+
+	def _run(self):
+		while True:
+			item = self._queue.get()
+			if item is _STOP:
+				break
+			if isinstance(item, threading.Event):
+				self.log.flush()
+				item.set()
+				continue
+			try:
+				self.log.append(*item)
+				self.lines += 1
+				if self._queue.empty():
+					self.log.flush()
+			except Exception as e:
+				print("Capture error: ", e)
+		self.log.close()
+
+	def flush(self, timeout=None):
+		""" Waits until the lines recorded so far are in the transcript """
+		if not self.thread.is_alive():
+			return True
+		done = threading.Event()
+		self._queue.put(done)
+		return done.wait(timeout)
+
+	def close(self):
+		""" Writes the remaining lines and closes the transcript """
+		atexit.unregister(self.close)
+		if self.thread.is_alive():
+			self._queue.put(_STOP)
+			self.thread.join()
@@ -5,7 +5,8 @@ Created on Mon Feb 17 13:26:43 2020
 @author: asasson
 """
 from collections import defaultdict
-from Adapters.visa import VISAAdapter
+from Adapters.pool import acquire
+from Adapters.visa import resource_manager
 from Instruments import Adu2xx
 from Instruments.audiomod import AudioAnalyzer, ModulationAnalyzer
 from Instruments.dmm import DMM
@@ -13,6 +14,7 @@ from Instruments.fireberd import FireBERD
 from Instruments.freqcount import FreqCounter
 from Instruments.generators import SigGen, ArbGen
 from Instruments.instrument import splitResourceID
+from Instruments.registry import registry
 from Instruments.gps import GSG
 from Instruments.netan import NetAnalyzer
 from Instruments.powmeter import PowerMeter#, DualPowerMeter
@@ -24,20 +26,30 @@ import Radio.radio
 from Radio.radio import Console, Channel, Radio
 import Utilities.win
 import Utilities.config
+from Utilities.discovery import DiscoveryCache, discover
+import os
 import time
 import visa
 
+# Identifications of the bench instruments kept between runs, on the Windows stations
+DISCOVERY_FILE = "C:\\Harris\\discovery.json" if os.name == 'nt' else None
+
 adu_types = ["ADU"]
 com_types = ["CON", "STP", "RCP", "RED", "BLK", "RUT", "BUT", "RFSW"]
+# Drivers detected by Station, registered by importing them
 res_types = [AudioAnalyzer, ArbGen, DMM, FireBERD, FreqCounter, ModulationAnalyzer, NetAnalyzer, 
 			PowerMeter, PS, XantrexPS, DSO, MSO, rfSW, SigGen, GSG, SpecAnalyzer]
 
 
 class Station():
-	def __init__(self, logfile=None, debugOn=False):
+	def __init__(self, logfile=None, debugOn=False, rm=None, discovery=DISCOVERY_FILE,
+				 timeout=5.0):
 		""" Console Constructor
 			name: any string (ie, 'RCP')
 			logfile: log file name ('.txt')
+			rm: resource manager listing the instruments, the shared VISA one by default
+			discovery: file caching the identifications of the instruments, or None
+			timeout: seconds an instrument has to identify itself
 			"""
 		self._debugOn = debugOn
 		self._savedconfig = Utilities.config.get()
@@ -51,7 +63,9 @@ class Station():
 			print('Drives: ', self._drives)
 			print('Ports : ', self._ports)
 		self._hardreset = False
-		self._rm = visa.ResourceManager()
+		self._rm = rm if rm is not None else resource_manager()
+		self._discovery = DiscoveryCache(discovery) if discovery else None
+		self._timeout = timeout
 		#try:
 		self.autoinit()
 		if self._debugOn : print('Opened Instruments: \n\n', self._instruments,'\n\n')
@@ -84,6 +98,7 @@ class Station():
 		self._hardreset = None
 		self._ports = None
 		self._rm = None
+		self._discovery = None
 		self._resources = None
 		self._visaresources = None
 
@@ -136,12 +151,20 @@ class Station():
 			elif(typ == "CON"):
 				pass
 			elif(typ == "VISA"):
-				for instr in reslist:
+				# Build the instruments as they identify themselves
+				for instr, idn in discover(reslist, self._discovery, self._timeout):
+					if(idn is None):
+						print(instr, ":", "No identification: check connections")
+						continue
 					try:
-						self.addInstrument(instr)
+						self.addInstrument(instr, idn)
 					except visa.VisaIOError as e:
 						print(instr, ":", "Visa IO Error: check connections")
 						print(e)
+						if(self._discovery is not None):
+							self._discovery.forget(instr)
+				if(self._discovery is not None):
+					self._discovery.save()
 			else:
 				print("What the hell is this?")
 		return True
@@ -159,21 +182,26 @@ class Station():
 	def addDevice(self, name, addr):
 		pass
 	
-	def addInstrument(self, addr):
-		res = self._rm.open_resource(addr)
+	def addInstrument(self, addr, idn=None):
+		""" Builds the driver of the instrument at addr
+			idn: identification of the instrument, asked when None
+			"""
+		adptr = acquire(addr)
 		try:
-			idn = res.query('*idn?')[:-1]
-			if(idn == ''):
-				idn = res.query('ID?')
+			if(idn is None):
+				idn = adptr.ask('*idn?')[:-1]
+				if(idn == ''):
+					idn = adptr.ask('ID?')
 			mm = splitResourceID(idn)
-			resadptr = VISAAdapter(mm[1], res)
 			if self._debugOn : print("\t", addr, ":", idn)
-			for icls in res_types:
-				sup = icls.checkSupport(mm[1])
-				if(sup):
-					self._instruments[sup].append(icls(mm,resadptr))
+			icls = registry.lookup(mm[1])
+			if(icls is not None):
+				self._instruments[icls.models[0]].append(icls(mm, acquire(addr)))
+			elif self._debugOn : print("\t", addr, ":", "No driver for", mm[1])
 		except visa.Error:
 			idn = "Not known"
+		finally:
+			adptr.close()
 
 	def closeConsole(self, port):
 		pass
@@ -0,0 +1,198 @@
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from Adapters.pool import acquire
+
+# Probes allowed at once per bus type; a GPIB board serves one talker at a time
+BUS_LIMITS = {'GPIB': 1}
+
+
+def bus_of(resource):
+	""" Returns the bus of a VISA resource name, such as 'GPIB0' or 'TCPIP0'. GPIB
+	primary addresses are on 'GPIB0'.
+	"""
+	if isinstance(resource, int):
+		return 'GPIB0'
+	return str(resource).strip().split('::', 1)[0].upper()
+
+
+def identify(adapter):
+	""" Returns the identification string of an instrument, asking ID? when it
+	does not answer *IDN?
+	"""
+	try:
+		idn = adapter.ask("*IDN?").strip()
+	except Exception:
+		idn = ''
+	if idn == '':
+		idn = adapter.ask("ID?").strip()
+	return idn
+
+
+class DiscoveryCache(object):
+	""" Identifications of the resources found by earlier discoveries, saved as
+	JSON so that a warm start does not probe them again.
+
+	:param path: JSON file, or None to keep the cache in memory
+	:param max_age: Seconds after which an identification is probed again, or
+					None to keep it until forgotten
+	"""
+	def __init__(self, path=None, max_age=None):
+		self.path = path
+		self.max_age = max_age
+		self._entries = {}
+		self._lock = threading.Lock()
+		self._dirty = False
+		self.load()
+
+	def __len__(self):
+		return len(self._entries)
+
+	def __repr__(self):
+		return "<DiscoveryCache({!r}, {} resources)>".format(self.path, len(self._entries))
+
+	def load(self):
+		""" Reads the saved identifications, if any """
+		if self.path is None or not os.path.exists(self.path):
+			return
+		try:
+			with open(self.path, "r") as f:
+				entries = json.load(f)
+		except (OSError, ValueError) as e:
+			print("Discovery cache error, probing every resource:", e)
+			return
+		with self._lock:
+			self._entries = dict((str(r), (e['idn'], e['time'])) for r, e in entries.items())
+
+	def save(self):
+		""" Writes the identifications if they changed since loaded """
+		if self.path is None or not self._dirty:
+			return
+		with self._lock:
+			entries = dict((r, {'idn': idn, 'time': t}) for r, (idn, t) in self._entries.items())
+			self._dirty = False
+		temp = self.path + ".tmp"
+		try:
+			with open(temp, "w") as f:
+				json.dump(entries, f, indent=1, sort_keys=True)
+			os.replace(temp, self.path)
+		except OSError as e:
+			print("Discovery cache not saved:", e)
+
+	def get(self, resource):
+		""" Returns the identification of resource, or None if unknown or too old """
+		with self._lock:
+			entry = self._entries.get(str(resource))
+		if entry is None or (self.max_age is not None and time.time() - entry[1] > self.max_age):
+			return None
+		return entry[0]
+
+	def put(self, resource, idn):
+		with self._lock:
+			self._entries[str(resource)] = (idn, time.time())
+			self._dirty = True
+
+	def forget(self, resource=None):
+		""" Forgets the identification of resource, or of every resource """
+		with self._lock:
+			if resource is None:
+				self._entries.clear()
+			else:
+				self._entries.pop(str(resource), None)
+			self._dirty = True
+
+
+def discover(resources, cache=None, timeout=5.0, workers=8, bus_limits=None, opener=acquire, **kwargs):
+	""" Identifies resources concurrently and yields (resource, idn) pairs as the
+	identifications arrive, so that instruments can be built while the slower
+	ones are still being probed. The idn is None for a resource that failed or
+	did not answer within timeout seconds of its probe starting.
+
+	Probes run in a thread pool, but never more at once on one bus than
+	:data:`BUS_LIMITS` allows for its type. A probe that runs out of time is no
+	longer waited for, but keeps its place on the bus until its thread returns,
+	since it may still be talking to the board.
+	Resources known to the cache are yielded first without probing, and new
+	identifications are saved to it.
+
+	.. code-block:: python
+
+		for addr, idn in discover(rm.list_resources(), DiscoveryCache("discovery.json")):
+			...
+
+	:param resources: VISA resource names or GPIB primary addresses
+	:param cache: :class:`DiscoveryCache`, or None to probe every resource
+	:param timeout: Seconds each probe may take
+	:param workers: Number of probing threads
+	:param bus_limits: Probes allowed at once per bus type, over BUS_LIMITS
+	:param opener: Function returning an adapter for a resource
+	:param kwargs: Key-word arguments of the opener
+	"""
+	limits = dict(BUS_LIMITS)
+	limits.update(bus_limits or {})
+	known = []
+	probes = []
+	for resource in dict.fromkeys(resources):
+		idn = cache.get(resource) if cache is not None else None
+		if idn:
+			known.append((resource, idn))
+		else:
+			probes.append(resource)
+
+	semaphores = {}
+	for bus in set(bus_of(r) for r in probes):
+		limit = limits.get(re.match(r'[A-Z]*', bus).group(0))
+		if limit:
+			semaphores[bus] = threading.BoundedSemaphore(limit)
+	started = {}
+
+	def probe(resource):
+		semaphore = semaphores.get(bus_of(resource))
+		if semaphore is not None:
+			semaphore.acquire()
+		try:
+			started[resource] = time.monotonic()
+			adapter = opener(resource, **kwargs)
+			try:
+				return identify(adapter)
+			finally:
+				adapter.close()
+		finally:
+			if semaphore is not None:
+				semaphore.release()
+
+	executor = ThreadPoolExecutor(max(1, min(workers, len(probes))), thread_name_prefix="discover")
+	futures = dict((executor.submit(probe, r), r) for r in probes)
+	try:
+		for resource, idn in known:
+			yield resource, idn
+		while futures:
+			expiry = [started[r] + timeout for r in futures.values() if r in started]
+			delay = max(0, min(expiry) - time.monotonic()) if expiry else timeout
+			done, _ = wait(futures, delay, FIRST_COMPLETED)
+			for future in done:
+				resource = futures.pop(future)
+				try:
+					idn = future.result() or None
+				except Exception as e:
+					print(resource, ":", e)
+					idn = None
+				if idn and cache is not None:
+					cache.put(resource, idn)
+				yield resource, idn
+			now = time.monotonic()
+			for future, resource in list(futures.items()):
+				if resource in started and now - started[resource] >= timeout:
+					# The probe thread is left to finish on its own, holding its bus
+					del futures[future]
+					print(resource, ":", "No identification within", timeout, "s")
+					yield resource, None
+	finally:
+		for future in futures:
+			future.cancel()
+		executor.shutdown(wait=False)
+		if cache is not None:
+			cache.save()
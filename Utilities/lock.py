@@ -0,0 +1,122 @@
+import threading
+import time
+from collections import deque
+
+
+class FairLock(object):
+	""" Re-entrant lock handed out in the order it was requested, so that no
+	thread is starved by others grabbing the lock again as soon as they release
+	it. Each waiter blocks on a lock of its own, which the releasing thread
+	opens once it has made the waiter the owner, so that the hand-off takes no
+	polling.
+
+	The time spent waiting for the lock is recorded, see :meth:`stats`.
+
+	.. code-block:: python
+
+		lock = FairLock("COM6")
+		if lock.acquire(timeout=10):
+			try:
+				...
+			finally:
+				lock.release()
+
+	:param name: Name shown by repr, such as the port the lock protects
+	"""
+	def __init__(self, name=None):
+		self.name = name
+		self._mutex = threading.Lock()
+		self._owner = None
+		self._count = 0
+		self._waiters = deque()
+		self.reset_stats()
+
+	def __repr__(self):
+		return "<FairLock(%r, %s, %d waiting)>" % (self.name, "locked" if self._owner else "unlocked", len(self._waiters))
+
+	def __enter__(self):
+		self.acquire()
+		return self
+
+	def __exit__(self, type, value, traceback):
+		self.release()
+
+	def locked(self):
+		return self._owner is not None
+
+	@property
+	def waiting(self):
+		""" Number of threads waiting for the lock """
+		return len(self._waiters)
+
+	def acquire(self, blocking=True, timeout=-1):
+		""" Acquires the lock, waiting behind the threads that asked before.
+		Returns False if it could not be acquired within timeout seconds.
+
+		:param blocking: If False, only acquires the lock if it is free
+		:param timeout: Seconds to wait, or -1 to wait forever
+		"""
+		me = threading.get_ident()
+		with self._mutex:
+			if self._owner == me:
+				self._count += 1
+				return True
+			if self._owner is None and not self._waiters:
+				self._owner = me
+				self._count = 1
+				self.acquisitions += 1
+				return True
+			if not blocking:
+				return False
+			waiter = threading.Lock()
+			waiter.acquire()
+			self._waiters.append((me, waiter))
+		start = time.perf_counter()
+		acquired = waiter.acquire(True, timeout)
+		wait = time.perf_counter() - start
+		with self._mutex:
+			if not acquired:
+				if self._owner != me:
+					self._waiters.remove((me, waiter))
+					self.timeouts += 1
+					return False
+				# The lock was handed over just as the wait timed out
+			self.acquisitions += 1
+			self.contended += 1
+			self.wait_time += wait
+			self.max_wait = max(self.max_wait, wait)
+		return True
+
+	def release(self):
+		""" Releases the lock, handing it to the longest waiting thread when the
+		owner has released it as many times as it acquired it
+		"""
+		with self._mutex:
+			if self._owner != threading.get_ident():
+				raise RuntimeError("cannot release un-acquired lock")
+			self._count -= 1
+			if self._count:
+				return
+			if self._waiters:
+				self._owner, waiter = self._waiters.popleft()
+				self._count = 1
+				waiter.release()
+			else:
+				self._owner = None
+
+	def stats(self):
+		""" Returns the number of acquisitions, how many had to wait, the timeouts,
+		and the total, mean and longest waits in seconds
+		"""
+		with self._mutex:
+			return {'acquisitions': self.acquisitions, 'contended': self.contended,
+				'timeouts': self.timeouts, 'wait_time': self.wait_time,
+				'mean_wait': self.wait_time / self.contended if self.contended else 0.0,
+				'max_wait': self.max_wait}
+
+	def reset_stats(self):
+		self.acquisitions = 0
+		self.contended = 0
+		self.timeouts = 0
+		self.wait_time = 0.0
+		self.max_wait = 0.0
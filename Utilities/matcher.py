@@ -0,0 +1,204 @@
+import functools
+import re
+from collections import deque, namedtuple
+
+
+class PromptMatch(namedtuple('PromptMatch', 'key text line')):
+	""" Pattern found by a :class:`PromptScanner`: the key of the pattern, the
+	text it matched, and the line where the match ends
+	"""
+	__slots__ = ()
+
+
+def _automaton(words):
+	""" Returns the goto, fail and output tables of an Aho-Corasick automaton
+	finding every word in a single pass over the text
+	"""
+	goto = [{}]
+	fail = [0]
+	out = [()]
+	for index, word in enumerate(words):
+		state = 0
+		for c in word:
+			following = goto[state].get(c)
+			if following is None:
+				following = len(goto)
+				goto[state][c] = following
+				goto.append({})
+				fail.append(0)
+				out.append(())
+			state = following
+		out[state] += (index,)
+	pending = deque(goto[0].values())
+	while pending:
+		state = pending.popleft()
+		for c, following in goto[state].items():
+			pending.append(following)
+			f = fail[state]
+			while f and c not in goto[f]:
+				f = fail[f]
+			fail[following] = goto[f].get(c, 0)
+			out[following] += out[fail[following]]
+	return goto, fail, out
+
+
+class PromptMatcher(object):
+	""" Set of prompts compiled once for :meth:`SerialPort.waitFor
+	<Utilities.SerialPort.SerialPort.waitFor>` and the console mode detection.
+
+	Literal prompts are searched together by an Aho-Corasick automaton, or with
+	:code:`str.find` when there is only one, and the regular expressions are
+	joined into a single alternation. Strings are literal unless regex is True;
+	compiled regular expressions are always searched as such. Multi-line regular
+	expressions see the line-ends, so that :code:`^` anchors a prompt at the
+	beginning of a line.
+
+	.. code-block:: python
+
+		prompts = PromptMatcher({'NORM': 'NORM>', 'CONSOLE': re.compile(r'^#', re.M)})
+		scanner = prompts.scan()
+		match = scanner.feed(line + '\\n')
+
+	:param patterns: A prompt, a list of prompts, or a dictionary of prompts by key.
+					 A prompt is its own key.
+	:param regex: If True, strings are regular expressions
+	:param case_sensitive: If False, prompts match in any case
+	:param window: Characters of earlier text kept for matches spanning several feeds
+	"""
+	def __init__(self, patterns, regex=False, case_sensitive=False, window=1024):
+		if isinstance(patterns, (str, re.Pattern)):
+			patterns = [patterns]
+		if not isinstance(patterns, dict):
+			patterns = dict((p.pattern if isinstance(p, re.Pattern) else p, p) for p in patterns)
+		self.case_sensitive = case_sensitive
+		self.window = window
+		self.keys = []
+		literals = []
+		expressions = []
+		compiled = []
+		flags = re.M if case_sensitive else re.M | re.I
+		for key, pattern in patterns.items():
+			index = len(self.keys)
+			self.keys.append(key)
+			if isinstance(pattern, re.Pattern):
+				if not case_sensitive:
+					pattern = re.compile(pattern.pattern, pattern.flags | re.I)
+				compiled.append((index, pattern))
+			elif regex:
+				expressions.append((index, pattern))
+			else:
+				literals.append((index, pattern if case_sensitive else pattern.lower()))
+		if expressions:
+			try:
+				joined = re.compile('|'.join('(?P<_%d>%s)' % (i, p) for i, p in expressions), flags)
+				compiled.append((None, joined))
+			except re.error:
+				# Back-references and global flags do not survive the join
+				compiled.extend((i, re.compile(p, flags)) for i, p in expressions)
+		self._regexes = compiled
+		self._literals = literals
+		self._longest = max([len(w) for i, w in literals] or [0])
+		self._empty = next((i for i, w in literals if w == ''), None)
+		if len(literals) > 1:
+			self._automaton = _automaton([w for i, w in literals])
+		else:
+			self._automaton = None
+
+	def __repr__(self):
+		return "<PromptMatcher(%r)>" % (self.keys,)
+
+	def scan(self):
+		""" Returns a new :class:`PromptScanner` of this prompt set """
+		return PromptScanner(self)
+
+	def search(self, text):
+		""" Returns the first :class:`PromptMatch` in text, or None """
+		return self.scan().feed(text)
+
+
+@functools.lru_cache(maxsize=64)
+def compile_prompts(patterns, regex=False, case_sensitive=False):
+	""" Returns the :class:`PromptMatcher` of a prompt or tuple of prompts,
+	compiling each prompt set only once
+	"""
+	return PromptMatcher(patterns, regex, case_sensitive)
+
+
+class PromptScanner(object):
+	""" Incremental search of the text received from a port for the prompts of
+	a :class:`PromptMatcher`. The text is fed as it arrives, and a prompt split
+	across feeds, or across lines, is still found.
+	"""
+	def __init__(self, matcher):
+		self.matcher = matcher
+		self._state = 0
+		self._tail = ''
+		self._pending = ''
+		self._keep = max(matcher.window, matcher._longest)
+
+	def reset(self):
+		self._state = 0
+		self._tail = ''
+		self._pending = ''
+
+	def feed(self, text=''):
+		""" Scans text and returns the first :class:`PromptMatch` ending in it, or
+		None. The text after a match is scanned by the next feed.
+		"""
+		matcher = self.matcher
+		text = self._pending + text
+		self._pending = ''
+		buf = self._tail + text
+		start = len(self._tail)
+		if matcher._empty is not None:
+			return self._found(buf, matcher._empty, start, start)
+
+		found = None
+		if matcher._automaton is not None:
+			found = self._step(buf, start)
+		elif matcher._literals:
+			index, word = matcher._literals[0]
+			scanned = buf if matcher.case_sensitive else buf.lower()
+			position = scanned.find(word, max(0, start - len(word) + 1))
+			if position >= 0:
+				found = (position + len(word), position, index)
+		for index, regex in matcher._regexes:
+			m = regex.search(buf)
+			if m is not None and (found is None or m.end() < found[0]):
+				found = (m.end(), m.start(), int(m.lastgroup[1:]) if index is None else index)
+
+		if found is None:
+			self._tail = buf[-self._keep:]
+			return None
+		end, begin, index = found
+		self._pending = buf[end:]
+		self._state = 0
+		return self._found(buf, index, begin, end)
+
+	def _step(self, buf, start):
+		""" Runs the automaton over the new text, returning (end, start, index) of
+		the first literal found
+		"""
+		goto, fail, out = self.matcher._automaton
+		literals = self.matcher._literals
+		text = buf[start:] if self.matcher.case_sensitive else buf[start:].lower()
+		state = self._state
+		for i, c in enumerate(text):
+			while state and c not in goto[state]:
+				state = fail[state]
+			state = goto[state].get(c, 0)
+			if out[state]:
+				self._state = state
+				index, word = literals[min(out[state])]
+				end = start + i + 1
+				return end, end - len(word), index
+		self._state = state
+		return None
+
+	def _found(self, buf, index, begin, end):
+		self._tail = ''
+		last = end - 1 if end > begin else end
+		first = buf.rfind('\n', 0, last) + 1
+		after = buf.find('\n', last)
+		line = buf[first:len(buf) if after < 0 else after]
+		return PromptMatch(self.matcher.keys[index], buf[begin:end], line.strip())
@@ -0,0 +1,145 @@
+class RingBuffer(object):
+	""" Bounded FIFO of bytes in a preallocated buffer. Data is added either by
+	copying (:meth:`write`) or by letting a stream fill the free space in place
+	(:meth:`fill`), so that bytes received beyond the end of one reply wait for the
+	next read without any reallocation.
+
+	When more data is written than fits, the oldest bytes are dropped and counted
+	in :attr:`dropped`.
+
+	:param size: Capacity in bytes
+	"""
+	def __init__(self, size=4096):
+		self._buffer = bytearray(size)
+		self._start = 0
+		self._count = 0
+		self.dropped = 0
+
+	def __len__(self):
+		return self._count
+
+	def __repr__(self):
+		return "<RingBuffer(%d/%d bytes)>" % (self._count, len(self._buffer))
+
+	@property
+	def capacity(self):
+		return len(self._buffer)
+
+	@property
+	def free(self):
+		return len(self._buffer) - self._count
+
+	def clear(self):
+		""" Discards every byte """
+		self._start = 0
+		self._count = 0
+
+	def _segments(self, start=0):
+		""" Returns the (begin, end) index pairs of the bytes from offset start """
+		size = len(self._buffer)
+		begin = (self._start + start) % size
+		end = begin + self._count - start
+		if end <= size:
+			return [(begin, end)]
+		return [(begin, size), (0, end - size)]
+
+	def write(self, data):
+		""" Appends data, dropping the oldest bytes if it does not fit """
+		data = memoryview(data).cast('B')
+		size = len(self._buffer)
+		if len(data) >= size:
+			self.dropped += self._count + len(data) - size
+			self._buffer[:] = data[len(data) - size:]
+			self._start = 0
+			self._count = size
+			return
+		overflow = len(data) - self.free
+		if overflow > 0:
+			self.skip(overflow)
+			self.dropped += overflow
+		end = (self._start + self._count) % size
+		first = min(len(data), size - end)
+		self._buffer[end:end + first] = data[:first]
+		self._buffer[:len(data) - first] = data[first:]
+		self._count += len(data)
+
+	def fill(self, readinto, limit=None):
+		""" Reads from a stream directly into the contiguous free space
+		:param readinto: Function that fills a writable memoryview and returns
+						 the number of bytes read, or None/0 when none arrived
+		:param limit: Maximum number of bytes to request
+		:returns: Number of bytes added
+		"""
+		size = len(self._buffer)
+		if self._count == size:
+			return 0
+		if self._count == 0:
+			self._start = end = 0
+		else:
+			end = (self._start + self._count) % size
+		stop = size if end > self._start or self._count == 0 else self._start
+		if limit is not None:
+			stop = min(stop, end + limit)
+		n = readinto(memoryview(self._buffer)[end:stop]) or 0
+		self._count += n
+		return n
+
+	def find(self, sub, start=0):
+		""" Returns the offset of the first occurrence of sub at or after offset
+		start, or -1
+		"""
+		if start >= self._count:
+			return -1
+		segments = self._segments(start)
+		begin, end = segments[0]
+		index = self._buffer.find(sub, begin, end)
+		if index >= 0:
+			return start + index - begin
+		if len(segments) == 1:
+			return -1
+		# Search across the wrap point, then the rest
+		tail = bytes(self._buffer[max(begin, end - len(sub) + 1):end])
+		head_end = segments[1][1]
+		joined = tail + bytes(self._buffer[:min(head_end, len(sub) - 1)])
+		index = joined.find(sub)
+		if index >= 0:
+			return start + (end - begin) - len(tail) + index
+		index = self._buffer.find(sub, 0, head_end)
+		if index >= 0:
+			return start + (end - begin) + index
+		return -1
+
+	def peek(self, n=None):
+		""" Returns up to n bytes without removing them """
+		n = self._count if n is None else min(n, self._count)
+		out = bytearray(n)
+		self._copy(out)
+		return bytes(out)
+
+	def read(self, n=None):
+		""" Removes and returns up to n bytes, or every byte """
+		data = self.peek(n)
+		self.skip(len(data))
+		return data
+
+	def readinto(self, buf):
+		""" Moves up to len(buf) bytes into buf and returns their number """
+		buf = memoryview(buf).cast('B')
+		n = self._copy(buf[:min(len(buf), self._count)])
+		self.skip(n)
+		return n
+
+	def _copy(self, out):
+		copied = 0
+		for begin, end in self._segments():
+			n = min(end - begin, len(out) - copied)
+			out[copied:copied + n] = self._buffer[begin:begin + n]
+			copied += n
+		return copied
+
+	def skip(self, n):
+		""" Discards up to n bytes from the front """
+		n = min(n, self._count)
+		self._start = (self._start + n) % len(self._buffer)
+		self._count -= n
+		return n
@@ -0,0 +1,394 @@
+"""
+ serialhub: Shares serial ports between several consumers
+"""
+import os
+import queue
+import re
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+import serial
+from Utilities.SerialPort import SerialPort, SerialReceiver
+from Utilities.lock import FairLock
+from Utilities.matcher import PromptMatcher
+
+
+# Unix sockets, to share the ports with other processes, are missing on Windows
+_UnixStreamServer = getattr(socketserver, 'UnixStreamServer', object)
+
+
+def socket_path(port):
+	""" Returns the Unix socket where the hub serves port, such as
+		/tmp/serialhub-ttyUSB0.sock for /dev/ttyUSB0 """
+	return os.path.join(tempfile.gettempdir(), "serialhub-%s.sock" % re.sub(r'\W', '_', os.path.basename(port)))
+
+
+def _matcher(filter):
+	""" Returns the function telling whether a line passes filter: a function of
+		the line, a PromptMatcher, a regex or None for every line """
+	if filter is None or callable(filter):
+		return filter
+	if isinstance(filter, PromptMatcher):
+		return lambda line: filter.search(line) is not None
+	return re.compile(filter).search
+
+
+class Subscription(object):
+	""" Queue of the lines received by a HubPort that pass the filter of one
+		consumer. When the consumer falls behind and the queue is full, the
+		policy decides what gives:
+			'drop_oldest': the oldest line is dropped, as SerialPort does
+			'drop_newest': the new line is dropped
+			'block': the port read thread waits up to block_timeout seconds for
+				room, holding back every subscriber, before dropping the line
+		Dropped lines are counted in dropped.
+			port: HubPort the lines come from
+			filter: function of a line, regex, PromptMatcher or None
+			maxsize: lines the queue holds
+	"""
+	POLICIES = ('drop_oldest', 'drop_newest', 'block')
+
+	def __init__(self,port,filter=None,maxsize=4096,policy='drop_oldest',block_timeout=1.0,name=None):
+		if policy not in Subscription.POLICIES:
+			raise ValueError("Invalid policy %s, expected one of %s" % (policy, Subscription.POLICIES))
+		self.port = port
+		self.name = name
+		self.policy = policy
+		self.block_timeout = block_timeout
+		self.q = queue.Queue(maxsize=maxsize)
+		self._match = _matcher(filter)
+		self.received = 0
+		self.dropped = 0
+		self.closed = False
+
+	def __repr__(self):
+		return "<Subscription(%r, %s, %d queued, %d dropped)>" % (self.name, self.port.port, self.q.qsize(), self.dropped)
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, type, value, traceback):
+		self.close()
+
+	def offer(self,line):
+		""" Queues line if it passes the filter. Called by the port read thread. """
+		if self.closed or (self._match is not None and not self._match(line)):
+			return
+		self.received += 1
+		if self.policy == 'block':
+			try:
+				self.q.put(line, timeout=self.block_timeout)
+			except queue.Full:
+				self.dropped += 1
+			return
+		while True:
+			try:
+				self.q.put_nowait(line)
+				return
+			except queue.Full:
+				if self.policy == 'drop_newest':
+					self.dropped += 1
+					return
+				try:
+					self.q.get_nowait()
+					self.dropped += 1
+				except queue.Empty:
+					pass
+
+	def recv(self,timeout=3.0):
+		""" Returns the next line, or '' if none arrives within timeout seconds """
+		try:
+			line = self.q.get(timeout=timeout)
+		except queue.Empty:
+			return ''
+		return '' if line is None else line
+
+	def send(self,sendStr):
+		""" Writes a line to the port, see HubPort.send() """
+		self.port.send(sendStr)
+
+	def expect(self,prompts,timeout=10):
+		""" Reads lines until one of prompts is matched, see SerialPort.expect() """
+		scanner = prompts.scan()
+		start_time = time.time()
+		while (time.time() - start_time) < timeout and not self.closed:
+			s = self.recv(max(0, start_time + timeout - time.time()))
+			if s:
+				match = scanner.feed(s + '\n')
+				if match is not None:
+					return match
+		return None
+
+	def close(self):
+		""" Stops receiving lines, and wakes up a reader waiting on the queue """
+		if self.closed:
+			return
+		self.closed = True
+		self.port.unsubscribe(self)
+		while True:
+			try:
+				self.q.put_nowait(None)
+				return
+			except queue.Full:
+				try:
+					self.q.get_nowait()
+				except queue.Empty:
+					pass
+
+
+class HubPort(object):
+	""" Serial port owned by the hub. A single SerialReceiver thread reads it and
+		hands each line to every subscription, and writes from any thread are
+		serialized by a FairLock so that lines never interleave.
+			port: a "COMn" string or a device such as /dev/ttyUSB0
+			baud: the baud rate to use
+			handle: an already opened serial port, instead of opening port
+			tx_term: terminator appended to the lines sent
+			idle: seconds without data before a partial line, such as a prompt, is passed on
+	"""
+	def __init__(self,port,baud=115200,handle=None,tx_term='\n',idle=0.1):
+		self.port = port
+		if handle is None:
+			# Exclusive, so that no other program reads the data from under the hub
+			handle = serial.Serial(port=port, baudrate=baud, bytesize=8, parity="N", stopbits=1,
+				timeout=3.0, writeTimeout=3.0, xonxoff=0, rtscts=0,
+				exclusive=True if os.name == 'posix' else None)
+		self.handle = handle
+		self.tx_terminator = tx_term
+		self.lock = FairLock(port)
+		self.server = None
+		self._subscribers = ()
+		self._mutex = threading.Lock()
+		self.receiver = SerialReceiver(self.handle, self, idle)
+		self.receiver.start()
+
+	def __repr__(self):
+		return "<HubPort(%s, %d subscribers)>" % (self.port, len(self._subscribers))
+
+	def put_nowait(self,line):
+		""" Fans a received line out to the subscriptions. Called by the read thread. """
+		for subscription in self._subscribers:
+			subscription.offer(line)
+
+	def subscribe(self,filter=None,maxsize=4096,policy='drop_oldest',block_timeout=1.0,name=None):
+		""" Returns a new Subscription to the lines received from now on """
+		subscription = Subscription(self, filter, maxsize, policy, block_timeout, name)
+		with self._mutex:
+			# The read thread iterates over the tuple without locking
+			self._subscribers = self._subscribers + (subscription,)
+		return subscription
+
+	def unsubscribe(self,subscription):
+		with self._mutex:
+			self._subscribers = tuple(s for s in self._subscribers if s is not subscription)
+
+	@property
+	def subscribers(self):
+		return list(self._subscribers)
+
+	def send(self,sendStr,timeout=10):
+		""" Writes the given string and the terminator to the serial port. """
+		self.write_raw((sendStr + self.tx_terminator).encode(), timeout)
+
+	def write_raw(self,data,timeout=10):
+		""" Writes bytes to the serial port, once the other writers are done. """
+		if not self.lock.acquire(timeout=timeout):
+			raise SerialPort.ThreadLockTimeout("Timed out waiting for mutex")
+		try:
+			self.handle.write(data)
+		finally:
+			self.lock.release()
+
+	def serve(self,path=None):
+		""" Serves the port on a Unix socket, socket_path(port) by default, where
+			SerialPort connects when it finds one. Returns the HubServer. """
+		if not hasattr(socket, 'AF_UNIX'):
+			raise OSError("Unix sockets are not available, use the SerialProxy to share %s" % self.port)
+		if self.server is None:
+			self.server = HubServer(self, path or socket_path(self.port))
+		return self.server
+
+	def close(self):
+		""" Stops serving the port, ends the subscriptions and closes the port. """
+		if self.server is not None:
+			self.server.close()
+			self.server = None
+		self.receiver.stop()
+		for subscription in self._subscribers:
+			subscription.close()
+		self.handle.close()
+
+
+class _ClientHandler(socketserver.StreamRequestHandler):
+	""" Connection of a client process: received lines are forwarded to it, and
+		the lines it writes are sent to the port whole. """
+	def handle(self):
+		port = self.server.port
+		subscription = port.subscribe(name="socket")
+		self.server.clients.add(self.request)
+		forward = threading.Thread(target=self._forward, args=(subscription,), name="SerialHubClient")
+		forward.daemon = True
+		forward.start()
+		try:
+			for line in self.rfile:
+				port.write_raw(line)
+		except (OSError, ValueError):
+			pass
+		finally:
+			self.server.clients.discard(self.request)
+			subscription.close()
+			forward.join(1)
+
+	def _forward(self,subscription):
+		while True:
+			line = subscription.q.get()
+			if line is None:
+				return
+			try:
+				self.wfile.write((line + '\n').encode())
+			except OSError:
+				subscription.close()
+				return
+
+
+class HubServer(socketserver.ThreadingMixIn, _UnixStreamServer):
+	""" Unix socket server of a HubPort, so that other processes share the port:
+		the Linux counterpart of the SerialProxy named pipes.
+			port: HubPort to serve
+			path: path of the socket
+	"""
+	daemon_threads = True
+
+	def __init__(self,port,path):
+		if os.path.exists(path):
+			os.unlink(path)  # Left over by a hub that did not close
+		socketserver.UnixStreamServer.__init__(self, path, _ClientHandler)
+		self.port = port
+		self.path = path
+		self.clients = set()
+		self.thread = threading.Thread(target=self.serve_forever, kwargs={'poll_interval': 0.1}, name="SerialHubServer")
+		self.thread.daemon = True
+		self.thread.start()
+
+	def server_bind(self):
+		# Only the user running the hub may connect to the port
+		umask = os.umask(0o177)
+		try:
+			socketserver.UnixStreamServer.server_bind(self)
+		finally:
+			os.umask(umask)
+		os.chmod(self.server_address, 0o600)
+
+	def close(self):
+		self.shutdown()
+		self.server_close()
+		for client in list(self.clients):
+			try:
+				client.shutdown(socket.SHUT_RDWR)
+			except OSError:
+				pass
+		if os.path.exists(self.path):
+			os.unlink(self.path)
+
+
+class SerialSocket(object):
+	""" This class mimics the python serial interface, but reads/writes to the
+		device through a HubServer Unix socket, as SerialPipe does through the
+		SerialProxy named pipe on Windows.
+	"""
+	def __init__(self,path,timeout):
+		self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+		try:
+			self.sock.connect(path)
+		except OSError:
+			self.sock.close()
+			raise
+		self.timeout = timeout
+		self._buffer = bytearray()
+
+	def fileno(self):
+		return self.sock.fileno()
+
+	def isOpen(self):
+		return self.sock is not None
+
+	def close(self):
+		""" Closes the connection to the hub. """
+		if self.sock is not None:
+			self.sock.close()
+			self.sock = None
+
+	def write(self, data):
+		""" Writes data to the serial port through the hub. """
+		self.sock.sendall(data)
+
+	def readline(self):
+		""" Reads a single line, or what arrived before the timeout. """
+		start_time = time.time()
+		while b'\n' not in self._buffer:
+			remaining = self.timeout - (time.time() - start_time)
+			if remaining <= 0:
+				break
+			self.sock.settimeout(remaining)
+			try:
+				data = self.sock.recv(4096)
+			except socket.timeout:
+				break
+			if not data:
+				break
+			self._buffer += data
+		end = self._buffer.find(b'\n') + 1 or len(self._buffer)
+		line = bytes(self._buffer[:end])
+		del self._buffer[:end]
+		return line
+
+	def inWaiting(self):
+		return len(self._buffer)
+
+	def flushInput(self):
+		self._buffer.clear()
+
+
+class SerialHub(object):
+	""" Ports shared by the consumers of this process. Each port is opened once,
+		by the first consumer asking for it:
+
+			sub = hub.subscribe('/dev/ttyUSB0', filter='ERROR|FAIL')
+			sub.send('bit')
+			line = sub.recv()
+	"""
+	def __init__(self):
+		self._ports = {}
+		self._lock = threading.Lock()
+
+	def __contains__(self, port):
+		return port in self._ports
+
+	def __len__(self):
+		return len(self._ports)
+
+	def open(self,port,baud=115200,**kwargs):
+		""" Returns the HubPort of port, opening it if needed """
+		with self._lock:
+			hub_port = self._ports.get(port)
+			if hub_port is None:
+				hub_port = self._ports[port] = HubPort(port, baud, **kwargs)
+			return hub_port
+
+	def subscribe(self,port,**kwargs):
+		""" Returns a new Subscription to port, see HubPort.subscribe() """
+		return self.open(port).subscribe(**kwargs)
+
+	def close(self,port=None):
+		""" Closes port, or every port """
+		with self._lock:
+			ports = list(self._ports) if port is None else [port]
+			for name in ports:
+				hub_port = self._ports.pop(name, None)
+				if hub_port is not None:
+					hub_port.close()
+
+
+hub = SerialHub()